@@ -18,7 +18,16 @@ References on import:
           http://www.python.org/dev/peps/pep-0328
 
 """
-__all__ = [u'__import__', u'import_module']
+__all__ = [u'__import__', u'import_module', u'import_module_async',
+           u'record_manifest', u'save_manifest', u'replay_manifest',
+           u'stop_replay', u'start_profiling', u'stop_profiling',
+           u'stats', u'reset_stats', u'add_import_hook',
+           u'remove_import_hook', u'start_flight_recorder',
+           u'stop_flight_recorder', u'mark_startup_complete',
+           u'late_imports', u'late_import_report', u'explain',
+           u'start_memory_profiling', u'start_dependency_graph',
+           u'stop_dependency_graph', u'start_usage_tracking',
+           u'stop_usage_tracking']
 
 from . import _bootstrap
 
@@ -36,7 +45,8 @@ def _case_ok(directory, check):
     """
     if u'PYTHONCASEOK' in os.environ:
         return True
-    elif check in os.listdir(directory if directory else os.getcwdu()):
+    _bootstrap._stats[u'listdir'] += 1
+    if check in os.listdir(directory if directory else os.getcwdu()):
         return True
     return False
 
@@ -62,6 +72,8 @@ def _r_long(int_bytes):
     XXX Temporary until marshal's long function are exposed.
 
     """
+    # Indexing gives integers whether bytes are str or not.
+    int_bytes = bytearray(int_bytes)
     x = int_bytes[0]
     x |= int_bytes[1] << 8
     x |= int_bytes[2] << 16
@@ -81,12 +93,13 @@ except ImportError:
         except ImportError:
             raise ImportError(u'posix, nt, or os2 module required for importlib_full')
 _bootstrap._os = _os
-import imp, sys, marshal, errno, _io
+import imp, sys, marshal, errno, _io, time
 _bootstrap.imp = imp
 _bootstrap.sys = sys
 _bootstrap.marshal = marshal
 _bootstrap.errno = errno
 _bootstrap._io = _io
+_bootstrap.time = time
 import _warnings
 _bootstrap._warnings = _warnings
 
@@ -99,6 +112,18 @@ _bootstrap._case_ok = _case_ok
 marshal._w_long = _w_long
 marshal._r_long = _r_long
 
+def _archive_path_hook(finder):
+    u"""Return a path hook for the named finder of importlib_full.machinery,
+    which is only imported once a path entry is in a file."""
+    def path_hook(path):
+        _bootstrap._split_archive_path(path)
+        from . import machinery
+        return getattr(machinery, finder)(path)
+    return path_hook
+
+_bootstrap._archive_path_hooks = [_archive_path_hook(u'BundleFinder'),
+                                  _archive_path_hook(u'ZipFinder')]
+
 
 # Public API #########################################################
 
@@ -122,3 +147,194 @@ def import_module(name, package=None):
                 break
             level += 1
     return _bootstrap._gcd_import(name[level:], package, level)
+
+
+def stats():
+    u"""Return a snapshot of the import machinery's counters as a dict.
+
+    The counters are: the 'stat', 'listdir' and 'open' calls and 'bytes_read'
+    by the finders and loaders; bytecode files used ('bytecode_hits') or
+    found stale or invalid ('bytecode_stale') and modules compiled from
+    source ('source_compiles') by SourceLoader.get_code; bytecode files
+    written ('bytecode_writes') or not ('bytecode_write_failures') by the file
+    system loader; and the number of times the import lock was taken
+    ('lock_acquires') and the seconds spent waiting for it ('lock_wait') and
+    holding it ('lock_held').
+
+    """
+    return dict(_bootstrap._stats)
+
+
+def reset_stats():
+    u"""Reset all of the counters returned by stats() to zero."""
+    _bootstrap._reset_stats()
+
+
+def add_import_hook(hook):
+    u"""Register a callable to observe imports made through importlib_full.
+
+    The hook is called as hook(event, name, info) where 'name' is the module
+    being imported and 'info' is a dict always holding the 'time' of the
+    event. The events, with the other keys of 'info', are:
+
+        import_start
+        finder_hit        finder, loader, duration
+        finder_miss       finder, duration
+        loader_chosen     loader
+        bytecode_used     path, duration
+        source_compiled   path, duration
+        exec_finished     loader, duration
+        import_finished   module, error, duration
+
+    'duration' is in seconds. 'finder_*' events are fired for each meta path
+    finder consulted, 'bytecode_used' and 'source_compiled' by the loaders
+    built on SourceLoader, and 'exec_finished' once the loader's
+    load_module() returns. 'import_finished' is fired whether or not the
+    import succeeded; 'error' is the exception it failed with or None.
+    Exceptions raised by a hook propagate out of the import.
+
+    """
+    _bootstrap._add_import_hook(hook)
+
+
+def remove_import_hook(hook):
+    u"""Unregister a hook added with add_import_hook()."""
+    _bootstrap._remove_import_hook(hook)
+
+
+class LateImportWarning(RuntimeWarning):
+
+    u"""Warning for an import made after mark_startup_complete()."""
+
+
+class LateImportError(ImportError):
+
+    u"""Raised for an import made after mark_startup_complete('raise')."""
+
+
+# The features below live in their own modules, which are only imported once
+# used so that importing importlib_full stays cheap.
+
+def import_module_async(name, package=None):
+    u"""Start importing a module and return a PendingImport for it."""
+    from ._async import import_module_async
+    return import_module_async(name, package)
+
+
+def record_manifest(path):
+    u"""Record the modules imported from now on into a manifest at 'path'."""
+    from ._manifest import record_manifest
+    return record_manifest(path)
+
+
+def save_manifest():
+    u"""Stop recording and write the manifest out."""
+    from ._manifest import save_manifest
+    return save_manifest()
+
+
+def replay_manifest(path, prefetch=True):
+    u"""Use the manifest at 'path' to load modules without searching for
+    them; return the number of entries that may be replayed."""
+    from ._manifest import replay_manifest
+    return replay_manifest(path, prefetch)
+
+
+def stop_replay():
+    u"""Stop replaying a manifest; return the (hits, misses) counts."""
+    from ._manifest import stop_replay
+    return stop_replay()
+
+
+def start_profiling(profiler=None):
+    u"""Start profiling imports made through importlib_full and return the
+    Profiler collecting them."""
+    from ._profile import start_profiling
+    return start_profiling(profiler)
+
+
+def stop_profiling():
+    u"""Stop profiling and return the Profiler that was in use, or None."""
+    from ._profile import stop_profiling
+    return stop_profiling()
+
+
+def start_flight_recorder(size=256):
+    u"""Start recording the last 'size' imports; return the FlightRecorder."""
+    from ._recorder import start_flight_recorder
+    return start_flight_recorder(size)
+
+
+def stop_flight_recorder(recorder):
+    u"""Stop 'recorder'; what it has recorded stays available."""
+    from ._recorder import stop_flight_recorder
+    return stop_flight_recorder(recorder)
+
+
+def mark_startup_complete(action=None):
+    u"""Record every import made through importlib_full from now on that is
+    not already in sys.modules; 'action' may be None, 'warn' or 'raise'."""
+    from ._late import mark_startup_complete
+    return mark_startup_complete(action)
+
+
+def late_imports():
+    u"""Return the recorded late imports in the order they started."""
+    from ._late import late_imports
+    return late_imports()
+
+
+def late_import_report():
+    u"""Return a text report of the late imports not nested in another one,
+    slowest first, with the line that triggered each."""
+    from ._late import late_import_report
+    return late_import_report()
+
+
+def explain(name, package=None):
+    u"""Return a trace of how importlib_full would import the named module."""
+    from ._explain import explain
+    return explain(name, package)
+
+
+def start_memory_profiling(measure=None):
+    u"""Start accounting the memory allocated by each import made through
+    importlib_full; return the MemoryProfiler. Stop with stop_profiling()."""
+    from ._memory import start_memory_profiling
+    return start_memory_profiling(measure)
+
+
+def start_dependency_graph(graph=None):
+    u"""Start capturing the dependency graph of imports made through
+    importlib_full and return the DependencyGraph collecting it."""
+    from ._graph import start_dependency_graph
+    return start_dependency_graph(graph)
+
+
+def stop_dependency_graph(graph):
+    u"""Stop capturing into 'graph'; what it has captured stays available."""
+    from ._graph import stop_dependency_graph
+    return stop_dependency_graph(graph)
+
+
+def start_usage_tracking(path=None, report_at_exit=True):
+    u"""Track which modules imported through importlib_full from now on are
+    ever used and return the UsageTracker."""
+    from ._usage import start_usage_tracking
+    return start_usage_tracking(path, report_at_exit)
+
+
+def stop_usage_tracking():
+    u"""Stop tracking new imports and return the UsageTracker that was in
+    use, or None."""
+    from ._usage import stop_usage_tracking
+    return stop_usage_tracking()
+
+
+# Honour IMPORTLIB_FULL_PROFILE and IMPORTLIB_FULL_UNUSED_REPORT.
+if os.environ.get(u'IMPORTLIB_FULL_PROFILE'):
+    from . import _profile
+    _profile._profile_from_environment()
+if os.environ.get(u'IMPORTLIB_FULL_UNUSED_REPORT'):
+    from . import _usage
+    _usage._track_from_environment()
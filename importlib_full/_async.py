@@ -0,0 +1,119 @@
+u"""Imports whose finding, reading and compiling happen in a worker thread.
+
+Only the execution of the module body is left to the thread which asks for the
+result, so an event loop can keep serving while the file system is searched
+and the source compiled.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import sys
+import threading
+
+
+# Imports still being prefetched, keyed by absolute module name, so that
+# concurrent requests for the same module share a single load.
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class PendingImport(object):
+
+    u"""Handle on an import started by importlib_full.import_module_async.
+
+    Callbacks registered through add_done_callback() are called from the
+    worker thread once the module is ready to be executed; an event loop
+    should use them to schedule a call to result() on its own thread (e.g.
+    with a thread-safe "call soon" method of the loop).
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._event = threading.Event()
+        self._callbacks = []
+        self._loader = None
+        self._code_object = None
+        self._exc_info = None
+        self._module = None
+
+    def _prefetch(self):
+        u"""Run in the worker thread to find the loader and code object."""
+        try:
+            self._loader, self._code_object = _bootstrap._prefetch(self.name)
+        except Exception:
+            self._exc_info = sys.exc_info()
+        with _pending_lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def done(self):
+        u"""Return True if result() can be called without blocking on I/O."""
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        u"""Block until the prefetch finishes; return done()."""
+        self._event.wait(timeout)
+        return self.done()
+
+    def add_done_callback(self, fxn):
+        u"""Call 'fxn' with this object once the prefetch finishes.
+
+        If the prefetch has already finished, 'fxn' is called immediately.
+
+        """
+        with _pending_lock:
+            if not self._event.is_set():
+                self._callbacks.append(fxn)
+                return
+        fxn(self)
+
+    def result(self):
+        u"""Execute the module in the calling thread and return it.
+
+        Blocks if the prefetch has not finished. Any exception raised while
+        finding or compiling the module is re-raised here.
+
+        """
+        self._event.wait()
+        with _pending_lock:
+            if _pending.get(self.name) is self:
+                del _pending[self.name]
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        if self._module is None:
+            self._module = _bootstrap._load_prefetched(self.name, self._loader,
+                                                       self._code_object)
+        return self._module
+
+
+def import_module_async(name, package=None):
+    u"""Start importing a module and return a PendingImport for it.
+
+    The arguments are the same as for importlib_full.import_module. Requests
+    for a module whose import is already pending return the same
+    PendingImport. A parent package which is not imported yet is imported by
+    result(), in which case the module itself is found there as well.
+
+    """
+    level = 0
+    if name.startswith(u'.'):
+        if not package:
+            raise TypeError(u"relative imports require the 'package' argument")
+        for character in name:
+            if character != u'.':
+                break
+            level += 1
+    name = _bootstrap._resolve_name(name[level:], package, level)
+    with _pending_lock:
+        try:
+            return _pending[name]
+        except KeyError:
+            pending = _pending[name] = PendingImport(name)
+    thread = threading.Thread(target=pending._prefetch,
+                              name=u'import_module_async(%s)' % name)
+    thread.daemon = True
+    thread.start()
+    return pending
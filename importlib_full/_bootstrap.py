@@ -8,7 +8,7 @@ work. One should use importlib_full as the public-facing version of this module.
 """
 
 # Injected modules are '_warnings', 'imp', 'sys', 'marshal', 'errno', '_io',
-# and '_os' (a.k.a. 'posix', 'nt' or 'os2').
+# 'time' and '_os' (a.k.a. 'posix', 'nt' or 'os2').
 # Injected attribute is path_sep.
 #
 # When editing this code be aware that code executed at import time CANNOT
@@ -20,6 +20,21 @@ work. One should use importlib_full as the public-facing version of this module.
 
 # XXX Could also expose Modules/getpath.c:joinpath()
 from __future__ import with_statement
+
+
+# Counters reported by importlib_full.stats(); the lock times are in seconds.
+_STAT_NAMES = (u'stat', u'listdir', u'open', u'bytes_read', u'bytecode_hits',
+               u'bytecode_stale', u'source_compiles', u'bytecode_writes',
+               u'bytecode_write_failures', u'lock_acquires', u'lock_wait',
+               u'lock_held')
+_stats = dict.fromkeys(_STAT_NAMES, 0)
+
+def _reset_stats():
+    u"""Reset every counter in _stats to zero."""
+    for stat_name in _STAT_NAMES:
+        _stats[stat_name] = 0
+
+
 def _path_join(*args):
     u"""Replacement for os.path.join."""
     return path_sep.join(x[:-len(path_sep)] if x.endswith(path_sep) else x
@@ -28,6 +43,7 @@ def _path_join(*args):
 
 def _path_exists(path):
     u"""Replacement for os.path.exists."""
+    _stats[u'stat'] += 1
     try:
         _os.stat(path)
     except OSError:
@@ -38,6 +54,7 @@ def _path_exists(path):
 
 def _path_is_mode_type(path, mode):
     u"""Test whether the path is the specified mode type."""
+    _stats[u'stat'] += 1
     try:
         stat_info = _os.stat(path)
     except OSError:
@@ -68,6 +85,16 @@ def _path_without_ext(path, ext_type):
         raise ValueError(u"path is not of the specified type")
 
 
+def _cache_from_source(path):
+    u"""Return imp.cache_from_source(path) or, where the imp module predates
+    PEP 3147, the path of the bytecode file next to the source as the
+    built-in import uses."""
+    cache_from_source = getattr(imp, u'cache_from_source', None)
+    if cache_from_source is None:
+        return path + (u'c' if __debug__ else u'o')
+    return cache_from_source(path)
+
+
 def _path_absolute(path):
     u"""Replacement for os.path.abspath."""
     if not path:
@@ -90,6 +117,73 @@ def _wrap(new, old):
 
 code_type = type(_wrap.func_code)
 
+
+# Set by importlib_full.start_profiling() to the Profiler in use.
+_profiler = None
+
+def _timed(phase, fxn, *args, **kwargs):
+    u"""Call fxn, attributing the time spent to 'phase' of the current import
+    when profiling."""
+    if _profiler is None:
+        return fxn(*args, **kwargs)
+    return _profiler.timed(phase, fxn, args, kwargs)
+
+
+# Callbacks registered through importlib_full.add_import_hook(). The list is
+# replaced rather than mutated so it can be iterated without a lock.
+_import_hooks = []
+
+def _add_import_hook(hook):
+    global _import_hooks
+    _import_hooks = _import_hooks + [hook]
+
+
+def _remove_import_hook(hook):
+    global _import_hooks
+    hooks = list(_import_hooks)
+    hooks.remove(hook)
+    _import_hooks = hooks
+
+
+def _fire(event, name, **info):
+    u"""Call every import hook with the event, the module name and a dict of
+    details which always includes the 'time' of the event."""
+    info[u'time'] = time.time()
+    for hook in _import_hooks:
+        hook(event, name, info)
+
+
+def _exec_code(code_object, namespace):
+    u"""Execute a code object; a function of its own so it can be timed."""
+    exec(code_object, namespace)
+
+
+def _decode_source(source_bytes):
+    u"""Decode source code with universal newlines, in the encoding given by
+    its BOM or PEP 263 coding cookie, or else UTF-8."""
+    import tokenize
+    try:
+        detect_encoding = tokenize.detect_encoding
+    except AttributeError:
+        # Python 2's tokenize does not detect encodings.
+        encoding = u'utf-8'
+        if source_bytes.startswith(b'\xef\xbb\xbf'):
+            encoding = u'utf-8-sig'
+        else:
+            import re
+            for line in source_bytes.splitlines()[:2]:
+                match = re.match(br'[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)',
+                                 line)
+                if match:
+                    encoding = match.group(1).decode(u'ascii')
+                    break
+                if line.strip() and not line.lstrip().startswith(b'#'):
+                    break
+    else:
+        encoding = detect_encoding(_io.BytesIO(source_bytes).readline)[0]
+    newline_decoder = _io.IncrementalNewlineDecoder(None, True)
+    return newline_decoder.decode(source_bytes.decode(encoding))
+
 # Finder/loader utility code ##################################################
 
 def set_package(fxn):
@@ -325,15 +419,27 @@ class _LoaderBasics(object):
 
     @module_for_loader
     def _load_module(self, module, **_3to2kwargs):
+        if 'code_object' in _3to2kwargs: code_object = _3to2kwargs['code_object']; del _3to2kwargs['code_object']
+        else: code_object = None
         if 'sourceless' in _3to2kwargs: sourceless = _3to2kwargs['sourceless']; del _3to2kwargs['sourceless']
         else: sourceless = False
         u"""Helper for load_module able to handle either source or sourceless
-        loading."""
+        loading.
+
+        If 'code_object' is given it is executed instead of calling get_code.
+
+        """
         name = module.__name__
-        code_object = self.get_code(name)
+        if code_object is None:
+            code_object = self.get_code(name)
         module.__file__ = self.get_filename(name)
         if not sourceless:
-            module.__cached__ = imp.cache_from_source(module.__file__)
+            if (_packed_bytecode is not None and
+                    isinstance(self, _SourceFileLoader)):
+                cached = _packed_bytecode.pack_path(module.__file__)
+            else:
+                cached = _cache_from_source(module.__file__)
+            module.__cached__ = cached
         else:
             module.__cached__ = module.__file__
         module.__package__ = name
@@ -342,7 +448,7 @@ class _LoaderBasics(object):
         else:
             module.__package__ = module.__package__.rpartition(u'.')[0]
         module.__loader__ = self
-        exec(code_object, module.__dict__)
+        _timed(u'exec', _exec_code, code_object, module.__dict__)
         return module
 
 
@@ -368,15 +474,12 @@ class SourceLoader(_LoaderBasics):
 
     def get_source(self, fullname):
         u"""Concrete implementation of InspectLoader.get_source."""
-        import tokenize
         path = self.get_filename(fullname)
         try:
             source_bytes = self.get_data(path)
         except IOError:
             raise ImportError(u"source not available through get_data()")
-        encoding = tokenize.detect_encoding(_io.BytesIO(source_bytes).readline)
-        newline_decoder = _io.IncrementalNewlineDecoder(None, True)
-        return newline_decoder.decode(source_bytes.decode(encoding[0]))
+        return _decode_source(source_bytes)
 
     def get_code(self, fullname):
         u"""Concrete implementation of InspectLoader.get_code.
@@ -385,8 +488,11 @@ class SourceLoader(_LoaderBasics):
         bytecode, set_data must also be implemented.
 
         """
+        hooks = _import_hooks
+        if hooks:
+            start = time.time()
         source_path = self.get_filename(fullname)
-        bytecode_path = imp.cache_from_source(source_path)
+        bytecode_path = _cache_from_source(source_path)
         source_mtime = None
         if bytecode_path is not None:
             try:
@@ -395,25 +501,36 @@ class SourceLoader(_LoaderBasics):
                 pass
             else:
                 try:
-                    data = self.get_data(bytecode_path)
+                    data = _timed(u'read', self.get_data, bytecode_path)
                 except IOError:
                     pass
                 else:
                     try:
-                        bytes_data = self._bytes_from_bytecode(fullname, data,
-                                                               source_mtime)
+                        bytes_data = _timed(u'validate',
+                                            self._bytes_from_bytecode,
+                                            fullname, data, source_mtime)
                     except (ImportError, EOFError):
-                        pass
+                        _stats[u'bytecode_stale'] += 1
                     else:
-                        found = marshal.loads(bytes_data)
+                        found = _timed(u'unmarshal', marshal.loads,
+                                       bytes_data)
                         if isinstance(found, code_type):
+                            _stats[u'bytecode_hits'] += 1
+                            if hooks:
+                                _fire(u'bytecode_used', fullname,
+                                      path=bytecode_path,
+                                      duration=time.time() - start)
                             return found
                         else:
                             msg = u"Non-code object in %s"
                             raise ImportError(msg % bytecode_path)
-        source_bytes = self.get_data(source_path)
-        code_object = compile(source_bytes, source_path, u'exec',
-                                dont_inherit=True)
+        source_bytes = _timed(u'read', self.get_data, source_path)
+        _stats[u'source_compiles'] += 1
+        code_object = _timed(u'compile', compile, source_bytes, source_path,
+                             u'exec', dont_inherit=True)
+        if hooks:
+            _fire(u'source_compiled', fullname, path=source_path,
+                  duration=time.time() - start)
         if (not sys.dont_write_bytecode and bytecode_path is not None and
                 source_mtime is not None):
             # If e.g. Jython ever implements imp.cache_from_source to have
@@ -423,7 +540,7 @@ class SourceLoader(_LoaderBasics):
             data.extend(marshal._w_long(source_mtime))
             data.extend(marshal.dumps(code_object))
             try:
-                self.set_data(bytecode_path, data)
+                _timed(u'write', self.set_data, bytecode_path, data)
             except NotImplementedError:
                 pass
         return code_object
@@ -457,16 +574,63 @@ class _FileLoader(object):
 
     def get_data(self, path):
         u"""Return the data from path as raw bytes."""
+        _stats[u'open'] += 1
         with _io.FileIO(path, u'r') as file:
-            return file.read()
+            data = file.read()
+        _stats[u'bytes_read'] += len(data)
+        return data
 
 
+# Set by importlib_full.util.enable_packed_bytecode() to an object whose
+# get(source_path, mtime, size) returns the packed code object for a source
+# file, or None, whose put(source_path, mtime, size, code_object) packs it and
+# whose pack_path(source_path) returns the path of the pack holding it.
+_packed_bytecode = None
+
 class _SourceFileLoader(_FileLoader, SourceLoader):
 
     u"""Concrete implementation of SourceLoader using the file system."""
 
+    def get_code(self, fullname):
+        u"""Return the code object from the packed bytecode cache of the
+        module's directory if one is in use, else as SourceLoader does.
+
+        A packed entry is used only if the size and modification time of the
+        source match it; otherwise the source is compiled and packed in its
+        place. No per-module bytecode file is read or written meanwhile.
+
+        """
+        packed = _packed_bytecode
+        if packed is None:
+            return SourceLoader.get_code(self, fullname)
+        hooks = _import_hooks
+        if hooks:
+            start = time.time()
+        source_path = self.get_filename(fullname)
+        _stats[u'stat'] += 1
+        stat_info = _os.stat(source_path)
+        source_mtime, source_size = int(stat_info.st_mtime), stat_info.st_size
+        found = packed.get(source_path, source_mtime, source_size)
+        if found is not None:
+            _stats[u'bytecode_hits'] += 1
+            if hooks:
+                _fire(u'bytecode_used', fullname, path=source_path,
+                      duration=time.time() - start)
+            return found
+        source_bytes = _timed(u'read', self.get_data, source_path)
+        _stats[u'source_compiles'] += 1
+        code_object = _timed(u'compile', compile, source_bytes, source_path,
+                             u'exec', dont_inherit=True)
+        if hooks:
+            _fire(u'source_compiled', fullname, path=source_path,
+                  duration=time.time() - start)
+        if not sys.dont_write_bytecode:
+            packed.put(source_path, source_mtime, source_size, code_object)
+        return code_object
+
     def path_mtime(self, path):
         u"""Return the modification time for the path."""
+        _stats[u'stat'] += 1
         return int(_os.stat(path).st_mtime)
 
     def set_data(self, path, data):
@@ -487,23 +651,28 @@ class _SourceFileLoader(_FileLoader, SourceLoader):
                 if exc.errno == errno.EEXIST:
                     continue
                 else:
+                    _stats[u'bytecode_write_failures'] += 1
                     raise
             except IOError, exc:
+                _stats[u'bytecode_write_failures'] += 1
                 # If can't get proper access, then just forget about writing
                 # the data.
                 if exc.errno == errno.EACCES:
                     return
                 else:
                     raise
+        _stats[u'open'] += 1
         try:
             with _io.FileIO(path, u'wb') as file:
                 file.write(data)
         except IOError, exc:
+            _stats[u'bytecode_write_failures'] += 1
             # Don't worry if you can't write bytecode.
             if exc.errno == errno.EACCES:
                 return
             else:
                 raise
+        _stats[u'bytecode_writes'] += 1
 
 
 class _SourcelessFileLoader(_FileLoader, _LoaderBasics):
@@ -514,11 +683,18 @@ class _SourcelessFileLoader(_FileLoader, _LoaderBasics):
         return self._load_module(fullname, sourceless=True)
 
     def get_code(self, fullname):
+        hooks = _import_hooks
+        if hooks:
+            start = time.time()
         path = self.get_filename(fullname)
-        data = self.get_data(path)
-        bytes_data = self._bytes_from_bytecode(fullname, data, None)
-        found = marshal.loads(bytes_data)
+        data = _timed(u'read', self.get_data, path)
+        bytes_data = _timed(u'validate', self._bytes_from_bytecode, fullname,
+                            data, None)
+        found = _timed(u'unmarshal', marshal.loads, bytes_data)
         if isinstance(found, code_type):
+            if hooks:
+                _fire(u'bytecode_used', fullname, path=path,
+                      duration=time.time() - start)
             return found
         else:
             raise ImportError(u"Non-code object in %s" % path)
@@ -553,7 +729,7 @@ class _ExtensionFileLoader(object):
         u"""Load an extension module."""
         is_reload = fullname in sys.modules
         try:
-            return imp.load_dynamic(fullname, self._path)
+            return _timed(u'exec', imp.load_dynamic, fullname, self._path)
         except:
             if not is_reload and fullname in sys.modules:
                 del sys.modules[fullname]
@@ -725,6 +901,25 @@ def _file_path_hook(path):
 
 _DEFAULT_PATH_HOOK = _file_path_hook
 
+def _split_archive_path(path):
+    u"""Split 'path' into the path of the file it is in or is and the list of
+    the names leading from that file to it; ImportError is raised if no part
+    of the path is a file."""
+    archive_path = path
+    inner = []
+    while not _path_isfile(archive_path):
+        archive_path, _, part = archive_path.rpartition(path_sep)
+        if not archive_path or not part:
+            raise ImportError(u"not in an archive: %s" % path)
+        inner.append(part)
+    inner.reverse()
+    return archive_path, inner
+
+
+# Set by importlib_full to the path hooks for archive files (bundles and zip
+# archives), which are tried after _DEFAULT_PATH_HOOK.
+_archive_path_hooks = []
+
 class _DefaultPathFinder(PathFinder):
 
     u"""Subclass of PathFinder that implements implicit semantics for
@@ -736,7 +931,8 @@ class _DefaultPathFinder(PathFinder):
         try:
             return super(cls, cls)._path_hooks(path)
         except ImportError:
-            implicit_hooks = [_DEFAULT_PATH_HOOK, imp.NullImporter]
+            implicit_hooks = ([_DEFAULT_PATH_HOOK] + _archive_path_hooks +
+                              [imp.NullImporter])
             return super(cls, cls)._path_hooks(path, implicit_hooks)
 
     @classmethod
@@ -746,16 +942,48 @@ class _DefaultPathFinder(PathFinder):
         return super(cls, cls)._path_importer_cache(path, _DEFAULT_PATH_HOOK)
 
 
+class _PrefetchedLoader(object):
+
+    u"""Loader which executes a code object that was fetched ahead of time by
+    the wrapped loader."""
+
+    def __init__(self, loader, code_object):
+        self._loader = loader
+        self._code_object = code_object
+
+    def load_module(self, fullname):
+        u"""Load the module using the prefetched code object."""
+        sourceless = not isinstance(self._loader, SourceLoader)
+        return self._loader._load_module(fullname, sourceless=sourceless,
+                                         code_object=self._code_object)
+
+
+# Re-entrant acquisitions of the import lock by the thread holding it; only
+# the outermost one is counted in _stats.
+_lock_depth = 0
+_lock_acquired_at = 0
+
 class _ImportLockContext(object):
 
     u"""Context manager for the import lock."""
 
     def __enter__(self):
         u"""Acquire the import lock."""
+        global _lock_depth, _lock_acquired_at
+        start = time.time()
         imp.acquire_lock()
+        if not _lock_depth:
+            _lock_acquired_at = time.time()
+            _stats[u'lock_acquires'] += 1
+            _stats[u'lock_wait'] += _lock_acquired_at - start
+        _lock_depth += 1
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         u"""Release the import lock regardless of any raised exceptions."""
+        global _lock_depth
+        _lock_depth -= 1
+        if not _lock_depth:
+            _stats[u'lock_held'] += time.time() - _lock_acquired_at
         imp.release_lock()
 
 
@@ -763,15 +991,28 @@ _IMPLICIT_META_PATH = [BuiltinImporter, FrozenImporter, _DefaultPathFinder]
 
 _ERR_MSG = u'No module named %s'
 
-def _gcd_import(name, package=None, level=0):
-    u"""Import and return the module based on its name, the package the call is
-    being made from, and the level adjustment.
+# Set by importlib_full.util.enable_lazy_loading() to a callable taking the
+# module name and the loader found for it and returning the loader to use.
+_lazy_loader = None
 
-    This function represents the greatest common denominator of functionality
-    between import_module and __import__. This includes settting __package__ if
-    the loader did not.
+# Set by importlib_full.start_usage_tracking() to a callable like
+# _lazy_loader; it is only consulted for modules which are not made lazy.
+_tracking_loader = None
 
-    """
+# Set by importlib_full.replay_manifest() to a callable taking the module name
+# and returning a loader, or None to fall back to searching the meta path.
+_replay_loader = None
+
+# Set by importlib_full.record_manifest() to a callable taking the module name
+# and the loader that successfully loaded it.
+_record_loader = None
+
+# Set by importlib_full.start_dependency_graph() to a callable taking the
+# absolute name of every module requested from _gcd_import.
+_dependency_graph = None
+
+def _resolve_name(name, package, level):
+    u"""Resolve a relative module name to an absolute one."""
     if package:
         if not hasattr(package, u'rindex'):
             raise ValueError(u"__package__ not set to a string")
@@ -793,7 +1034,130 @@ def _gcd_import(name, package=None, level=0):
             name = u"%s.%s" % (package[:dot], name)
         else:
             name = package[:dot]
+    return name
+
+
+def _find_loader(name, path):
+    u"""Return the loader from the first meta path finder which can handle
+    'name', or None."""
+    hooks = _import_hooks
+    meta_path = sys.meta_path + _IMPLICIT_META_PATH
+    for finder in meta_path:
+        if hooks:
+            start = time.time()
+        loader = finder.find_module(name, path)
+        if hooks:
+            if loader is not None:
+                _fire(u'finder_hit', name, finder=finder, loader=loader,
+                      duration=time.time() - start)
+            else:
+                _fire(u'finder_miss', name, finder=finder,
+                      duration=time.time() - start)
+        if loader is not None:
+            return loader
+    return None
+
+
+def _find_and_load(name, loader=None):
+    u"""Find and load the module 'name', which must not be in sys.modules.
+
+    If 'loader' is given then the meta path is not searched. The import lock
+    must be held by the caller.
+
+    """
+    hooks = _import_hooks
+    if hooks:
+        start = time.time()
+    try:
+        # A hook may fail the import from 'import_start'; 'import_finished'
+        # is fired for it all the same so other hooks see the import end.
+        if hooks:
+            _fire(u'import_start', name)
+        if _profiler is not None:
+            module = _profiler.timed_import(name, _find_and_load_unprofiled,
+                                            (name, loader))
+        else:
+            module = _find_and_load_unprofiled(name, loader)
+    except:
+        if hooks:
+            _fire(u'import_finished', name, module=None,
+                  error=sys.exc_info()[1], duration=time.time() - start)
+        raise
+    if hooks:
+        _fire(u'import_finished', name, module=module, error=None,
+              duration=time.time() - start)
+    return module
+
+
+def _find_and_load_unprofiled(name, loader=None):
+    u"""Implementation of _find_and_load."""
+    parent = name.rpartition(u'.')[0]
+    path = None
+    if parent:
+        if parent not in sys.modules:
+            _gcd_import(parent)
+        # Backwards-compatibility; be nicer to skip the dict lookup.
+        parent_module = sys.modules[parent]
+        try:
+            path = parent_module.__path__
+        except AttributeError:
+            msg = (_ERR_MSG + u'; %s is not a package') % (name, parent)
+            raise ImportError(msg)
+    if loader is None:
+        if _replay_loader is not None:
+            loader = _timed(u'find', _replay_loader, name)
+        if loader is None:
+            loader = _timed(u'find', _find_loader, name, path)
+            if loader is None:
+                raise ImportError(_ERR_MSG % name)
+        found = loader
+        if _lazy_loader is not None:
+            loader = _lazy_loader(name, loader)
+        if _tracking_loader is not None and loader is found:
+            loader = _tracking_loader(name, loader)
+    else:
+        found = loader
+    hooks = _import_hooks
+    if hooks:
+        _fire(u'loader_chosen', name, loader=found)
+        start = time.time()
+    loader.load_module(name)
+    if hooks:
+        _fire(u'exec_finished', name, loader=found,
+              duration=time.time() - start)
+    if _record_loader is not None:
+        _record_loader(name, found)
+    # Backwards-compatibility; be nicer to skip the dict lookup.
+    module = sys.modules[name]
+    if parent:
+        # Set the module as an attribute on its parent.
+        setattr(parent_module, name.rpartition(u'.')[2], module)
+    # Set __package__ if the loader did not.
+    if not hasattr(module, u'__package__') or module.__package__ is None:
+        # Watch out for what comes out of sys.modules to not be a module,
+        # e.g. an int.
+        try:
+            module.__package__ = module.__name__
+            if not hasattr(module, u'__path__'):
+                module.__package__ = module.__package__.rpartition(u'.')[0]
+        except AttributeError:
+            pass
+    return module
+
+
+def _gcd_import(name, package=None, level=0):
+    u"""Import and return the module based on its name, the package the call is
+    being made from, and the level adjustment.
+
+    This function represents the greatest common denominator of functionality
+    between import_module and __import__. This includes settting __package__ if
+    the loader did not.
+
+    """
+    name = _resolve_name(name, package, level)
     with _ImportLockContext():
+        if _dependency_graph is not None:
+            _dependency_graph(name)
         try:
             module = sys.modules[name]
             if module is None:
@@ -802,42 +1166,43 @@ def _gcd_import(name, package=None, level=0):
             return module
         except KeyError:
             pass
-        parent = name.rpartition(u'.')[0]
-        path = None
-        if parent:
-            if parent not in sys.modules:
-                _gcd_import(parent)
-            # Backwards-compatibility; be nicer to skip the dict lookup.
-            parent_module = sys.modules[parent]
-            try:
-                path = parent_module.__path__
-            except AttributeError:
-                msg = (_ERR_MSG + u'; %s is not a package') % (name, parent)
-                raise ImportError(msg)
-        meta_path = sys.meta_path + _IMPLICIT_META_PATH
-        for finder in meta_path:
-            loader = finder.find_module(name, path)
-            if loader is not None:
-                loader.load_module(name)
-                break
-        else:
-            raise ImportError(_ERR_MSG % name)
-        # Backwards-compatibility; be nicer to skip the dict lookup.
-        module = sys.modules[name]
-        if parent:
-            # Set the module as an attribute on its parent.
-            setattr(parent_module, name.rpartition(u'.')[2], module)
-        # Set __package__ if the loader did not.
-        if not hasattr(module, u'__package__') or module.__package__ is None:
-            # Watch out for what comes out of sys.modules to not be a module,
-            # e.g. an int.
-            try:
-                module.__package__ = module.__name__
-                if not hasattr(module, u'__path__'):
-                    module.__package__ = module.__package__.rpartition(u'.')[0]
-            except AttributeError:
-                pass
-        return module
+        return _find_and_load(name)
+
+
+def _prefetch(name):
+    u"""Find the loader for the absolute module 'name' and read or compile its
+    code object, all without holding the import lock.
+
+    Nothing is executed, so a (loader, code object) pair of (None, None) is
+    returned when the module is already imported or its parent package is
+    not. The code object is None for loaders not built on _LoaderBasics.
+
+    """
+    if name in sys.modules:
+        return None, None
+    parent = name.rpartition(u'.')[0]
+    path = None
+    if parent:
+        try:
+            path = sys.modules[parent].__path__
+        except (KeyError, AttributeError):
+            return None, None
+    loader = _find_loader(name, path)
+    if loader is None:
+        raise ImportError(_ERR_MSG % name)
+    if not isinstance(loader, _LoaderBasics):
+        return loader, None
+    return loader, loader.get_code(name)
+
+
+def _load_prefetched(name, loader, code_object):
+    u"""Finish an import started by _prefetch() by executing the module."""
+    with _ImportLockContext():
+        if loader is None or name in sys.modules:
+            return _gcd_import(name)
+        if code_object is not None:
+            loader = _PrefetchedLoader(loader, code_object)
+        return _find_and_load(name, loader)
 
 
 def __import__(name, globals={}, locals={}, fromlist=[], level=0):
@@ -874,7 +1239,7 @@ def __import__(name, globals={}, locals={}, fromlist=[], level=0):
             return module
         else:
             cut_off = len(name) - len(name.partition(u'.')[0])
-            return sys.modules[module.__name__[:-cut_off]]
+            return sys.modules[module.__name__[:len(module.__name__)-cut_off]]
     else:
         # If a package was imported, try to import stuff from fromlist.
         if hasattr(module, u'__path__'):
@@ -0,0 +1,194 @@
+u"""Import of modules from bundles of precompiled code.
+
+A bundle is a single file built by importlib_full.bundle holding the
+marshalled code object of every module of an application. It starts with a
+header:
+
+    signature       8 bytes, SIGNATURE
+    version         4 bytes, VERSION
+    magic           4 bytes, imp.get_magic() of the Python that built it
+    index offset    8 bytes
+    index size      8 bytes
+
+all integers little-endian, followed by the code objects and the index: the
+marshalled dict mapping every module name to (offset, size, is_package,
+source path) for its code object. The source path is the file the code was
+compiled from, which tracebacks show.
+
+Opening a bundle takes one open, one mmap and unmarshalling the index; a
+module is then found with a dictionary lookup and its code unmarshalled only
+when it is loaded. BundleFinder is the path hook for sys.path entries naming
+a bundle or a package inside one.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import imp
+import marshal
+import mmap
+import struct
+import time
+
+
+SIGNATURE = b'IMPLBNDL'
+
+VERSION = 1
+
+HEADER = struct.Struct(u'<8sL4sQQ')
+
+
+class _Bundle(object):
+
+    u"""A bundle file read through a memory map.
+
+    'index' maps every module name to (offset, size, is_package,
+    source path).
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            _bootstrap._stats[u'open'] += 1
+            with _bootstrap._io.FileIO(path, u'r') as file:
+                header = file.read(HEADER.size)
+                if (len(header) != HEADER.size or
+                        not header.startswith(SIGNATURE)):
+                    raise ImportError(u"not a bundle: %s" % path)
+                self._map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        except EnvironmentError:
+            raise ImportError(u"can't read bundle %s" % path)
+        signature, version, magic, offset, size = HEADER.unpack(header)
+        if version != VERSION:
+            raise ImportError(u"bundle %s has unsupported version %d"
+                              % (path, version))
+        if magic != imp.get_magic():
+            raise ImportError(u"bundle %s was built by another version of "
+                              u"Python" % path)
+        index = self._map[offset:offset + size]
+        _bootstrap._stats[u'bytes_read'] += len(index)
+        try:
+            self.index = marshal.loads(index)
+        except (EOFError, ValueError, TypeError):
+            raise ImportError(u"bad index in bundle %s" % path)
+
+    def code(self, name):
+        u"""Return the marshalled code object of module 'name'."""
+        offset, size = self.index[name][:2]
+        data = self._map[offset:offset + size]
+        _bootstrap._stats[u'bytes_read'] += len(data)
+        return data
+
+
+# Path of a bundle to its _Bundle.
+_bundles = {}
+
+
+def _open_bundle(path):
+    u"""Return the _Bundle for the file at 'path', reusing the one of a
+    previous call unless the file has changed since."""
+    _bootstrap._stats[u'stat'] += 1
+    stat_info = _bootstrap._os.stat(path)
+    key = (stat_info.st_mtime, stat_info.st_size)
+    bundle = _bundles.get(path)
+    if bundle is None or bundle.key != key:
+        bundle = _Bundle(path)
+        bundle.key = key
+        _bundles[path] = bundle
+    return bundle
+
+
+class BundleLoader(_bootstrap._LoaderBasics):
+
+    u"""Loader for a module in a bundle.
+
+    The module's __file__ is the path it would have inside the bundle, as if
+    the bundle were a directory, so that the __path__ of packages leads back
+    to the bundle.
+
+    """
+
+    def __init__(self, bundle, fullname, key):
+        self.bundle = bundle
+        self._name = fullname
+        self._key = key
+
+    @_bootstrap._check_name
+    def get_filename(self, fullname):
+        u"""Return the path of the module inside the bundle."""
+        parts = [self.bundle.path] + self._key.split(u'.')
+        if self.bundle.index[self._key][2]:
+            parts.append(u'__init__.py')
+        else:
+            parts[-1] += u'.py'
+        return _bootstrap._path_join(*parts)
+
+    @_bootstrap._check_name
+    def is_package(self, fullname):
+        u"""Return whether the module is a package, as recorded in the
+        index."""
+        return self.bundle.index[self._key][2]
+
+    @_bootstrap._check_name
+    def get_code(self, fullname):
+        u"""Unmarshal the code object of the module."""
+        hooks = _bootstrap._import_hooks
+        if hooks:
+            start = time.time()
+        try:
+            found = _bootstrap._timed(u'unmarshal', marshal.loads,
+                                      self.bundle.code(self._key))
+        except (EOFError, ValueError, TypeError):
+            found = None
+        if not isinstance(found, _bootstrap.code_type):
+            raise ImportError(u"Non-code object for %s in %s"
+                              % (self._key, self.bundle.path))
+        if hooks:
+            _bootstrap._fire(u'bytecode_used', fullname, path=self.bundle.path,
+                             duration=time.time() - start)
+        return found
+
+    @_bootstrap._check_name
+    def get_source(self, fullname):
+        u"""Return the source the module was compiled from, or None if it
+        cannot be read."""
+        path = self.bundle.index[self._key][3]
+        try:
+            with _bootstrap._io.FileIO(path, u'r') as file:
+                source_bytes = file.read()
+        except IOError:
+            return None
+        return _bootstrap._decode_source(source_bytes)
+
+    def load_module(self, fullname):
+        u"""Load the module from its code object."""
+        return self._load_module(fullname, sourceless=True)
+
+
+class BundleFinder(object):
+
+    u"""Finder for the modules in a bundle, or in a package inside one.
+
+    Usable as a path hook: ImportError is raised if 'path' is neither a
+    bundle nor a package in one.
+
+    """
+
+    def __init__(self, path):
+        bundle_path, inner = _bootstrap._split_archive_path(path)
+        self.bundle = _open_bundle(bundle_path)
+        self.prefix = u''.join(part + u'.' for part in inner)
+        if self.prefix:
+            entry = self.bundle.index.get(self.prefix[:-1])
+            if entry is None or not entry[2]:
+                raise ImportError(u"no package %s in %s"
+                                  % (self.prefix[:-1], bundle_path))
+        self.path = path
+
+    def find_module(self, fullname):
+        u"""Return a loader for the module if it is in the bundle."""
+        key = self.prefix + fullname.rpartition(u'.')[2]
+        if key in self.bundle.index:
+            return BundleLoader(self.bundle, fullname, key)
+        return None
@@ -0,0 +1,213 @@
+u"""Trace how a module name would be resolved, without importing it."""
+from __future__ import with_statement
+from . import _bootstrap
+import errno
+import sys
+import time
+
+
+class _Tracer(object):
+
+    u"""Stand-in for the _os module and _case_ok of _bootstrap that records
+    the file system calls made by finders and loaders into 'calls'."""
+
+    def __init__(self, os_module, case_ok):
+        self._os = os_module
+        self._case_ok = case_ok
+        self.calls = []
+
+    def __getattr__(self, attr):
+        return getattr(self._os, attr)
+
+    def stat(self, path):
+        start = time.time()
+        try:
+            stat_info = self._os.stat(path)
+        except OSError, exc:
+            result = errno.errorcode.get(exc.errno, unicode(exc.errno))
+            self._record(u'stat', path, result, start)
+            raise
+        mode = stat_info.st_mode & 0170000
+        if mode == 0100000:
+            result = u'file'
+        elif mode == 0040000:
+            result = u'directory'
+        else:
+            result = u'other'
+        self._record(u'stat', path, result, start)
+        return stat_info
+
+    def case_ok(self, directory, check):
+        start = time.time()
+        result = self._case_ok(directory, check)
+        self._record(u'case_ok', _bootstrap._path_join(directory, check),
+                     result, start)
+        return result
+
+    def _record(self, call, path, result, start):
+        self.calls.append({u'call': call, u'path': path, u'result': result,
+                           u'duration': time.time() - start})
+
+
+def _bytecode_status(loader, name):
+    u"""Explain whether the loader would use bytecode for the module."""
+    if isinstance(loader, _bootstrap._SourcelessFileLoader):
+        bytecode_path = loader.get_filename(name)
+        source_mtime = None
+    elif isinstance(loader, _bootstrap.SourceLoader):
+        source_path = loader.get_filename(name)
+        bytecode_path = _bootstrap._cache_from_source(source_path)
+        if bytecode_path is None:
+            return {u'path': None, u'status': u'rejected',
+                    u'reason': u'no bytecode path for the source'}
+        try:
+            source_mtime = loader.path_mtime(source_path)
+        except NotImplementedError:
+            return {u'path': bytecode_path, u'status': u'rejected',
+                    u'reason': u'loader does not implement path_mtime'}
+    else:
+        return None
+    try:
+        data = loader.get_data(bytecode_path)
+    except IOError, exc:
+        return {u'path': bytecode_path, u'status': u'missing',
+                u'reason': unicode(exc)}
+    try:
+        loader._bytes_from_bytecode(name, data, source_mtime)
+    except (ImportError, EOFError), exc:
+        return {u'path': bytecode_path, u'status': u'rejected',
+                u'reason': unicode(exc)}
+    return {u'path': bytecode_path, u'status': u'accepted',
+            u'reason': u'magic number and timestamp match'
+                       if source_mtime is not None
+                       else u'magic number matches'}
+
+
+def _entry_finder(path_finder, entry):
+    u"""Return (finder, cached) for a path entry without caching a new
+    finder in sys.path_importer_cache."""
+    try:
+        finder = sys.path_importer_cache[entry]
+    except KeyError:
+        return path_finder._path_hooks(entry), False
+    if finder is None and path_finder is _bootstrap._DefaultPathFinder:
+        finder = _bootstrap._DEFAULT_PATH_HOOK(entry)
+    return finder, True
+
+
+def _explain_path_finder(path_finder, name, path, tracer):
+    u"""Explain a PathFinder entry by entry; return (loader, entries)."""
+    entries = []
+    for entry in (path or sys.path):
+        step = {u'entry': entry, u'finder': None, u'cached': False,
+                u'loader': None}
+        entries.append(step)
+        tracer.calls = step[u'calls'] = []
+        start = time.time()
+        try:
+            finder, step[u'cached'] = _entry_finder(path_finder, entry)
+        except ImportError:
+            finder = None
+        loader = None
+        if finder:
+            step[u'finder'] = repr(finder)
+            loader = finder.find_module(name)
+        step[u'duration'] = time.time() - start
+        if loader is not None:
+            step[u'loader'] = repr(loader)
+            return loader, entries
+    return None, entries
+
+
+def _explain(name, tracer):
+    trace = {u'name': name, u'in_sys_modules': name in sys.modules,
+             u'parent': None, u'finders': [], u'loader': None,
+             u'bytecode': None, u'error': None}
+    if trace[u'in_sys_modules']:
+        return trace, None
+    parent = name.rpartition(u'.')[0]
+    path = None
+    if parent:
+        if parent in sys.modules:
+            path = getattr(sys.modules[parent], u'__path__', None)
+        else:
+            trace[u'parent'], parent_loader = _explain(parent, tracer)
+            if isinstance(parent_loader, _bootstrap._LoaderBasics):
+                if parent_loader.is_package(parent):
+                    filename = parent_loader.get_filename(parent)
+                    path = [filename.rsplit(_bootstrap.path_sep, 1)[0]]
+            elif parent_loader is not None:
+                trace[u'error'] = (u"cannot find the __path__ of %s without "
+                                   u"importing it" % parent)
+                return trace, None
+        if path is None:
+            trace[u'error'] = u'%s is not a package' % parent
+            return trace, None
+    loader = None
+    for finder in sys.meta_path + _bootstrap._IMPLICIT_META_PATH:
+        step = {u'finder': repr(finder), u'loader': None}
+        trace[u'finders'].append(step)
+        start = time.time()
+        if (isinstance(finder, type) and
+                issubclass(finder, _bootstrap.PathFinder)):
+            loader, step[u'entries'] = _explain_path_finder(finder, name,
+                                                            path, tracer)
+        else:
+            tracer.calls = step[u'calls'] = []
+            loader = finder.find_module(name, path)
+        step[u'duration'] = time.time() - start
+        if loader is not None:
+            step[u'loader'] = trace[u'loader'] = repr(loader)
+            break
+    else:
+        trace[u'error'] = _bootstrap._ERR_MSG % name
+        return trace, None
+    tracer.calls = []
+    trace[u'bytecode'] = _bytecode_status(loader, name)
+    if tracer.calls:
+        trace[u'bytecode'][u'calls'] = tracer.calls
+    return trace, loader
+
+
+def explain(name, package=None):
+    u"""Return a trace of how importlib_full would import the named module.
+
+    No module code is executed and sys.path_importer_cache is left as it is.
+    The trace is a dict with the absolute 'name', whether it is already
+    'in_sys_modules' (in which case nothing else is done), the trace of its
+    'parent' package if that is not imported yet, and:
+
+        finders     each meta path finder consulted, in order, with the
+                    'loader' it returned and its 'duration'; path based
+                    finders list their sys.path 'entries' with the
+                    'finder' for each entry, whether it was 'cached' in
+                    sys.path_importer_cache and its 'loader'
+        calls       (in each finder or entry) every stat and case check
+                    made, with its 'path', 'result' and 'duration'
+        loader      the loader that would be used
+        bytecode    for loaders of source or bytecode files, the bytecode
+                    'path' and whether it would be 'accepted', is
+                    'missing' or 'rejected', with the 'reason'
+        error       why the module could not be found, or None
+
+    Durations are in seconds.
+
+    """
+    level = 0
+    if name.startswith(u'.'):
+        if not package:
+            raise TypeError(u"relative imports require the 'package' argument")
+        for character in name:
+            if character != u'.':
+                break
+            level += 1
+    name = _bootstrap._resolve_name(name[level:], package, level)
+    with _bootstrap._ImportLockContext():
+        tracer = _Tracer(_bootstrap._os, _bootstrap._case_ok)
+        _bootstrap._os = tracer
+        _bootstrap._case_ok = tracer.case_ok
+        try:
+            return _explain(name, tracer)[0]
+        finally:
+            _bootstrap._os = tracer._os
+            _bootstrap._case_ok = tracer._case_ok
@@ -0,0 +1,209 @@
+u"""Capture of the graph of which module imports which.
+
+Every module requested from importlib_full by the import running in the
+current thread, whether or not it is already in sys.modules, adds an edge
+from that import. A module loaded outside of any import adds an edge from
+the module whose code made the request instead, taken from the __name__ of
+the first calling frame outside importlib_full; the stack is only walked
+for it then, not for requests satisfied by sys.modules. A module's parent
+packages are imported before it rather than by it, so no edges are added
+from a module to them. Modules loaded while capturing also record how long
+their import took, both cumulatively and excluding the imports nested in
+it.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import os
+import sys
+import threading
+
+
+# Frames from these files are skipped when looking for the importer.
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _caller_name():
+    u"""Return the __name__ of the first caller outside importlib_full."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if os.path.dirname(filename) != _PACKAGE_DIR:
+            return frame.f_globals.get(u'__name__')
+        frame = frame.f_back
+    return None
+
+
+class _Node(object):
+
+    u"""Timing of a module loaded while capturing."""
+
+    __slots__ = (u'cumulative', u'nested', u'error')
+
+    def __init__(self):
+        self.cumulative = None
+        self.nested = 0
+        self.error = None
+
+
+class DependencyGraph(object):
+
+    u"""Importer to imported edges; install with start_dependency_graph().
+
+    'edges' maps each importer to the set of modules it requested and
+    'timings' maps each module loaded while capturing to its _Node.
+
+    """
+
+    def __init__(self):
+        self.edges = {}
+        self.timings = {}
+        self._local = threading.local()
+
+    def _active(self):
+        try:
+            return self._local.active
+        except AttributeError:
+            active = self._local.active = []
+            return active
+
+    def _add_edge(self, importer, name):
+        if (importer is not None and importer != name and
+                not importer.startswith(name + u'.')):
+            self.edges.setdefault(importer, set()).add(name)
+
+    def _request(self, name):
+        u"""Record that the running import asked for 'name'."""
+        active = self._active()
+        if active:
+            self._add_edge(active[-1], name)
+
+    def __call__(self, event, name, info):
+        if event == u'import_start':
+            active = self._active()
+            if not active:
+                self._add_edge(_caller_name(), name)
+            self.timings[name] = _Node()
+            active.append(name)
+        elif event == u'import_finished':
+            active = self._active()
+            if not active or active[-1] != name:
+                return
+            active.pop()
+            node = self.timings[name]
+            node.cumulative = info[u'duration']
+            if info[u'error'] is not None:
+                node.error = type(info[u'error']).__name__
+            if active:
+                self.timings[active[-1]].nested += node.cumulative
+
+    def modules(self):
+        u"""Return the sorted names of every module in the graph."""
+        names = set(self.edges)
+        names.update(self.timings)
+        for imported in self.edges.values():
+            names.update(imported)
+        return sorted(names)
+
+    def dependencies(self, name, transitive=False):
+        u"""Return the set of modules 'name' imported, with those they
+        imported in turn if 'transitive' is true."""
+        found = set()
+        pending = [name]
+        while pending:
+            for imported in self.edges.get(pending.pop(), ()):
+                if imported not in found:
+                    found.add(imported)
+                    if transitive:
+                        pending.append(imported)
+        found.discard(name)
+        return found
+
+    def importers(self, name):
+        u"""Return the set of modules which imported 'name'."""
+        return set(importer for importer, imported in self.edges.items()
+                   if name in imported)
+
+    def timing(self, name):
+        u"""Return (cumulative, self) seconds for the import of 'name', or
+        None if it was not loaded while capturing."""
+        node = self.timings.get(name)
+        if node is None or node.cumulative is None:
+            return None
+        return node.cumulative, node.cumulative - node.nested
+
+    def transitive_cost(self, name):
+        u"""Return the self seconds of 'name' and everything it imported
+        transitively, for the modules loaded while capturing."""
+        total = 0
+        for module in self.dependencies(name, True) | set([name]):
+            timing = self.timing(module)
+            if timing is not None:
+                total += timing[1]
+        return total
+
+    def to_dict(self):
+        u"""Return the graph as a JSON-compatible dict; times in seconds."""
+        nodes = []
+        for name in self.modules():
+            timing = self.timing(name)
+            node = self.timings.get(name)
+            nodes.append({u'name': name,
+                          u'cumulative': timing and timing[0],
+                          u'self': timing and timing[1],
+                          u'error': node and node.error})
+        edges = [[importer, imported]
+                 for importer, imports in sorted(self.edges.items())
+                 for imported in sorted(imports)]
+        return {u'version': 1, u'unit': u'seconds', u'nodes': nodes,
+                u'edges': edges}
+
+    def to_dot(self):
+        u"""Return the graph in Graphviz's DOT language, labelling modules
+        loaded while capturing with their cumulative and self times."""
+        def quote(text):
+            return u'"%s"' % text.replace(u'\\', u'\\\\').replace(u'"', u'\\"')
+        lines = [u'digraph imports {']
+        for name in self.modules():
+            timing = self.timing(name)
+            if timing is None:
+                label = name
+            else:
+                label = u'%s\\n%.3fms (self %.3fms)' % (
+                    name, timing[0] * 1000, timing[1] * 1000)
+            lines.append(u'    %s [label=%s];' % (quote(name), quote(label)))
+        for importer, imports in sorted(self.edges.items()):
+            for imported in sorted(imports):
+                lines.append(u'    %s -> %s;' % (quote(importer),
+                                               quote(imported)))
+        lines.append(u'}')
+        return u'\n'.join(lines) + u'\n'
+
+    def write(self, path, format=u'json'):
+        u"""Write the graph to 'path' as 'json' or 'dot'."""
+        import json
+        if format == u'json':
+            with open(path, u'w') as file:
+                json.dump(self.to_dict(), file)
+        elif format == u'dot':
+            with open(path, u'w') as file:
+                file.write(self.to_dot())
+        else:
+            raise ValueError(u"unknown graph format %r" % format)
+
+
+def start_dependency_graph(graph=None):
+    u"""Start capturing the dependency graph of imports made through
+    importlib_full and return the DependencyGraph collecting it."""
+    if graph is None:
+        graph = DependencyGraph()
+    _bootstrap._add_import_hook(graph)
+    _bootstrap._dependency_graph = graph._request
+    return graph
+
+
+def stop_dependency_graph(graph):
+    u"""Stop capturing into 'graph'; what it has captured stays available."""
+    _bootstrap._remove_import_hook(graph)
+    if _bootstrap._dependency_graph == graph._request:
+        _bootstrap._dependency_graph = None
@@ -0,0 +1,142 @@
+u"""Detection of imports made after a process has finished starting up.
+
+Once startup is marked complete, every import that is not already satisfied
+by sys.modules takes the import lock and touches the file system in the
+middle of serving; such imports are recorded so they can be moved into the
+startup (preload) phase.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+from . import LateImportError, LateImportWarning
+import os
+import threading
+import traceback
+import warnings
+
+
+_ACTIONS = (None, u'warn', u'raise')
+
+# Frames from these files are left out of recorded stacks.
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _caller_stack():
+    u"""Return the current stack without the frames of importlib_full."""
+    return [frame for frame in traceback.extract_stack()
+            if os.path.dirname(os.path.abspath(frame[0])) != _PACKAGE_DIR]
+
+
+class _LateImportDetector(object):
+
+    u"""Import hook recording every import it sees."""
+
+    def __init__(self, action):
+        self.action = action
+        self.records = []
+        self._local = threading.local()
+
+    def _active(self):
+        try:
+            return self._local.active
+        except AttributeError:
+            active = self._local.active = []
+            return active
+
+    def __call__(self, event, name, info):
+        if event == u'import_start':
+            active = self._active()
+            record = {u'name': name,
+                      u'thread': threading.current_thread().name,
+                      u'start': info[u'time'], u'duration': None,
+                      u'error': None,
+                      u'parent': active[-1][u'name'] if active else None,
+                      u'stack': _caller_stack()}
+            if self.action == u'raise':
+                record[u'error'] = u'LateImportError'
+                self.records.append(record)
+                raise LateImportError(u"import of %s after startup" % name)
+            active.append(record)
+            self.records.append(record)
+            if (self.action == u'warn' and record[u'parent'] is None and
+                    record[u'stack']):
+                filename, lineno = record[u'stack'][-1][:2]
+                warnings.warn_explicit(u"import of %s after startup" % name,
+                                       LateImportWarning, filename, lineno)
+        elif event == u'import_finished':
+            active = self._active()
+            if active and active[-1][u'name'] == name:
+                record = active.pop()
+                record[u'duration'] = info[u'duration']
+                if info[u'error'] is not None:
+                    record[u'error'] = type(info[u'error']).__name__
+
+
+_detector = None
+
+
+def mark_startup_complete(action=None):
+    u"""Record every import made through importlib_full from now on that is
+    not already in sys.modules.
+
+    'action' may also be 'warn' to issue a LateImportWarning for each such
+    import (nested imports excluded), or 'raise' to make each one fail with
+    LateImportError. Calling this again changes the action and keeps what
+    has been recorded so far.
+
+    """
+    global _detector
+    if action not in _ACTIONS:
+        raise ValueError(u"action must be one of %r" % (_ACTIONS,))
+    if _detector is None:
+        _detector = _LateImportDetector(action)
+        _bootstrap._add_import_hook(_detector)
+    else:
+        _detector.action = action
+
+
+def late_imports():
+    u"""Return the recorded late imports in the order they started.
+
+    Each is a dict with the module 'name', the importing 'thread', the
+    'start' time, the 'duration' in seconds, the 'error' it failed with (an
+    exception name or None), the late import it was nested in ('parent' or
+    None) and the 'stack' that triggered it as (file, line, function, text)
+    tuples, innermost last.
+
+    """
+    if _detector is None:
+        return []
+    return list(_detector.records)
+
+
+def late_import_report():
+    u"""Return a text report of the late imports not nested in another one,
+    slowest first, with the line that triggered each."""
+    records = [record for record in late_imports()
+               if record[u'parent'] is None]
+    records.sort(key=lambda record: record[u'duration'] or 0, reverse=True)
+    lines = []
+    for record in records:
+        duration = record[u'duration']
+        line = u'%s: %s in thread %s' % (
+            record[u'name'],
+            u'%.3fms' % (duration * 1000) if duration is not None
+                else u'unfinished',
+            record[u'thread'])
+        if record[u'error']:
+            line += u' (%s)' % record[u'error']
+        lines.append(line)
+        if record[u'stack']:
+            filename, lineno, function, text = record[u'stack'][-1]
+            lines.append(u'    %s:%d in %s: %s' % (filename, lineno,
+                                                  function, text))
+    return u'\n'.join(lines)
+
+
+def _reset():
+    u"""Stop detecting late imports and forget those recorded."""
+    global _detector
+    if _detector is not None:
+        _bootstrap._remove_import_hook(_detector)
+        _detector = None
@@ -0,0 +1,116 @@
+u"""Lazy loading: modules whose body is executed on first attribute access."""
+from __future__ import with_statement
+from . import _bootstrap
+import sys
+import types
+
+
+# Attributes set on a placeholder up front which can be read without
+# executing the module; everything else triggers the real load.
+_PLACEHOLDER_ATTRS = frozenset([u'__name__', u'__file__', u'__path__',
+                                u'__package__', u'__loader__', u'__class__'])
+
+
+class _LazyModule(types.ModuleType):
+
+    u"""Module placeholder which executes the real module the first time one
+    of its attributes is read."""
+
+    def __getattribute__(self, attr):
+        if attr in _PLACEHOLDER_ATTRS:
+            return types.ModuleType.__getattribute__(self, attr)
+        _load(self)
+        return getattr(self, attr)
+
+
+class _LoadedModule(types.ModuleType):
+
+    u"""Class a _LazyModule is switched to once its body has executed."""
+
+
+def _load(module):
+    u"""Execute the module a placeholder stands in for, in place."""
+    with _bootstrap._ImportLockContext():
+        # Another thread may have loaded it while the lock was being waited on.
+        if type(module) is not _LazyModule:
+            return
+        name = module.__name__
+        loader = module.__loader__
+        module.__class__ = _LoadedModule
+        # Loaders reuse what is in sys.modules, so the body is executed
+        # directly into the placeholder.
+        sys.modules[name] = module
+        try:
+            loader.load_module(name)
+        except:
+            module.__class__ = _LazyModule
+            raise
+
+
+class LazyLoader(object):
+
+    u"""Loader wrapper which puts a placeholder into sys.modules and defers
+    executing the module until one of its attributes is accessed.
+
+    The wrapped loader must implement get_filename() and is_package(), as the
+    file system loaders of importlib_full do, and reuse the module it finds in
+    sys.modules when load_module() is called.
+
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def load_module(self, fullname):
+        u"""Create the placeholder module for 'fullname'.
+
+        Reloads are passed through to the wrapped loader.
+
+        """
+        if fullname in sys.modules:
+            return self.loader.load_module(fullname)
+        filename = self.loader.get_filename(fullname)
+        module = _LazyModule(str(fullname))
+        module.__file__ = filename
+        module.__loader__ = self.loader
+        if self.loader.is_package(fullname):
+            module.__path__ = [filename.rsplit(_bootstrap.path_sep, 1)[0]]
+            module.__package__ = fullname
+        else:
+            module.__package__ = fullname.rpartition(u'.')[0]
+        sys.modules[fullname] = module
+        return module
+
+
+def _matches(name, names):
+    u"""Return True if 'name' is in 'names' or inside a package in 'names'."""
+    for entry in names:
+        if name == entry or name.startswith(entry + u'.'):
+            return True
+    return False
+
+
+def enable_lazy_loading(allow=None, deny=()):
+    u"""Make importlib_full.__import__ load modules lazily.
+
+    Only modules found by the file system loaders for source and bytecode are
+    made lazy. If 'allow' is given only the named modules (and the modules
+    inside the named packages) are; modules named in 'deny' never are.
+
+    """
+    allow = None if allow is None else tuple(allow)
+    deny = tuple(deny)
+    def wrap(name, loader):
+        if not isinstance(loader, _bootstrap._LoaderBasics):
+            return loader
+        elif allow is not None and not _matches(name, allow):
+            return loader
+        elif _matches(name, deny):
+            return loader
+        return LazyLoader(loader)
+    _bootstrap._lazy_loader = wrap
+
+
+def disable_lazy_loading():
+    u"""Undo enable_lazy_loading(); placeholders already created stay lazy."""
+    _bootstrap._lazy_loader = None
@@ -0,0 +1,169 @@
+u"""Record the modules a process imports and replay them on later startups.
+
+A manifest lists, in import order, each module loaded from the file system
+along with its loader type and the path, modification time and size of its
+file. Replaying a manifest skips the meta path for every module whose file
+still matches and reads the bytecode files ahead of the imports that need
+them; any module that does not match is imported normally.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import atexit
+import imp
+import os
+import threading
+
+
+_MANIFEST_VERSION = 1
+
+# Loaders a manifest can name, all constructed as loader(fullname, path).
+_LOADER_TYPES = dict((loader.__name__, loader) for loader in (
+    _bootstrap._SourceFileLoader,
+    _bootstrap._SourcelessFileLoader,
+    _bootstrap._ExtensionFileLoader,
+))
+
+
+def _stat_entry(path):
+    u"""Return the (mtime, size) pair recorded for a file."""
+    stat_info = os.stat(path)
+    return int(stat_info.st_mtime), stat_info.st_size
+
+
+class _Recorder(object):
+
+    u"""Collects manifest entries as modules are imported."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+
+    def __call__(self, name, loader):
+        loader_type = type(loader).__name__
+        if _LOADER_TYPES.get(loader_type) is not type(loader):
+            return
+        path = loader._path
+        try:
+            mtime, size = _stat_entry(path)
+        except OSError:
+            return
+        self.entries.append({u'name': name, u'loader': loader_type,
+                             u'path': path, u'mtime': mtime, u'size': size})
+
+    def save(self):
+        u"""Write the manifest out."""
+        import json
+        manifest = {u'version': _MANIFEST_VERSION,
+                    u'magic': imp.get_magic().encode(u'hex'),
+                    u'modules': self.entries}
+        with open(self.path, u'w') as file:
+            json.dump(manifest, file, indent=1)
+
+
+def record_manifest(path):
+    u"""Record the modules imported from now on into a manifest at 'path'.
+
+    The manifest is written by save_manifest() or when the interpreter exits.
+
+    """
+    recorder = _Recorder(path)
+    _bootstrap._record_loader = recorder
+    atexit.register(_save_at_exit, recorder)
+
+
+def _save_at_exit(recorder):
+    if _bootstrap._record_loader is recorder:
+        save_manifest()
+
+
+def save_manifest():
+    u"""Stop recording and write the manifest out."""
+    recorder = _bootstrap._record_loader
+    if recorder is None:
+        raise RuntimeError(u"no manifest is being recorded")
+    _bootstrap._record_loader = None
+    recorder.save()
+
+
+class _Replayer(object):
+
+    u"""Hands out loaders for manifest entries whose file is unchanged."""
+
+    def __init__(self, entries):
+        self.entries = dict((entry[u'name'], entry) for entry in entries)
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is None:
+            return None
+        try:
+            matches = (_stat_entry(entry[u'path']) ==
+                       (entry[u'mtime'], entry[u'size']))
+        except OSError:
+            matches = False
+        if not matches:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _LOADER_TYPES[entry[u'loader']](name, entry[u'path'])
+
+
+def _bytecode_path(entry):
+    u"""Return the bytecode file the entry's loader will read, or None."""
+    if entry[u'loader'] == u'_SourcelessFileLoader':
+        return entry[u'path']
+    elif entry[u'loader'] == u'_SourceFileLoader':
+        return _bootstrap._cache_from_source(entry[u'path'])
+    return None
+
+
+def _prefetch(paths):
+    u"""Read files so they are in the OS page cache when they are imported."""
+    for path in paths:
+        try:
+            with open(path, u'rb') as file:
+                while file.read(1 << 16):
+                    pass
+        except IOError:
+            pass
+
+
+def replay_manifest(path, prefetch=True):
+    u"""Use the manifest at 'path' to load modules without searching for them.
+
+    Entries naming an unknown loader are ignored. If 'prefetch' is true the
+    bytecode files are read in a background thread, in import order. Returns
+    the number of entries that may be replayed.
+
+    A manifest written by another version of Python is ignored as a whole.
+
+    """
+    import json
+    with open(path, u'r') as file:
+        manifest = json.load(file)
+    if (manifest.get(u'version') != _MANIFEST_VERSION or
+            manifest.get(u'magic') != imp.get_magic().encode(u'hex')):
+        return 0
+    entries = [entry for entry in manifest[u'modules']
+               if entry[u'loader'] in _LOADER_TYPES]
+    _bootstrap._replay_loader = _Replayer(entries)
+    if prefetch:
+        paths = [_bytecode_path(entry) for entry in entries]
+        thread = threading.Thread(target=_prefetch,
+                                  args=([path for path in paths if path],),
+                                  name=u'replay_manifest prefetch')
+        thread.daemon = True
+        thread.start()
+    return len(entries)
+
+
+def stop_replay():
+    u"""Stop replaying a manifest; return the (hits, misses) counts."""
+    replayer = _bootstrap._replay_loader
+    _bootstrap._replay_loader = None
+    if replayer is None:
+        return 0, 0
+    return replayer.hits, replayer.misses
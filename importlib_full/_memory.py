@@ -0,0 +1,161 @@
+u"""Per-module memory accounting of imports.
+
+MemoryProfiler is a Profiler whose clock is the number of bytes currently
+allocated, so the import tree it collects reports how much memory each import
+left allocated, cumulatively and excluding nested imports, with the 'exec'
+phase covering the module body (or the loading of an extension module). The
+size of each module's code objects is recorded as well.
+
+By default allocations are measured with tracemalloc, which is started if it
+is not already tracing. Where tracemalloc is missing, as before Python 3.4,
+the resident set size read from /proc/self/statm is used instead; it grows
+by whole pages and includes memory freed but not returned to the system, so
+small imports may show as zero.
+
+"""
+from __future__ import with_statement
+from ._profile import Profiler, start_profiling
+import os
+import sys
+
+
+def _code_size(code_object):
+    u"""Return the bytes used by a code object and those nested in it."""
+    size = sum(sys.getsizeof(part) for part in (
+        code_object, code_object.co_code, code_object.co_lnotab,
+        code_object.co_names, code_object.co_varnames,
+        code_object.co_consts))
+    for const in code_object.co_consts:
+        if isinstance(const, type(code_object)):
+            size += _code_size(const)
+        else:
+            size += sys.getsizeof(const)
+    return size
+
+
+class _ResidentMemory(object):
+
+    u"""Callable returning the resident set size in bytes, read from
+    /proc/self/statm through a descriptor kept open between calls."""
+
+    def __init__(self):
+        import resource
+        self.page_size = resource.getpagesize()
+        self.pid = None
+        self.fd = None
+
+    def __call__(self):
+        pid = os.getpid()
+        if pid != self.pid:
+            # /proc/self is resolved when opened, so a forked child reopens.
+            if self.fd is not None:
+                os.close(self.fd)
+            self.fd = os.open(u'/proc/self/statm', os.O_RDONLY)
+            self.pid = pid
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        return int(os.read(self.fd, 256).split()[1]) * self.page_size
+
+
+def _resident_memory():
+    u"""Return a callable returning the resident set size in bytes."""
+    measure = _ResidentMemory()
+    try:
+        measure()
+    except OSError:
+        raise ImportError(u"neither tracemalloc nor /proc/self/statm is "
+                          u"available; pass a measure")
+    return measure
+
+
+def _traced_memory():
+    u"""Return a callable returning the bytes currently allocated according
+    to tracemalloc, or the resident set size without it."""
+    try:
+        import tracemalloc
+    except ImportError:
+        return _resident_memory()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return lambda: tracemalloc.get_traced_memory()[0]
+
+
+class MemoryProfiler(Profiler):
+
+    u"""Profiler measuring bytes allocated instead of time.
+
+    'measure' is a callable returning the bytes currently allocated; it
+    defaults to tracemalloc's traced memory, or the resident set size where
+    tracemalloc is missing.
+
+    """
+
+    def __init__(self, measure=None):
+        if measure is None:
+            measure = _traced_memory()
+        super(MemoryProfiler, self).__init__(clock=measure)
+        self.code_sizes = {}
+
+    def timed(self, phase, fxn, args, kwargs):
+        if phase == u'exec' and args and hasattr(args[0], u'co_code'):
+            stack = self._stack()
+            if stack:
+                self.code_sizes[stack[-1].name] = _code_size(args[0])
+        return super(MemoryProfiler, self).timed(phase, fxn, args, kwargs)
+
+    def _node_dict(self, node):
+        execution = node.phases.get(u'exec', 0)
+        return {
+            u'name': node.name,
+            u'self': node.self_time,
+            u'cumulative': node.cumulative,
+            u'exec': {u'cumulative': execution,
+                      u'self': execution - node.nested.get(u'exec', 0)},
+            u'code': self.code_sizes.get(node.name),
+            u'failed': node.failed,
+            u'children': [self._node_dict(child) for child in node.children],
+        }
+
+    def to_dict(self):
+        u"""Return the import tree as a JSON-compatible dict; sizes are in
+        bytes."""
+        return {u'version': 1, u'unit': u'bytes',
+                u'imports': [self._node_dict(root)
+                             for root in self._finished_roots()]}
+
+    def modules(self):
+        u"""Return a dict per imported module, largest self size first."""
+        modules = []
+        def walk(node):
+            modules.append(node)
+            for child in node.children:
+                walk(child)
+        for root in self._finished_roots():
+            walk(root)
+        modules = [self._node_dict(node) for node in modules]
+        for module in modules:
+            del module[u'children']
+        modules.sort(key=lambda module: module[u'self'], reverse=True)
+        return modules
+
+    def report(self, limit=None):
+        u"""Return a text table of the modules, largest self size first."""
+        lines = [u'%12s %12s %12s  %s' % (u'self', u'cumulative', u'code',
+                                          u'module')]
+        for module in self.modules()[:limit]:
+            code = module[u'code']
+            lines.append(u'%12d %12d %12s  %s' % (
+                module[u'self'], module[u'cumulative'],
+                u'-' if code is None else code, module[u'name']))
+        return u'\n'.join(lines)
+
+    def write(self, path, format=u'json'):
+        u"""Write the import tree to 'path'; only 'json' is supported."""
+        if format != u'json':
+            raise ValueError(u"unknown memory profile format %r" % format)
+        super(MemoryProfiler, self).write(path, format)
+
+
+def start_memory_profiling(measure=None):
+    u"""Start accounting the memory allocated by each import made through
+    importlib_full; return the MemoryProfiler. Stop with stop_profiling()."""
+    return start_profiling(MemoryProfiler(measure))
@@ -0,0 +1,162 @@
+u"""Packed bytecode caches: one cache file per package directory.
+
+Once enabled, modules loaded from source files by importlib_full keep their
+bytecode in a single file per directory, PACK_NAME in its __pycache__,
+instead of one file each. The first import from a directory reads its pack
+once; the bytecode of every later module from that directory is then taken
+from memory. An entry is only used while the size and modification time of
+its source match those recorded with it.
+
+A pack is imp.get_magic() followed by the marshalled dict mapping the file
+name of each source to (mtime, size, marshalled code object). Entries added
+or replaced are written out by flush(), at exit or when packing is
+disabled: the pack on disk is read again, updated and atomically replaced.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import atexit
+import imp
+import marshal
+
+
+PACK_NAME = u'__packed__.pack'
+
+
+class _Pack(object):
+
+    u"""The entries of the pack of one directory and those changed since it
+    was read."""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+        self.changed = set()
+
+
+def _read_pack(path):
+    u"""Return the entries of the pack at 'path'; empty if there is none or
+    it is unusable."""
+    try:
+        _bootstrap._stats[u'open'] += 1
+        with _bootstrap._io.FileIO(path, u'r') as file:
+            data = file.read()
+    except IOError:
+        return {}
+    _bootstrap._stats[u'bytes_read'] += len(data)
+    if data[:4] != imp.get_magic():
+        return {}
+    try:
+        entries = marshal.loads(data[4:])
+    except (EOFError, ValueError, TypeError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+class PackedBytecode(object):
+
+    u"""The packs of the directories modules were loaded from; install with
+    importlib_full.util.enable_packed_bytecode()."""
+
+    def __init__(self):
+        self.packs = {}
+
+    def pack_path(self, source_path):
+        u"""Return the path of the pack for the source at 'source_path'."""
+        directory = source_path.rpartition(_bootstrap.path_sep)[0]
+        return _bootstrap._path_join(directory, u'__pycache__', PACK_NAME)
+
+    def _pack(self, source_path):
+        u"""Return the _Pack for the directory of 'source_path' and the name
+        of the source in it, reading the pack the first time."""
+        directory, _, filename = source_path.rpartition(_bootstrap.path_sep)
+        pack = self.packs.get(directory)
+        if pack is None:
+            path = self.pack_path(source_path)
+            pack = self.packs[directory] = _Pack(path, _read_pack(path))
+        return pack, filename
+
+    def get(self, source_path, mtime, size):
+        u"""Return the code object for the source at 'source_path' with the
+        given modification time and size, or None if none is packed."""
+        pack, filename = self._pack(source_path)
+        entry = pack.entries.get(filename)
+        if entry is None or entry[:2] != (mtime, size):
+            return None
+        found = _bootstrap._timed(u'unmarshal', marshal.loads, entry[2])
+        return found if isinstance(found, _bootstrap.code_type) else None
+
+    def put(self, source_path, mtime, size, code_object):
+        u"""Pack the code object compiled from the source at 'source_path'
+        with the given modification time and size; see flush()."""
+        pack, filename = self._pack(source_path)
+        pack.entries[filename] = (mtime, size, marshal.dumps(code_object))
+        pack.changed.add(filename)
+
+    def flush(self):
+        u"""Write the packs with entries added or replaced since they were
+        read, merged into what is on disk now; failures are ignored."""
+        for directory, pack in self.packs.items():
+            if not pack.changed:
+                continue
+            entries = _read_pack(pack.path)
+            for filename in pack.changed:
+                entries[filename] = pack.entries[filename]
+            pack.changed.clear()
+            data = bytearray(imp.get_magic())
+            data.extend(marshal.dumps(entries))
+            self._write(pack.path, data)
+
+    def _write(self, path, data):
+        u"""Atomically replace the file at 'path' with 'data'."""
+        parent = path.rpartition(_bootstrap.path_sep)[0]
+        temporary = u'%s.%d.tmp' % (path, _bootstrap._os.getpid())
+        try:
+            if not _bootstrap._path_isdir(parent):
+                _bootstrap._os.mkdir(parent)
+            _bootstrap._stats[u'open'] += 1
+            with _bootstrap._io.FileIO(temporary, u'wb') as file:
+                file.write(data)
+            if (_bootstrap._os.__name__ == u'nt' and
+                    _bootstrap._path_exists(path)):
+                _bootstrap._os.unlink(path)
+            _bootstrap._os.rename(temporary, path)
+        except EnvironmentError:
+            _bootstrap._stats[u'bytecode_write_failures'] += 1
+            try:
+                _bootstrap._os.unlink(temporary)
+            except OSError:
+                pass
+            return
+        _bootstrap._stats[u'bytecode_writes'] += 1
+
+
+def _flush_at_exit(packed):
+    if packed is _bootstrap._packed_bytecode:
+        packed.flush()
+
+
+def enable_packed_bytecode():
+    u"""Keep the bytecode of modules loaded from source files in one packed
+    cache file per directory and return the PackedBytecode in use.
+
+    The packs are written at exit, or by disable_packed_bytecode() or
+    PackedBytecode.flush(). Nothing is packed while sys.dont_write_bytecode
+    is true, but existing packs are used.
+
+    """
+    packed = _bootstrap._packed_bytecode
+    if packed is None:
+        packed = _bootstrap._packed_bytecode = PackedBytecode()
+        atexit.register(_flush_at_exit, packed)
+    return packed
+
+
+def disable_packed_bytecode():
+    u"""Write the packs and stop using them; return the PackedBytecode that
+    was in use, or None."""
+    packed = _bootstrap._packed_bytecode
+    if packed is not None:
+        _bootstrap._packed_bytecode = None
+        packed.flush()
+    return packed
@@ -0,0 +1,276 @@
+u"""Hierarchical import-time profiler.
+
+While profiling, every import made through importlib_full becomes a node in a
+tree whose parent is the import that was running when it started. Each node
+records the time spent in the phases of an import:
+
+    find        searching the meta path (or replaying a manifest)
+    read        reading source or bytecode through get_data()
+    validate    checking the magic number and timestamp of bytecode
+    unmarshal   turning bytecode into a code object
+    compile     compiling source
+    write       writing bytecode through set_data()
+    exec        executing the module body (or loading an extension module)
+
+Times are reported both cumulatively and as self time, which excludes nested
+imports. Setting the IMPORTLIB_FULL_PROFILE environment variable to a path
+profiles the whole process and writes the profile there at exit, in the
+format named by IMPORTLIB_FULL_PROFILE_FORMAT ('json', 'chrome' or
+'speedscope'; 'json' by default).
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import os
+import sys
+import thread
+import time
+
+
+PHASES = (u'find', u'read', u'validate', u'unmarshal', u'compile', u'write',
+          u'exec')
+
+
+class _ImportNode(object):
+
+    u"""Timing for one import; times are in seconds from the clock."""
+
+    def __init__(self, name, thread, start):
+        self.name = name
+        self.thread = thread
+        self.start = start
+        self.end = None
+        self.failed = False
+        self.children = []
+        # Total time per phase, the part of it spent in nested imports or
+        # phases, and every (phase, start, end) span in order.
+        self.phases = {}
+        self.nested = {}
+        self.spans = []
+        self.open_phases = []
+
+    @property
+    def cumulative(self):
+        return self.end - self.start
+
+    @property
+    def self_time(self):
+        return self.cumulative - sum(child.cumulative
+                                     for child in self.children)
+
+    def _add_nested(self, duration):
+        u"""Attribute time spent in something nested to the open phase."""
+        if self.open_phases:
+            phase = self.open_phases[-1]
+            self.nested[phase] = self.nested.get(phase, 0) + duration
+
+    def to_dict(self, origin):
+        phases = {}
+        for phase, total in self.phases.items():
+            phases[phase] = {u'cumulative': total,
+                             u'self': total - self.nested.get(phase, 0)}
+        return {
+            u'name': self.name,
+            u'thread': self.thread,
+            u'start': self.start - origin,
+            u'cumulative': self.cumulative,
+            u'self': self.self_time,
+            u'failed': self.failed,
+            u'phases': phases,
+            u'children': [child.to_dict(origin) for child in self.children],
+        }
+
+
+def _thread_name():
+    u"""Return the name of the current thread.
+
+    threading is not imported for it, so that profiling does not load
+    modules on behalf of the imports measured: until it is imported, no
+    thread can have been started by it and this is the main thread.
+
+    """
+    # threading may also be in the middle of being imported.
+    current_thread = getattr(sys.modules.get(u'threading'),
+                             u'current_thread', None)
+    if current_thread is None:
+        return u'MainThread'
+    return current_thread().name
+
+
+class Profiler(object):
+
+    u"""Collects the import tree; install with importlib_full.start_profiling.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.origin = clock()
+        self.roots = []
+        self._local = thread._local()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def timed_import(self, name, fxn, args):
+        u"""Call fxn(*args) as the import of 'name'."""
+        stack = self._stack()
+        node = _ImportNode(name, _thread_name(), self.clock())
+        if stack:
+            stack[-1].children.append(node)
+        else:
+            self.roots.append(node)
+        stack.append(node)
+        try:
+            return fxn(*args)
+        except:
+            node.failed = True
+            raise
+        finally:
+            node.end = self.clock()
+            stack.pop()
+            if stack:
+                stack[-1]._add_nested(node.cumulative)
+
+    def timed(self, phase, fxn, args, kwargs):
+        u"""Call fxn(*args, **kwargs) as 'phase' of the current import.
+
+        Calls made outside of an import (e.g. get_code() called directly) are
+        not recorded.
+
+        """
+        stack = self._stack()
+        if not stack:
+            return fxn(*args, **kwargs)
+        node = stack[-1]
+        node.open_phases.append(phase)
+        start = self.clock()
+        try:
+            return fxn(*args, **kwargs)
+        finally:
+            end = self.clock()
+            node.open_phases.pop()
+            node.phases[phase] = node.phases.get(phase, 0) + end - start
+            node.spans.append((phase, start, end))
+            node._add_nested(end - start)
+
+    def _finished_roots(self):
+        return [root for root in self.roots if root.end is not None]
+
+    def to_dict(self):
+        u"""Return the profile as a JSON-compatible tree; times in seconds."""
+        return {u'version': 1, u'unit': u'seconds',
+                u'imports': [root.to_dict(self.origin)
+                             for root in self._finished_roots()]}
+
+    def _trace_events(self):
+        u"""Yield (name, category, thread, start, end) for every import and
+        phase, each parent before the spans nested in it."""
+        def walk(node):
+            yield node.name, u'import', node.thread, node.start, node.end
+            spans = [(start, end, phase, None)
+                     for phase, start, end in node.spans]
+            spans.extend((child.start, child.end, None, child)
+                         for child in node.children)
+            for start, end, phase, child in sorted(spans):
+                if child is None:
+                    yield phase, u'phase', node.thread, start, end
+                else:
+                    for event in walk(child):
+                        yield event
+        for root in self._finished_roots():
+            for event in walk(root):
+                yield event
+
+    def to_chrome_trace(self):
+        u"""Return the profile in the Chrome trace event format."""
+        pid = os.getpid()
+        events = []
+        for name, category, thread, start, end in self._trace_events():
+            events.append({u'name': name, u'cat': category, u'ph': u'X',
+                           u'pid': pid, u'tid': thread,
+                           u'ts': (start - self.origin) * 1e6,
+                           u'dur': (end - start) * 1e6})
+        return {u'traceEvents': events, u'displayTimeUnit': u'ms'}
+
+    def to_speedscope(self):
+        u"""Return the profile in speedscope's evented format, one profile per
+        thread."""
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for name, category, thread, start, end in self._trace_events():
+            if category == u'phase':
+                name = u'[%s]' % name
+            if name not in frame_index:
+                frame_index[name] = len(frames)
+                frames.append({u'name': name})
+            profiles.setdefault(thread, []).append(
+                (start, end, frame_index[name]))
+        result = []
+        for thread, spans in sorted(profiles.items()):
+            events = []
+            open_spans = []
+            for start, end, frame in spans:
+                while open_spans and open_spans[-1][0] <= start:
+                    closed_end, closed_frame = open_spans.pop()
+                    events.append({u'type': u'C', u'frame': closed_frame,
+                                   u'at': (closed_end - self.origin) * 1e3})
+                events.append({u'type': u'O', u'frame': frame,
+                               u'at': (start - self.origin) * 1e3})
+                open_spans.append((end, frame))
+            while open_spans:
+                closed_end, closed_frame = open_spans.pop()
+                events.append({u'type': u'C', u'frame': closed_frame,
+                               u'at': (closed_end - self.origin) * 1e3})
+            result.append({u'type': u'evented', u'name': thread,
+                           u'unit': u'milliseconds',
+                           u'startValue': events[0][u'at'],
+                           u'endValue': events[-1][u'at'],
+                           u'events': events})
+        return {u'$schema':
+                    u'https://www.speedscope.app/file-format-schema.json',
+                u'shared': {u'frames': frames},
+                u'profiles': result}
+
+    def write(self, path, format=u'json'):
+        u"""Write the profile to 'path' as 'json', 'chrome' or 'speedscope'."""
+        import json
+        exporters = {u'json': self.to_dict, u'chrome': self.to_chrome_trace,
+                     u'speedscope': self.to_speedscope}
+        try:
+            exporter = exporters[format]
+        except KeyError:
+            raise ValueError(u"unknown profile format %r" % format)
+        with open(path, u'w') as file:
+            json.dump(exporter(), file)
+
+
+def start_profiling(profiler=None):
+    u"""Start profiling imports made through importlib_full and return the
+    Profiler collecting them."""
+    if profiler is None:
+        profiler = Profiler()
+    _bootstrap._profiler = profiler
+    return profiler
+
+
+def stop_profiling():
+    u"""Stop profiling and return the Profiler that was in use, or None."""
+    profiler = _bootstrap._profiler
+    _bootstrap._profiler = None
+    return profiler
+
+
+def _profile_from_environment():
+    u"""Profile the process if IMPORTLIB_FULL_PROFILE is set."""
+    path = os.environ.get(u'IMPORTLIB_FULL_PROFILE')
+    if not path:
+        return
+    format = os.environ.get(u'IMPORTLIB_FULL_PROFILE_FORMAT', u'json')
+    import atexit
+    profiler = start_profiling()
+    atexit.register(profiler.write, path, format)
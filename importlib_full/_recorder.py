@@ -0,0 +1,146 @@
+u"""Flight recorder: a ring buffer of the most recent imports.
+
+The recorder is an import hook (see importlib_full.add_import_hook) writing
+into a fixed number of preallocated record slots, so recording an import only
+overwrites fields of the oldest slot and never grows. The buffer can be
+dumped at any time as JSON lines, including from a signal handler.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+# Imported up front so dumping from a signal handler never needs the import
+# lock.
+import json
+import signal
+import sys
+import threading
+
+
+class _Record(object):
+
+    u"""One slot of the ring buffer."""
+
+    __slots__ = (u'seq', u'name', u'thread', u'start', u'end', u'find',
+                 u'code', u'execution', u'outcome')
+
+    def __init__(self):
+        self.seq = -1
+
+    def reset(self, seq, name, thread_name, start):
+        self.seq = seq
+        self.name = name
+        self.thread = thread_name
+        self.start = start
+        self.end = None
+        self.find = 0.0
+        self.code = 0.0
+        self.execution = 0.0
+        self.outcome = u'running'
+
+    def to_dict(self):
+        return {u'seq': self.seq, u'name': self.name, u'thread': self.thread,
+                u'start': self.start, u'end': self.end,
+                u'find': self.find, u'code': self.code,
+                u'exec': self.execution, u'outcome': self.outcome}
+
+
+class FlightRecorder(object):
+
+    u"""Hook keeping the last 'size' imports.
+
+    Each record holds the module name, the importing thread, the start and
+    end times, the seconds spent in the finders ('find'), reading or
+    compiling the code object ('code') and in load_module ('exec', which
+    includes nested imports), and the outcome: 'ok', 'running' or the name
+    of the exception the import failed with.
+
+    """
+
+    def __init__(self, size=256):
+        if size < 1:
+            raise ValueError(u"size must be positive")
+        self.size = size
+        self._slots = [_Record() for x in xrange(size)]
+        self._seq = 0
+        self._local = threading.local()
+
+    def _active(self):
+        try:
+            return self._local.active
+        except AttributeError:
+            active = self._local.active = []
+            return active
+
+    def __call__(self, event, name, info):
+        if event == u'import_start':
+            # Runs under the import lock, so the sequence number is safe.
+            seq = self._seq
+            self._seq += 1
+            record = self._slots[seq % self.size]
+            record.reset(seq, name, threading.current_thread().name,
+                         info[u'time'])
+            self._active().append((seq, name, record))
+            return
+        active = self._active()
+        if not active or active[-1][1] != name:
+            return
+        seq, name, record = active[-1]
+        if event == u'import_finished':
+            active.pop()
+        if record.seq != seq:
+            # The slot was reused by the imports nested in this one.
+            return
+        if event in (u'finder_hit', u'finder_miss'):
+            record.find += info[u'duration']
+        elif event in (u'bytecode_used', u'source_compiled'):
+            record.code += info[u'duration']
+        elif event == u'exec_finished':
+            record.execution = info[u'duration']
+        elif event == u'import_finished':
+            record.end = info[u'time']
+            error = info[u'error']
+            record.outcome = (u'ok' if error is None
+                              else type(error).__name__)
+
+    def records(self):
+        u"""Return the recorded imports as dicts, oldest first."""
+        records = [record.to_dict() for record in self._slots
+                   if record.seq >= 0]
+        records.sort(key=lambda record: record[u'seq'])
+        return records
+
+    def dump(self, file=None):
+        u"""Write the recorded imports to 'file' (sys.stderr by default) as
+        JSON lines, oldest first."""
+        if file is None:
+            file = sys.stderr
+        for record in self.records():
+            file.write(json.dumps(record) + u'\n')
+        file.flush()
+
+    def dump_on_signal(self, signum, path=None):
+        u"""Install a handler dumping the buffer when 'signum' is received,
+        appending to the file at 'path' or writing to sys.stderr.
+
+        Returns the previous handler.
+
+        """
+        def handler(signum, frame):
+            if path is None:
+                self.dump()
+            else:
+                with open(path, u'a') as file:
+                    self.dump(file)
+        return signal.signal(signum, handler)
+
+
+def start_flight_recorder(size=256):
+    u"""Start recording the last 'size' imports; return the FlightRecorder."""
+    recorder = FlightRecorder(size)
+    _bootstrap._add_import_hook(recorder)
+    return recorder
+
+
+def stop_flight_recorder(recorder):
+    u"""Stop 'recorder'; what it has recorded stays available."""
+    _bootstrap._remove_import_hook(recorder)
@@ -0,0 +1,172 @@
+u"""Tracking of which imported modules are ever used.
+
+While tracking, modules loaded by the file system loaders for source and
+bytecode are created as instances of a module subclass which notices the
+first time one of their attributes is read after the import has finished;
+the class is then switched so later reads cost nothing extra. Modules that
+were imported but never read from are candidates for deferred (lazy) import,
+the most expensive to import first. Setting the IMPORTLIB_FULL_UNUSED_REPORT
+environment variable to a path tracks the whole process and writes the report
+there at exit.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import atexit
+import os
+import sys
+import time
+import types
+
+
+# Attributes read by the import machinery itself, which do not count as use.
+_MACHINERY_ATTRS = frozenset([u'__name__', u'__file__', u'__path__',
+                              u'__package__', u'__loader__', u'__class__'])
+
+
+class _UntouchedModule(types.ModuleType):
+
+    u"""Module whose attributes have not been read since it was imported."""
+
+    def __getattribute__(self, attr):
+        if attr not in _MACHINERY_ATTRS:
+            self.__class__ = _TouchedModule
+            if _tracker is not None:
+                _tracker._touched(self.__name__)
+        return types.ModuleType.__getattribute__(self, attr)
+
+
+class _TouchedModule(types.ModuleType):
+
+    u"""Class of tracked modules while they load and once they are used."""
+
+
+class TrackingLoader(object):
+
+    u"""Loader wrapper which loads the module into an instance of a module
+    subclass that reports its first use to 'tracker'.
+
+    The wrapped loader must reuse the module it finds in sys.modules when
+    load_module() is called, as loaders using module_for_loader do.
+
+    """
+
+    def __init__(self, loader, tracker):
+        self.loader = loader
+        self.tracker = tracker
+
+    def load_module(self, fullname):
+        u"""Load 'fullname', timing the import; reloads are passed through to
+        the wrapped loader."""
+        if fullname in sys.modules:
+            return self.loader.load_module(fullname)
+        module = _TouchedModule(str(fullname))
+        sys.modules[fullname] = module
+        start = time.time()
+        try:
+            self.loader.load_module(fullname)
+        except:
+            if sys.modules.get(fullname) is module:
+                del sys.modules[fullname]
+            raise
+        self.tracker._loaded(fullname, time.time() - start)
+        # Uses made while the module body was running do not count.
+        module.__class__ = _UntouchedModule
+        return module
+
+
+class UsageTracker(object):
+
+    u"""Records the import cost of tracked modules and which were used."""
+
+    def __init__(self):
+        self.costs = {}
+        self.used = set()
+
+    def _loaded(self, name, duration):
+        self.costs[name] = duration
+
+    def _touched(self, name):
+        self.used.add(name)
+
+    def unused(self):
+        u"""Return (name, seconds to import) for every tracked module never
+        used since its import, most expensive first.
+
+        The import time is cumulative, so it includes modules it imported.
+
+        """
+        unused = [(name, cost) for name, cost in self.costs.items()
+                  if name not in self.used]
+        unused.sort(key=lambda item: (-item[1], item[0]))
+        return unused
+
+    def report(self):
+        u"""Return a text report of the modules never used."""
+        unused = self.unused()
+        lines = [u'%d of %d tracked modules imported but never used:'
+                 % (len(unused), len(self.costs))]
+        for name, cost in unused:
+            lines.append(u'%10.3fms  %s' % (cost * 1000, name))
+        return u'\n'.join(lines)
+
+    def write(self, path=None):
+        u"""Write the report to the file at 'path', or to sys.stderr."""
+        if path is None:
+            sys.stderr.write(self.report() + u'\n')
+        else:
+            with open(path, u'w') as file:
+                file.write(self.report() + u'\n')
+
+
+# The most recently started UsageTracker; tracked modules report their first
+# use to it even once tracking has stopped.
+_tracker = None
+
+
+def _write_at_exit(tracker, path):
+    if tracker is _tracker and _bootstrap._tracking_loader is not None:
+        tracker.write(path)
+
+
+def start_usage_tracking(path=None, report_at_exit=True):
+    u"""Track which modules imported through importlib_full from now on are
+    ever used and return the UsageTracker.
+
+    Only modules loaded by the file system loaders for source and bytecode,
+    and not made lazy, are tracked. Unless 'report_at_exit' is false, the
+    modules never used are reported at exit to the file at 'path' or to
+    sys.stderr.
+
+    """
+    global _tracker
+    tracker = _tracker = UsageTracker()
+    def wrap(name, loader):
+        if not isinstance(loader, _bootstrap._LoaderBasics):
+            return loader
+        return TrackingLoader(loader, tracker)
+    _bootstrap._tracking_loader = wrap
+    if report_at_exit:
+        atexit.register(_write_at_exit, tracker, path)
+    return tracker
+
+
+def stop_usage_tracking():
+    u"""Stop tracking new imports and return the UsageTracker that was in
+    use, or None.
+
+    Its report is no longer written at exit, but the modules it already
+    tracks keep recording their first use into it.
+
+    """
+    if _bootstrap._tracking_loader is None:
+        return None
+    _bootstrap._tracking_loader = None
+    return _tracker
+
+
+def _track_from_environment():
+    u"""Track module use if IMPORTLIB_FULL_UNUSED_REPORT is set."""
+    path = os.environ.get(u'IMPORTLIB_FULL_UNUSED_REPORT')
+    if path:
+        start_usage_tracking(path)
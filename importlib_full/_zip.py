@@ -0,0 +1,360 @@
+u"""Import of modules from zip archives.
+
+The central directory of an archive is parsed once into an index of its
+members, which are then read through a memory map of the archive; finding a
+module is a few dictionary lookups however large the archive is. ZipFinder
+is the path hook for sys.path entries naming an archive or a directory
+inside one, tried by the implicit path hooks after the one for directories.
+
+Source is loaded by ZipLoader. Its bytecode is read from the archive, where
+_bootstrap._cache_from_source() puts it or next to the source, or else from a
+sidecar cache: a directory named after the archive with '.cache' appended,
+to which bytecode compiled from source is written. Bytecode without source
+is loaded by _SourcelessZipLoader.
+
+"""
+from __future__ import with_statement
+from . import _bootstrap
+import errno
+import imp
+import marshal
+import mmap
+import struct
+import time
+import warnings
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
+
+# End of central directory record, central directory entry and local file
+# header.
+_END_RECORD = struct.Struct(u'<4s4H2LH')
+_END_SIGNATURE = b'PK\x05\x06'
+_DIRECTORY_ENTRY = struct.Struct(u'<4s6H3L5H2L')
+_DIRECTORY_SIGNATURE = b'PK\x01\x02'
+_LOCAL_HEADER = struct.Struct(u'<4s5H3L2H')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+
+# The end record is followed by a comment of at most this many bytes.
+_MAX_COMMENT = 0xFFFF
+
+_FLAG_ENCRYPTED = 0x1
+_FLAG_UTF8 = 0x800
+
+_STORED = 0
+_DEFLATED = 8
+
+# Suffix appended to the path of an archive to name its sidecar cache.
+_SIDECAR_SUFFIX = u'.cache'
+
+
+class _ZipArchive(object):
+
+    u"""Index of the members of a zip archive, read through a memory map.
+
+    'members' maps the name of every file in the archive to its entry in the
+    central directory and 'directories' holds the name of every directory,
+    explicit or implied by the names of the files, without trailing slash.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with _bootstrap._io.FileIO(path, u'r') as file:
+                self._map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        except (EnvironmentError, ValueError):
+            # ValueError is raised for an empty file.
+            raise ImportError(u"can't read zip archive %s" % path)
+        self.members = {}
+        self.directories = set()
+        try:
+            self._read_directory()
+        except struct.error:
+            raise ImportError(u"truncated zip archive %s" % path)
+
+    def _read_directory(self):
+        u"""Index the central directory."""
+        data = self._map
+        end = data.rfind(_END_SIGNATURE,
+                         max(len(data) - _END_RECORD.size - _MAX_COMMENT, 0))
+        if end < 0:
+            raise ImportError(u"not a zip archive: %s" % self.path)
+        (signature, disk, directory_disk, disk_entries, entries,
+         directory_size, directory_offset,
+         comment_size) = _END_RECORD.unpack_from(data, end)
+        if disk or directory_disk:
+            raise ImportError(u"multi-disk zip archive %s" % self.path)
+        # Bytes prepended to the archive, such as a launcher script.
+        prefix = end - directory_size - directory_offset
+        if prefix < 0:
+            raise ImportError(u"bad central directory in %s" % self.path)
+        position = prefix + directory_offset
+        for x in xrange(entries):
+            (signature, made_by, needed, flags, method, mod_time, mod_date,
+             crc, compressed, size, name_size, extra_size, comment_size,
+             disk_start, internal, external,
+             offset) = _DIRECTORY_ENTRY.unpack_from(data, position)
+            if signature != _DIRECTORY_SIGNATURE:
+                raise ImportError(u"bad central directory in %s" % self.path)
+            start = position + _DIRECTORY_ENTRY.size
+            name = data[start:start + name_size].decode(
+                u'utf-8' if flags & _FLAG_UTF8 else u'cp437')
+            position = start + name_size + extra_size + comment_size
+            if name.endswith(u'/'):
+                parent = name[:-1]
+            else:
+                self.members[name] = (flags, method, compressed, mod_time,
+                                      mod_date, prefix + offset)
+                parent = name.rpartition(u'/')[0]
+            while parent and parent not in self.directories:
+                self.directories.add(parent)
+                parent = parent.rpartition(u'/')[0]
+
+    def read(self, name):
+        u"""Return the contents of the member 'name'.
+
+        IOError is raised if there is no such member or it cannot be read.
+
+        """
+        try:
+            flags, method, compressed, mod_time, mod_date, offset = \
+                self.members[name]
+        except KeyError:
+            raise IOError(errno.ENOENT, u"no member %s in %s"
+                          % (name, self.path))
+        if flags & _FLAG_ENCRYPTED:
+            raise IOError(u"member %s of %s is encrypted" % (name, self.path))
+        try:
+            header = _LOCAL_HEADER.unpack_from(self._map, offset)
+        except struct.error:
+            header = None
+        if header is None or header[0] != _LOCAL_SIGNATURE:
+            raise IOError(u"bad local header for %s in %s"
+                          % (name, self.path))
+        start = offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+        data = self._map[start:start + compressed]
+        if method == _DEFLATED:
+            if zlib is None:
+                raise IOError(u"zlib is required to read %s from %s"
+                              % (name, self.path))
+            data = zlib.decompress(data, -15)
+        elif method != _STORED:
+            raise IOError(u"compression method %d of %s in %s is not "
+                          u"supported" % (method, name, self.path))
+        _bootstrap._stats[u'bytes_read'] += len(data)
+        return data
+
+    def mtime(self, name):
+        u"""Return the modification time of the member 'name' as an int."""
+        mod_time, mod_date = self.members[name][3:5]
+        return int(time.mktime(((mod_date >> 9) + 1980,
+                                (mod_date >> 5) & 0xF, mod_date & 0x1F,
+                                mod_time >> 11, (mod_time >> 5) & 0x3F,
+                                (mod_time & 0x1F) * 2, 0, 0, -1)))
+
+
+# Path of an archive to the _ZipArchive indexing it.
+_archives = {}
+
+
+def _open_archive(path):
+    u"""Return the _ZipArchive for the file at 'path', reusing the index of
+    a previous call unless the file has changed since."""
+    _bootstrap._stats[u'stat'] += 1
+    stat_info = _bootstrap._os.stat(path)
+    key = (stat_info.st_mtime, stat_info.st_size)
+    archive = _archives.get(path)
+    if archive is None or archive.key != key:
+        archive = _ZipArchive(path)
+        archive.key = key
+        _archives[path] = archive
+    return archive
+
+
+class _ZipMemberLoader(object):
+
+    u"""Base class of the loaders of archive members."""
+
+    def __init__(self, archive, fullname, path):
+        self.archive = archive
+        self._name = fullname
+        self._path = path
+
+    @_bootstrap._check_name
+    def get_filename(self, fullname):
+        u"""Return the path to the member as found by the finder."""
+        return self._path
+
+    def _member(self, path):
+        u"""Return the name in the archive of the member at 'path', or
+        None."""
+        prefix = self.archive.path + _bootstrap.path_sep
+        if not path.startswith(prefix):
+            return None
+        return path[len(prefix):].replace(_bootstrap.path_sep, u'/')
+
+    def get_data(self, path):
+        u"""Return the data of the member at 'path'."""
+        member = self._member(path)
+        if member is None:
+            raise IOError(errno.ENOENT, u"%s is not in %s"
+                          % (path, self.archive.path))
+        return self.archive.read(member)
+
+
+class ZipLoader(_ZipMemberLoader, _bootstrap.SourceLoader):
+
+    u"""Loader for source in a zip archive; registered as an
+    importlib_full.abc.SourceLoader."""
+
+    # (path, data) of the bytecode read by path_mtime(), or None.
+    _bytecode = None
+
+    def _bytecode_members(self, path):
+        u"""Return the names of the members which may hold the bytecode at
+        'path' for the source."""
+        names = [self._member(path)]
+        base = self._member(self._path).rpartition(u'.')[0]
+        names.extend(base + suffix
+                     for suffix in _bootstrap._suffix_list(imp.PY_COMPILED))
+        return [name for name in names if name in self.archive.members]
+
+    def _sidecar(self, path):
+        u"""Return the path in the sidecar cache for the bytecode at
+        'path'."""
+        return self.archive.path + _SIDECAR_SUFFIX + path[
+            len(self.archive.path):]
+
+    def _archived_bytecode(self, path):
+        u"""Return the data of the bytecode at 'path' from the archive, or
+        None if it has none.
+
+        The data read by path_mtime() is kept for the get_data() call of
+        get_code() which follows, so that it is only read once.
+
+        """
+        if self._bytecode is not None and self._bytecode[0] == path:
+            return self._bytecode[1]
+        members = self._bytecode_members(path)
+        data = self.archive.read(members[0]) if members else None
+        self._bytecode = path, data
+        return data
+
+    def get_data(self, path):
+        u"""Return the data of the source, or of the bytecode at 'path' from
+        the archive or the sidecar cache."""
+        if path == self._path:
+            return super(ZipLoader, self).get_data(path)
+        data = self._archived_bytecode(path)
+        self._bytecode = None
+        if data is not None:
+            return data
+        _bootstrap._stats[u'open'] += 1
+        with _bootstrap._io.FileIO(self._sidecar(path), u'r') as file:
+            data = file.read()
+        _bootstrap._stats[u'bytes_read'] += len(data)
+        return data
+
+    def path_mtime(self, path):
+        u"""Return the modification time of the source member.
+
+        The archive records it with a precision of two seconds, so bytecode
+        stored in the archive with a timestamp within a second of it is
+        taken to match, and its timestamp returned.
+
+        """
+        mtime = self.archive.mtime(self._member(path))
+        data = self._archived_bytecode(_bootstrap._cache_from_source(path))
+        if data is not None:
+            timestamp = data[4:8]
+            if len(timestamp) == 4:
+                timestamp = marshal._r_long(timestamp)
+                if abs(timestamp - mtime) <= 1:
+                    return timestamp
+        return mtime
+
+    def set_data(self, path, data):
+        u"""Write the bytecode for 'path' to the sidecar cache, replacing
+        any previous file atomically; failures are ignored."""
+        sidecar = self._sidecar(path)
+        parent = sidecar.rpartition(_bootstrap.path_sep)[0]
+        missing = []
+        while parent and not _bootstrap._path_isdir(parent):
+            parent, _, part = parent.rpartition(_bootstrap.path_sep)
+            missing.append(part)
+        temporary = u'%s.%d.tmp' % (sidecar, _bootstrap._os.getpid())
+        try:
+            for part in reversed(missing):
+                parent = _bootstrap._path_join(parent, part)
+                try:
+                    _bootstrap._os.mkdir(parent)
+                except OSError, exc:
+                    # Probably another process already created the directory.
+                    if exc.errno != errno.EEXIST:
+                        raise
+            _bootstrap._stats[u'open'] += 1
+            with _bootstrap._io.FileIO(temporary, u'wb') as file:
+                file.write(data)
+            _bootstrap._os.rename(temporary, sidecar)
+        except EnvironmentError:
+            _bootstrap._stats[u'bytecode_write_failures'] += 1
+            try:
+                _bootstrap._os.unlink(temporary)
+            except OSError:
+                pass
+            return
+        _bootstrap._stats[u'bytecode_writes'] += 1
+
+
+class _SourcelessZipLoader(_ZipMemberLoader, _bootstrap._SourcelessFileLoader):
+
+    u"""Loader for bytecode in a zip archive without source."""
+
+
+class ZipFinder(object):
+
+    u"""Finder for the modules in a zip archive, or in a directory inside
+    one.
+
+    Usable as a path hook: ImportError is raised if 'path' is neither an
+    archive nor an existing directory in one.
+
+    """
+
+    def __init__(self, path):
+        archive_path, inner = _bootstrap._split_archive_path(path)
+        self.archive = _open_archive(archive_path)
+        self.prefix = u''.join(part + u'/' for part in inner)
+        if self.prefix and self.prefix[:-1] not in self.archive.directories:
+            raise ImportError(u"no directory %s in %s"
+                              % (self.prefix, archive_path))
+        self.path = path
+        self.suffixes = ([(suffix, ZipLoader) for suffix in
+                          _bootstrap._suffix_list(imp.PY_SOURCE)] +
+                         [(suffix, _SourcelessZipLoader) for suffix in
+                          _bootstrap._suffix_list(imp.PY_COMPILED)])
+
+    def _loader(self, loader, fullname, member):
+        path = _bootstrap._path_join(self.archive.path, *member.split(u'/'))
+        return loader(self.archive, fullname, path)
+
+    def find_module(self, fullname):
+        u"""Try to find a loader for the specified module."""
+        base = self.prefix + fullname.rpartition(u'.')[2]
+        members = self.archive.members
+        if base in self.archive.directories:
+            for suffix, loader in self.suffixes:
+                member = base + u'/__init__' + suffix
+                if member in members:
+                    return self._loader(loader, fullname, member)
+            else:
+                msg = u"Not importing directory %s in %s: missing __init__"
+                warnings.warn(msg % (base, self.archive.path), ImportWarning)
+        for suffix, loader in self.suffixes:
+            if base + suffix in members:
+                return self._loader(loader, fullname, base + suffix)
+        return None
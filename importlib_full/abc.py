@@ -42,6 +42,8 @@ class Finder():
 Finder.register(machinery.BuiltinImporter)
 Finder.register(machinery.FrozenImporter)
 Finder.register(machinery.PathFinder)
+Finder.register(machinery.ZipFinder)
+Finder.register(machinery.BundleFinder)
 
 
 class ResourceLoader(Loader):
@@ -106,6 +108,8 @@ class ExecutionLoader(InspectLoader):
         set to."""
         raise NotImplementedError
 
+ExecutionLoader.register(machinery.BundleLoader)
+
 
 class SourceLoader(_bootstrap.SourceLoader, ResourceLoader, ExecutionLoader):
 
@@ -140,6 +144,8 @@ class SourceLoader(_bootstrap.SourceLoader, ResourceLoader, ExecutionLoader):
         """
         raise NotImplementedError
 
+SourceLoader.register(machinery.ZipLoader)
+
 
 class PyLoader(SourceLoader):
 
@@ -0,0 +1,180 @@
+u"""Import-time budget: measure importing a module in fresh interpreters.
+
+Each run starts a new interpreter which imports importlib_full, installs
+importlib_full.__import__ as the builtin __import__ and then imports the
+module under test while profiling it. The few modules imported by
+importlib_full itself (imp, marshal, re, tokenize and their dependencies)
+are therefore already loaded and not counted; starting the profiler imports
+no others. The runs are summarised as the median and 95th percentile wall
+time, the number of modules imported and the modules with the most self
+time (the top offenders).
+
+Run with ``python -m importlib_full.budget [options] MODULE``; the exit
+status is 1 when a budget given with --max-time, --max-p95 or --max-modules
+is exceeded.
+
+"""
+from __future__ import with_statement
+import importlib_full
+import json
+import optparse
+import os
+import subprocess
+import sys
+
+
+# Executed by each child interpreter with the module name as its argument;
+# prints the measurement as JSON.
+_CHILD = u"""\
+import sys, time
+import importlib_full
+name = sys.argv[1]
+__builtins__.__import__ = importlib_full.__import__
+profiler = importlib_full.start_profiling()
+before = set(sys.modules)
+start = time.time()
+importlib_full.import_module(name)
+elapsed = time.time() - start
+importlib_full.stop_profiling()
+modules = [module for module in set(sys.modules) - before
+           if sys.modules[module] is not None]
+self_times = {}
+def walk(node):
+    self_times[node.name] = self_times.get(node.name, 0) + node.self_time
+    for child in node.children:
+        walk(child)
+for root in profiler.roots:
+    walk(root)
+import json
+sys.stdout.write(json.dumps({'time': elapsed, 'modules': len(modules),
+                             'self_times': self_times}))
+"""
+
+
+def percentile(values, percent):
+    u"""Return the nearest-rank percentile of a non-empty list of values."""
+    values = sorted(values)
+    rank = -(-len(values) * percent // 100)
+    return values[max(int(rank), 1) - 1]
+
+
+def _run_child(name, python):
+    u"""Measure importing 'name' in a new interpreter; return the dict the
+    child reported."""
+    env = dict(os.environ)
+    # Make this copy of importlib_full importable by the child.
+    package_parent = os.path.dirname(os.path.dirname(
+        os.path.abspath(importlib_full.__file__)))
+    paths = [package_parent]
+    if env.get(u'PYTHONPATH'):
+        paths.append(env[u'PYTHONPATH'])
+    env[u'PYTHONPATH'] = os.pathsep.join(paths)
+    process = subprocess.Popen([python, u'-c', _CHILD, name], env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, error = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(u"importing %s failed:\n%s"
+                           % (name, error.decode(u'utf-8', u'replace')))
+    return json.loads(output)
+
+
+def measure(name, runs=10, python=None, top=10):
+    u"""Import 'name' in 'runs' fresh interpreters and return a summary.
+
+    'python' is the interpreter to run (sys.executable by default). The
+    summary is a dict with the module 'name', the number of 'runs', the
+    'median' and 'p95' import time in seconds, the median number of
+    'modules' imported and the 'top' modules by mean self time as
+    [name, seconds] pairs, slowest first.
+
+    """
+    if runs < 1:
+        raise ValueError(u"runs must be positive")
+    python = python or sys.executable
+    results = [_run_child(name, python) for x in xrange(runs)]
+    times = [result[u'time'] for result in results]
+    self_times = {}
+    for result in results:
+        for module, seconds in result[u'self_times'].items():
+            self_times[module] = self_times.get(module, 0) + seconds
+    offenders = sorted(((module, total / runs)
+                        for module, total in self_times.items()),
+                       key=lambda item: (-item[1], item[0]))
+    return {u'name': name, u'runs': runs,
+            u'median': percentile(times, 50),
+            u'p95': percentile(times, 95),
+            u'modules': percentile([result[u'modules'] for result in results],
+                                    50),
+            u'top': [list(item) for item in offenders[:top]]}
+
+
+def check(summary, max_time=None, max_p95=None, max_modules=None):
+    u"""Return a message for each budget the summary exceeds; times are in
+    seconds."""
+    failures = []
+    if max_time is not None and summary[u'median'] > max_time:
+        failures.append(u"median import time %.1fms exceeds %.1fms"
+                        % (summary[u'median'] * 1000, max_time * 1000))
+    if max_p95 is not None and summary[u'p95'] > max_p95:
+        failures.append(u"p95 import time %.1fms exceeds %.1fms"
+                        % (summary[u'p95'] * 1000, max_p95 * 1000))
+    if max_modules is not None and summary[u'modules'] > max_modules:
+        failures.append(u"%d modules imported exceeds %d"
+                        % (summary[u'modules'], max_modules))
+    return failures
+
+
+def format_summary(summary):
+    u"""Return the summary as text."""
+    lines = [u"{0}: {1} runs".format(summary[u'name'], summary[u'runs']),
+             u"  median  {0:.1f}ms".format(summary[u'median'] * 1000),
+             u"  p95     {0:.1f}ms".format(summary[u'p95'] * 1000),
+             u"  modules {0}".format(summary[u'modules'])]
+    if summary[u'top']:
+        lines.append(u"  top offenders (mean self time):")
+        for module, seconds in summary[u'top']:
+            lines.append(u"    {0:8.2f}ms  {1}".format(seconds * 1000, module))
+    return u'\n'.join(lines)
+
+
+def main(args=None):
+    u"""Run the command line interface; return the exit status."""
+    parser = optparse.OptionParser(usage=u"%prog [options] MODULE")
+    parser.add_option(u'-n', u'--runs', type=u'int', default=10,
+                      help=u"number of interpreters to run (default 10)")
+    parser.add_option(u'--python', help=u"interpreter to measure with "
+                                        u"(default: the current one)")
+    parser.add_option(u'--top', type=u'int', default=10,
+                      help=u"number of offenders to list (default 10)")
+    parser.add_option(u'--max-time', type=u'float', metavar=u'MS',
+                      help=u"fail if the median import time exceeds MS")
+    parser.add_option(u'--max-p95', type=u'float', metavar=u'MS',
+                      help=u"fail if the p95 import time exceeds MS")
+    parser.add_option(u'--max-modules', type=u'int', metavar=u'COUNT',
+                      help=u"fail if more than COUNT modules are imported")
+    parser.add_option(u'--json', action=u'store_true',
+                      help=u"print the summary as JSON")
+    options, args = parser.parse_args(args)
+    if len(args) != 1:
+        parser.error(u"exactly one module is required")
+    if options.runs < 1:
+        parser.error(u"--runs must be positive")
+    summary = measure(args[0], options.runs, options.python, options.top)
+    failures = check(summary,
+                     None if options.max_time is None
+                         else options.max_time / 1000,
+                     None if options.max_p95 is None
+                         else options.max_p95 / 1000,
+                     options.max_modules)
+    if options.json:
+        summary[u'failures'] = failures
+        print json.dumps(summary, indent=2)
+    else:
+        print format_summary(summary)
+        for failure in failures:
+            print u"BUDGET EXCEEDED: " + failure
+    return 1 if failures else 0
+
+
+if __name__ == u'__main__':
+    sys.exit(main())
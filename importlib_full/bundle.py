@@ -0,0 +1,124 @@
+u"""Build bundles of precompiled modules for importlib_full.
+
+A bundle holds the code objects of every module found in some directories,
+compiled from their source, in one file; see importlib_full._bundle for the
+format. With importlib_full.__import__ in use, putting the bundle on
+sys.path in place of the directories imports the modules from it with one
+open and one mmap of the bundle instead of a stat and an open per module.
+
+Run with ``python -m importlib_full.bundle -o OUTPUT DIRECTORY...``; the
+directories are searched in order, as sys.path is, and the exit status is 1
+if a module could not be compiled.
+
+"""
+from __future__ import with_statement
+from ._bundle import HEADER, SIGNATURE, VERSION
+import imp
+import marshal
+import os
+import re
+import sys
+
+
+_IDENTIFIER = re.compile(ur'[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def find_modules(directory):
+    u"""Return (name, path, is_package) for every source module and package
+    importable from 'directory', sorted by name."""
+    suffixes = [suffix for suffix, mode, kind in imp.get_suffixes()
+                if kind == imp.PY_SOURCE]
+    found = []
+    def walk(path, prefix):
+        for entry in sorted(os.listdir(path)):
+            full_path = os.path.join(path, entry)
+            if os.path.isdir(full_path):
+                if not _IDENTIFIER.match(entry):
+                    continue
+                for suffix in suffixes:
+                    init = os.path.join(full_path, u'__init__' + suffix)
+                    if os.path.isfile(init):
+                        found.append((prefix + entry, init, True))
+                        walk(full_path, prefix + entry + u'.')
+                        break
+                continue
+            for suffix in suffixes:
+                base = entry[:-len(suffix)]
+                if (entry.endswith(suffix) and base != u'__init__' and
+                        _IDENTIFIER.match(base)):
+                    found.append((prefix + base, full_path, False))
+                    break
+    walk(directory, u'')
+    found.sort()
+    return found
+
+
+def build(output, directories):
+    u"""Write the bundle of the modules in 'directories' to 'output'.
+
+    A module found in more than one directory is taken from the first.
+    Returns the number of modules bundled and a list of (path, error) for
+    the sources which could not be compiled and were left out. The bundle
+    is written to a temporary file which then replaces 'output'.
+
+    """
+    modules = {}
+    for directory in directories:
+        for name, path, is_package in find_modules(
+                os.path.abspath(directory)):
+            modules.setdefault(name, (path, is_package))
+    index = {}
+    failures = []
+    temporary = u'%s.%d.tmp' % (output, os.getpid())
+    try:
+        with open(temporary, u'wb') as file:
+            file.write(b'\0' * HEADER.size)
+            for name, (path, is_package) in sorted(modules.items()):
+                with open(path, u'rb') as source:
+                    source_bytes = source.read()
+                try:
+                    code_object = compile(source_bytes, path, u'exec',
+                                          dont_inherit=True)
+                except (SyntaxError, TypeError), exc:
+                    failures.append((path, exc))
+                    continue
+                data = marshal.dumps(code_object)
+                index[name] = (file.tell(), len(data), is_package, path)
+                file.write(data)
+            offset = file.tell()
+            data = marshal.dumps(index)
+            file.write(data)
+            file.seek(0)
+            file.write(HEADER.pack(SIGNATURE, VERSION, imp.get_magic(),
+                                   offset, len(data)))
+        if os.name == u'nt' and os.path.exists(output):
+            os.unlink(output)
+        os.rename(temporary, output)
+    except:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return len(index), failures
+
+
+def main(args=None):
+    u"""Run the command line interface; return the exit status."""
+    import optparse
+    parser = optparse.OptionParser(
+        usage=u"%prog -o OUTPUT DIRECTORY [DIRECTORY...]")
+    parser.add_option(u'-o', u'--output', metavar=u'FILE',
+                      help=u"the bundle to write")
+    options, args = parser.parse_args(args)
+    if not options.output:
+        parser.error(u"--output is required")
+    if not args:
+        parser.error(u"at least one directory is required")
+    count, failures = build(options.output, args)
+    for path, exc in failures:
+        sys.stderr.write(u"%s: %s\n" % (path, exc))
+    print u"%d modules bundled into %s" % (count, options.output)
+    return 1 if failures else 0
+
+
+if __name__ == u'__main__':
+    sys.exit(main())
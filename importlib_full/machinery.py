@@ -3,3 +3,7 @@ u"""The machinery of importlib_full: finders, loaders, hooks, etc."""
 from ._bootstrap import BuiltinImporter
 from ._bootstrap import FrozenImporter
 from ._bootstrap import PathFinder
+from ._zip import ZipFinder
+from ._zip import ZipLoader
+from ._bundle import BundleFinder
+from ._bundle import BundleLoader
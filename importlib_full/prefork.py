@@ -0,0 +1,251 @@
+u"""Prefork server: import a set of modules once, then fork workers from it.
+
+The server imports the configured modules with importlib_full.import_module
+and listens on a Unix socket. Each connection sends one JSON request per
+line; a spawn request forks a child which already has every preloaded module
+in sys.modules, installs the requested argv, environment and working
+directory, and runs the requested module as __main__ the way ``python -m``
+would. Children share the server's standard streams.
+
+Requests:
+
+    {"module": "pkg.main", "argv": [...], "env": {...}, "cwd": "..."}
+        The reply is {"pid": <pid>} followed, once the child finishes, by
+        {"status": <exit status>}. "argv" defaults to [module]; "env" replaces
+        the environment wholesale when given.
+
+    {"command": "stats"}
+        The reply is the spawn statistics, see PreforkServer.stats().
+
+Run a server with ``python -m importlib_full.prefork SOCKET MODULE...``.
+
+"""
+from __future__ import with_statement
+from contextlib import closing
+import importlib_full
+import errno
+import json
+import os
+import runpy
+import select
+import socket
+import sys
+import time
+import traceback
+
+
+class PreforkServer(object):
+
+    u"""Server forking children with 'modules' already imported."""
+
+    def __init__(self, socket_path, modules=()):
+        self.socket_path = socket_path
+        self.modules = list(modules)
+        self.preload_time = None
+        self.spawn_times = []
+        self.failures = 0
+        self.children = set()
+        self._socket = None
+        self._running = False
+
+    def preload(self):
+        u"""Import the configured modules."""
+        start = time.time()
+        for name in self.modules:
+            importlib_full.import_module(name)
+        self.preload_time = time.time() - start
+
+    def stats(self):
+        u"""Return a dict of spawn statistics; latencies are in milliseconds,
+        measured from reading a request to the fork returning in the server."""
+        times = sorted(self.spawn_times)
+        stats = {u'modules': len(self.modules), u'spawns': len(times),
+                 u'failures': self.failures, u'running': len(self.children),
+                 u'preload_ms': None, u'spawn_ms': None}
+        if self.preload_time is not None:
+            stats[u'preload_ms'] = self.preload_time * 1000
+        if times:
+            stats[u'spawn_ms'] = {
+                u'min': times[0] * 1000,
+                u'median': times[len(times) // 2] * 1000,
+                u'max': times[-1] * 1000,
+                u'mean': sum(times) / len(times) * 1000,
+            }
+        return stats
+
+    def serve_forever(self, poll_interval=0.5):
+        u"""Preload the modules if not done yet and serve requests until
+        shutdown() is called."""
+        if self.preload_time is None:
+            self.preload()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.unlink(self.socket_path)
+        except OSError, exc:
+            if exc.errno != errno.ENOENT:
+                raise
+        self._socket.bind(self.socket_path)
+        self._socket.listen(16)
+        self._running = True
+        try:
+            while self._running:
+                readable = select.select([self._socket], [], [],
+                                         poll_interval)[0]
+                self._reap()
+                if readable:
+                    connection = self._socket.accept()[0]
+                    try:
+                        self._handle(connection)
+                    finally:
+                        connection.close()
+        finally:
+            self._socket.close()
+            os.unlink(self.socket_path)
+
+    def shutdown(self):
+        u"""Make serve_forever() return within one poll interval."""
+        self._running = False
+
+    def _reap(self):
+        u"""Collect children which have exited."""
+        for pid in list(self.children):
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    self.children.discard(pid)
+            except OSError:
+                self.children.discard(pid)
+
+    def _handle(self, connection):
+        u"""Answer the request on 'connection'."""
+        stream = connection.makefile(u'r+b')
+        received = time.time()
+        try:
+            request = json.loads(stream.readline())
+        except ValueError:
+            self.failures += 1
+            return
+        if request.get(u'command') == u'stats':
+            _send(stream, self.stats())
+            return
+        try:
+            pid = os.fork()
+        except OSError, exc:
+            # Out of processes or memory: refuse this request and carry on.
+            self.failures += 1
+            _send(stream, {u'error': u"fork failed: %s" % exc.strerror})
+            return
+        if pid == 0:
+            self._socket.close()
+            _run_child(stream, request)
+        self.spawn_times.append(time.time() - received)
+        self.children.add(pid)
+
+
+def _send(stream, message):
+    stream.write(json.dumps(message) + '\n')
+    stream.flush()
+
+
+def _run_child(stream, request):
+    u"""Set up the forked child for the request, run it and exit."""
+    status = 1
+    try:
+        if u'random' in sys.modules:
+            sys.modules[u'random'].seed()
+        if u'env' in request:
+            os.environ.clear()
+            os.environ.update(request[u'env'])
+        if u'cwd' in request:
+            os.chdir(request[u'cwd'])
+        # The built-in import wants byte string names.
+        module = str(request[u'module'])
+        sys.argv = list(request.get(u'argv') or [module])
+        _send(stream, {u'pid': os.getpid()})
+        try:
+            runpy.run_module(module, run_name='__main__', alter_sys=True)
+            status = 0
+        except SystemExit, exc:
+            if exc.code is None:
+                status = 0
+            elif isinstance(exc.code, (int, long)):
+                status = exc.code
+            else:
+                sys.stderr.write(u'%s\n' % exc.code)
+    except:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _send(stream, {u'status': status})
+        finally:
+            os._exit(status)
+
+
+def _request(socket_path, request):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    stream = client.makefile(u'r+b')
+    client.close()
+    _send(stream, request)
+    return stream
+
+
+def spawn(socket_path, module, argv=None, env=None, cwd=None):
+    u"""Have the server at 'socket_path' run 'module' in a forked child.
+
+    Blocks until the child exits and returns (pid, exit status). Raises
+    RuntimeError if the server could not fork.
+
+    """
+    request = {u'module': module}
+    if argv is not None:
+        request[u'argv'] = list(argv)
+    if env is not None:
+        request[u'env'] = dict(env)
+    if cwd is not None:
+        request[u'cwd'] = cwd
+    with closing(_request(socket_path, request)) as stream:
+        reply = json.loads(stream.readline())
+        if u'error' in reply:
+            raise RuntimeError(reply[u'error'])
+        pid = reply[u'pid']
+        line = stream.readline()
+    if not line:
+        raise RuntimeError(u"child %d exited without reporting status" % pid)
+    return pid, json.loads(line)[u'status']
+
+
+def server_stats(socket_path):
+    u"""Return the statistics of the server at 'socket_path'."""
+    with closing(_request(socket_path, {u'command': u'stats'})) as stream:
+        return json.loads(stream.readline())
+
+
+def main(args=None):
+    import optparse
+    parser = optparse.OptionParser(
+        usage=u"%prog [options] SOCKET [MODULE ...]")
+    parser.add_option(u'-f', u'--modules-file', dest=u'modules_file',
+                      help=u"file listing modules to preload, one per line")
+    options, args = parser.parse_args(args)
+    if not args:
+        parser.error(u"a socket path is required")
+    modules = args[1:]
+    if options.modules_file:
+        with open(options.modules_file) as file:
+            modules.extend(line.strip() for line in file
+                           if line.strip() and not line.startswith(u'#'))
+    server = PreforkServer(args[0], modules)
+    server.preload()
+    print u"Preloaded {0} modules in {1:.1f}ms".format(
+        len(modules), server.preload_time * 1000)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == u'__main__':
+    main()
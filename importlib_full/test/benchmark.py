@@ -3,42 +3,212 @@ u"""Benchmark some basic import use-cases.
 The assumption is made that this benchmark is run in a fresh interpreter and
 thus has no external changes made to import-related attributes in sys.
 
+Every benchmark runs with both the built-in __import__ and
+importlib_full.__import__ unless --builtin or --importlib is given, and is
+reported as the median, mean, 95th and 99th percentile seconds per import
+over a number of samples, with confidence intervals; see bench() and
+summarize(). With --contention, benchmarks of imports made concurrently by
+1 to 64 threads are run as well; see contend(). --latency runs
+importlib_full.__import__ again with every file system call slowed down, as
+on a network file system; see util.slow_filesystem(). --memory runs it again
+on an in-memory file system, leaving only the cost of the machinery itself;
+see util.MemoryFilesystem. Results can be written as JSON with --write and
+compared to a previously written baseline with --read.
+
 """
 from __future__ import with_statement
 from . import util
 from .source import util as source_util
+from importlib_full.budget import percentile
+import contextlib
 import decimal
+import gc
 import imp
 import importlib_full
+import itertools
+import json
+import math
 import os
 import py_compile
+import subprocess
 import sys
+import threading
 import timeit
 
 
-def bench(name, cleanup=lambda: None, **_3to2kwargs):
+# Number of statement executions made by bench(), including calibration.
+_executions = 0
+
+# The util.MemoryFilesystem in use by importlib_full, if any.
+_memory = None
+
+# Upper bound on the confidence intervals, relative to the median, beyond which
+# a result is flagged as noisy.
+NOISE_THRESHOLD = 0.05
+
+
+def _statement(stmt):
+    u"""Return a function executing the statement, so that timing it does
+    not pay for timeit's per-call setup."""
+    namespace = {}
+    exec(u"def run():\n    {}\n".format(stmt), namespace)
+    return namespace[u'run']
+
+
+def _loop_overhead(clock, number):
+    u"""Return the seconds a batch of 'number' calls of a function doing
+    nothing takes, as the least of a few tries."""
+    def nothing():
+        pass
+    best = None
+    for x in xrange(5):
+        loop = itertools.repeat(None, number)
+        start = clock()
+        for x in loop:
+            nothing()
+        elapsed = clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _clock_overhead(clock):
+    u"""Return the least difference between two consecutive clock reads."""
+    best = None
+    for x in xrange(1000):
+        start = clock()
+        elapsed = clock() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench(name, cleanup=None, **_3to2kwargs):
+    if 'stmt' in _3to2kwargs: stmt = _3to2kwargs['stmt']; del _3to2kwargs['stmt']
+    else: stmt = None
     if 'repeat' in _3to2kwargs: repeat = _3to2kwargs['repeat']; del _3to2kwargs['repeat']
-    else: repeat = 3
+    else: repeat = 30
     if 'seconds' in _3to2kwargs: seconds = _3to2kwargs['seconds']; del _3to2kwargs['seconds']
-    else: seconds = 1
-    u"""Bench the given statement as many times as necessary until total
-    executions take one second."""
-    stmt = u"__import__({!r})".format(name)
-    timer = timeit.Timer(stmt)
+    else: seconds = 3
+    u"""Bench the given statement (importing 'name' by default), yielding
+    'repeat' samples of the mean seconds per execution.
+
+    Each sample is a batch of executions whose size is calibrated so that all
+    the samples take about 'seconds' in total. The calibration doubles as a
+    warm up and is discarded. Without 'cleanup' the batch runs in a tight loop
+    and the cost of the loop is subtracted; otherwise each execution is timed
+    on its own, minus the cost of reading the clock, and cleanup() runs
+    between executions outside of the timing. The garbage collector is
+    disabled while timing, as timeit does.
+
+    """
+    if stmt is None:
+        stmt = u"__import__({!r})".format(name)
+    run = _statement(stmt)
+    clock = timeit.default_timer
+    clock_overhead = _clock_overhead(clock)
+
+    def batch(number):
+        global _executions
+        _executions += number
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if cleanup is None:
+                loop = itertools.repeat(None, number)
+                start = clock()
+                for x in loop:
+                    run()
+                return clock() - start - loop_overhead(number)
+            total = 0
+            for x in xrange(number):
+                start = clock()
+                try:
+                    run()
+                    total += clock() - start - clock_overhead
+                finally:
+                    cleanup()
+            return total
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    overheads = {}
+    def loop_overhead(number):
+        if number not in overheads:
+            overheads[number] = _loop_overhead(clock, number)
+        return overheads[number]
+
+    target = float(seconds) / repeat
+    number = 1
+    while True:
+        elapsed = batch(number)
+        if elapsed >= target or number >= 1 << 24:
+            break
+        number *= 2
     for x in xrange(repeat):
-        total_time = 0
-        count = 0
-        while total_time < seconds:
-            try:
-                total_time += timer.timeit(1)
-            finally:
-                cleanup()
-            count += 1
-        else:
-            # One execution too far
-            if total_time > seconds:
-                count -= 1
-        yield count // seconds
+        yield max(batch(number), 0.0) / number
+
+
+def summarize(samples, noise_threshold=NOISE_THRESHOLD):
+    u"""Return the statistics of a list of samples in seconds.
+
+    The mean comes with its 95% confidence interval under the normal
+    approximation and the median with a distribution-free 95% confidence
+    interval from the order statistics. The result is flagged as noisy when
+    either interval reaches further from its estimate than 'noise_threshold'
+    times the median.
+
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+    mean = sum(ordered) / count
+    if count > 1:
+        stdev = math.sqrt(sum((sample - mean) ** 2 for sample in ordered) /
+                          (count - 1))
+    else:
+        stdev = 0.0
+    mean_error = 1.96 * stdev / math.sqrt(count)
+    spread = 1.96 * math.sqrt(count) / 2
+    low = max(int(math.floor(count / 2.0 - spread)), 1)
+    high = min(int(math.ceil(count / 2.0 + 1 + spread)), count)
+    median = percentile(ordered, 50)
+    summary = {
+        u'samples': list(samples),
+        u'mean': mean,
+        u'mean_ci': [mean - mean_error, mean + mean_error],
+        u'stdev': stdev,
+        u'median': median,
+        u'median_ci': [ordered[low - 1], ordered[high - 1]],
+        u'p95': percentile(ordered, 95),
+        u'p99': percentile(ordered, 99),
+    }
+    half_width = max(mean_error,
+                     median - summary[u'median_ci'][0],
+                     summary[u'median_ci'][1] - median)
+    summary[u'noisy'] = half_width > noise_threshold * median
+    return summary
+
+
+def format_summary(summary):
+    u"""Return the summary as one line of microseconds per import."""
+    line = (u"median {0:.2f}us [{1:.2f}-{2:.2f}] mean {3:.2f}us "
+            u"[{4:.2f}-{5:.2f}] p95 {6:.2f}us p99 {7:.2f}us, "
+            u"{8:,.0f} imports/s").format(
+        summary[u'median'] * 1e6, summary[u'median_ci'][0] * 1e6,
+        summary[u'median_ci'][1] * 1e6, summary[u'mean'] * 1e6,
+        summary[u'mean_ci'][0] * 1e6, summary[u'mean_ci'][1] * 1e6,
+        summary[u'p95'] * 1e6, summary[u'p99'] * 1e6,
+        1 / summary[u'median'] if summary[u'median'] else float(u'inf'))
+    if any(summary.get(u'filesystem', {}).values()):
+        line += u", per import: " + u" ".join(
+            u"{:.1f} {}".format(summary[u'filesystem'][call], call)
+            for call in (u'stat', u'listdir', u'open', u'read', u'mkdir')
+            if call in summary[u'filesystem'])
+    if summary[u'noisy']:
+        line += u" (NOISY)"
+    return line
+
 
 def from_cache(seconds, repeat):
     u"""sys.modules"""
@@ -78,6 +248,14 @@ def source_wo_bytecode(seconds, repeat):
         sys.dont_write_bytecode = False
 
 
+def _unlink(path):
+    u"""Remove a file from the in-memory file system in use, or from disk."""
+    if _memory is not None:
+        _memory.unlink(path)
+    else:
+        os.unlink(path)
+
+
 def decimal_wo_bytecode(seconds, repeat):
     u"""Source w/o bytecode: decimal"""
     name = u'decimal'
@@ -100,7 +278,7 @@ def source_writing_bytecode(seconds, repeat):
     with source_util.create_modules(name) as mapping:
         def cleanup():
             sys.modules.pop(name)
-            os.unlink(imp.cache_from_source(mapping[name]))
+            _unlink(imp.cache_from_source(mapping[name]))
         for result in bench(name, cleanup, repeat=repeat, seconds=seconds):
             assert not os.path.exists(imp.cache_from_source(mapping[name]))
             yield result
@@ -112,7 +290,7 @@ def decimal_writing_bytecode(seconds, repeat):
     name = u'decimal'
     def cleanup():
         sys.modules.pop(name)
-        os.unlink(imp.cache_from_source(decimal.__file__))
+        _unlink(imp.cache_from_source(decimal.__file__))
     for result in bench(name, cleanup, repeat=repeat, seconds=seconds):
         yield result
 
@@ -137,28 +315,505 @@ def decimal_using_bytecode(seconds, repeat):
         yield result
 
 
-def main(import_):
+def _pop_all(*names):
+    u"""Return a cleanup function removing the named modules."""
+    def cleanup():
+        for name in names:
+            sys.modules.pop(name, None)
+    return cleanup
+
+
+def deep_package(seconds, repeat):
+    u"""Bytecode w/ source: package chain 10 deep"""
+    packages = [u'.'.join(u'__bench_pkg{}'.format(depth)
+                          for depth in xrange(count))
+                for count in xrange(1, 11)]
+    name = packages[-1] + u'.module'
+    modules = [package + u'.__init__' for package in packages] + [name]
+    with source_util.create_modules(*modules) as mapping:
+        for module in modules:
+            py_compile.compile(mapping[module])
+        for result in bench(name, _pop_all(name, *packages), repeat=repeat,
+                            seconds=seconds):
+            yield result
+
+
+def wide_directory(seconds, repeat):
+    u"""Bytecode w/ source: one of 5,000 modules in a directory"""
+    name = u'__importlib_full_test_benchmark__'
+    with source_util.create_modules(name) as mapping:
+        py_compile.compile(mapping[name])
+        for index in xrange(4999):
+            path = os.path.join(mapping[u'.root'],
+                                u'__bench_wide{:04d}.py'.format(index))
+            with open(path, u'w') as file:
+                file.write(u'attr = {}\n'.format(index))
+        for result in bench(name, lambda: sys.modules.pop(name), repeat=repeat,
+                            seconds=seconds):
+            yield result
+
+
+def long_sys_path(seconds, repeat):
+    u"""Bytecode w/ source: last of 100 sys.path entries"""
+    name = u'__importlib_full_test_benchmark__'
+    with source_util.create_modules(name) as mapping:
+        py_compile.compile(mapping[name])
+        path = []
+        for index in xrange(99):
+            directory = os.path.join(mapping[u'.root'],
+                                     u'entry{:02d}'.format(index))
+            os.mkdir(directory)
+            path.append(directory)
+        path.append(mapping[u'.root'])
+        with util.import_state(path=path):
+            for result in bench(name, lambda: sys.modules.pop(name),
+                                repeat=repeat, seconds=seconds):
+                yield result
+
+
+def relative_import(seconds, repeat):
+    u"""Bytecode w/ source: relative import from a package"""
+    package = u'__bench_pkg'
+    name = package + u'.module'
+    with source_util.create_modules(package + u'.__init__', name) as mapping:
+        py_compile.compile(mapping[package + u'.__init__'])
+        py_compile.compile(mapping[name])
+        # The package stays imported while benchmarking, but no longer.
+        with util.uncache(package, name):
+            __import__(package)
+            stmt = (u"__import__('module', {{'__package__': '{}'}}, {{}}, "
+                    u"[], 1)".format(package))
+            for result in bench(name, lambda: sys.modules.pop(name),
+                                stmt=stmt, repeat=repeat, seconds=seconds):
+                yield result
+
+
+def fromlist_import(seconds, repeat):
+    u"""Bytecode w/ source: from package import module"""
+    package = u'__bench_pkg'
+    name = package + u'.module'
+    with source_util.create_modules(package + u'.__init__', name) as mapping:
+        py_compile.compile(mapping[package + u'.__init__'])
+        py_compile.compile(mapping[name])
+        stmt = u"__import__('{}', {{}}, {{}}, ['module'])".format(package)
+        for result in bench(name, _pop_all(name, package), stmt=stmt,
+                            repeat=repeat, seconds=seconds):
+            yield result
+
+
+def star_import(seconds, repeat):
+    u"""Bytecode w/ source: from package import * (10 submodules)"""
+    package = u'__bench_pkg'
+    names = [u'{}.module{}'.format(package, index) for index in xrange(10)]
+    init = package + u'.__init__'
+    with source_util.create_modules(init, *names) as mapping:
+        with open(mapping[init], u'w') as file:
+            file.write(u'__all__ = {!r}\n'.format(
+                [str(name.rpartition(u'.')[2]) for name in names]))
+        for module in [init] + names:
+            py_compile.compile(mapping[module])
+        stmt = u"__import__('{}', {{}}, {{}}, ['*'])".format(package)
+        for result in bench(package, _pop_all(package, *names), stmt=stmt,
+                            repeat=repeat, seconds=seconds):
+            yield result
+
+
+def sourceless(seconds, repeat):
+    u"""Bytecode w/o source: simple"""
+    name = u'__importlib_full_test_benchmark__'
+    with source_util.create_modules(name) as mapping:
+        py_compile.compile(mapping[name], cfile=mapping[name] + u'c')
+        os.unlink(mapping[name])
+        for result in bench(name, lambda: sys.modules.pop(name), repeat=repeat,
+                            seconds=seconds):
+            yield result
+
+
+# Standard library modules which may be built as extension modules.
+_EXTENSION_CANDIDATES = (u'array', u'cmath', u'select', u'_bisect', u'_heapq',
+                         u'_struct', u'math')
+
+def extension_mod(seconds, repeat):
+    u"""Extension module"""
+    for name in _EXTENSION_CANDIDATES:
+        try:
+            file, path, description = imp.find_module(name)
+        except ImportError:
+            continue
+        if file is not None:
+            file.close()
+        if description[2] == imp.C_EXTENSION:
+            break
+    else:
+        # Everything is built in; nothing to measure.
+        return
+    with util.uncache(name):
+        for result in bench(name, lambda: sys.modules.pop(name),
+                            repeat=repeat, seconds=seconds):
+            yield result
+
+
+BENCHMARKS = (from_cache, builtin_mod,
+              source_using_bytecode, source_wo_bytecode,
+              source_writing_bytecode,
+              decimal_using_bytecode, decimal_writing_bytecode,
+              decimal_wo_bytecode,
+              deep_package, wide_directory, long_sys_path, relative_import,
+              fromlist_import, star_import, sourceless, extension_mod)
+
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def contend(threads, seconds, operation, cleanup=None):
+    u"""Run operation(index, iteration) in 'threads' threads for about
+    'seconds' and return a dict of the results.
+
+    Every operation is timed, minus the cost of reading the clock, while
+    cleanup(index, iteration) runs after it outside of the timing. The result
+    holds the total 'throughput' in operations per second, the 'latency'
+    percentiles of all operations and the worst per-thread p99 in seconds
+    and, when importlib_full.__import__ is in use, the seconds threads spent
+    waiting for the import lock ('lock_wait', also as a fraction of the
+    threads' time) and the number of times it was taken.
+
+    """
+    clock = timeit.default_timer
+    clock_overhead = _clock_overhead(clock)
+    start_event = threading.Event()
+    latencies = [[] for x in xrange(threads)]
+    errors = []
+
+    def worker(index):
+        own = latencies[index]
+        start_event.wait()
+        deadline = clock() + seconds
+        iteration = 0
+        try:
+            while True:
+                start = clock()
+                if start >= deadline:
+                    break
+                operation(index, iteration)
+                own.append(clock() - start - clock_overhead)
+                if cleanup is not None:
+                    cleanup(index, iteration)
+                iteration += 1
+        except Exception:
+            errors.append(sys.exc_info())
+
+    workers = [threading.Thread(target=worker, args=(index,))
+               for index in xrange(threads)]
+    for thread in workers:
+        thread.start()
+    tracked = __builtins__.__import__ is importlib_full.__import__
+    before = importlib_full.stats()
+    start = clock()
+    start_event.set()
+    for thread in workers:
+        thread.join()
+    elapsed = clock() - start
+    after = importlib_full.stats()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+    pooled = sorted(latency for own in latencies for latency in own)
+    result = {
+        u'threads': threads,
+        u'operations': len(pooled),
+        u'seconds': elapsed,
+        u'throughput': len(pooled) / elapsed,
+        u'latency': {u'p50': percentile(pooled, 50),
+                     u'p95': percentile(pooled, 95),
+                     u'p99': percentile(pooled, 99)},
+        u'worst_thread_p99': max(percentile(sorted(own), 99)
+                                 for own in latencies if own),
+        u'lock_wait': None,
+        u'lock_wait_fraction': None,
+        u'lock_acquires': None,
+    }
+    if tracked:
+        result[u'lock_wait'] = after[u'lock_wait'] - before[u'lock_wait']
+        result[u'lock_wait_fraction'] = (result[u'lock_wait'] /
+                                         (threads * elapsed))
+        result[u'lock_acquires'] = (after[u'lock_acquires'] -
+                                    before[u'lock_acquires'])
+    return result
+
+
+def cached_contention(thread_counts, seconds):
+    u"""Threads: cached imports"""
+    name = u'__importlib_full_test_benchmark__'
+    with source_util.create_modules(name) as mapping:
+        py_compile.compile(mapping[name])
+        __import__(name)
+        for threads in thread_counts:
+            yield contend(threads, seconds,
+                          lambda index, iteration: __import__(name))
+
+
+def mixed_contention(thread_counts, seconds):
+    u"""Threads: cached imports with 1 in 10 cold"""
+    shared = u'__importlib_full_test_benchmark__'
+    names = [u'__bench_cold{}'.format(index)
+             for index in xrange(max(thread_counts))]
+    with source_util.create_modules(shared, *names) as mapping:
+        for name in [shared] + names:
+            py_compile.compile(mapping[name])
+        __import__(shared)
+        def operation(index, iteration):
+            if iteration % 10:
+                __import__(shared)
+            else:
+                __import__(names[index])
+        def cleanup(index, iteration):
+            if not iteration % 10:
+                del sys.modules[names[index]]
+        for threads in thread_counts:
+            yield contend(threads, seconds, operation, cleanup)
+
+
+def relative_contention(thread_counts, seconds):
+    u"""Threads: cached relative imports"""
+    package = u'__bench_pkg'
+    name = package + u'.module'
+    with source_util.create_modules(package + u'.__init__', name) as mapping:
+        py_compile.compile(mapping[package + u'.__init__'])
+        py_compile.compile(mapping[name])
+        __import__(name)
+        globals_ = {'__package__': str(package)}
+        def operation(index, iteration):
+            __import__('module', globals_, {}, [], 1)
+        for threads in thread_counts:
+            yield contend(threads, seconds, operation)
+
+
+CONTENTION_BENCHMARKS = (cached_contention, mixed_contention,
+                         relative_contention)
+
+
+def format_contention(result):
+    u"""Return a contention result as one line."""
+    line = (u"{0[threads]:2d} threads: {0[throughput]:,.0f} imports/s, "
+            u"latency p50 {1:.2f}us p95 {2:.2f}us p99 {3:.2f}us "
+            u"(worst thread p99 {4:.2f}us)").format(
+        result, result[u'latency'][u'p50'] * 1e6,
+        result[u'latency'][u'p95'] * 1e6, result[u'latency'][u'p99'] * 1e6,
+        result[u'worst_thread_p99'] * 1e6)
+    if result[u'lock_wait'] is not None:
+        line += u", lock wait {0:.1f}ms ({1:.1%})".format(
+            result[u'lock_wait'] * 1e3, result[u'lock_wait_fraction'])
+    return line
+
+
+def run_contention(import_, benchmarks, thread_counts=THREAD_COUNTS,
+                   seconds=1):
+    u"""Run the contention benchmarks with 'import_' as __import__ for each
+    number of threads, about 'seconds' each; return a dict mapping each
+    benchmark's name to its list of results."""
+    original = __builtins__.__import__
     __builtins__.__import__ = import_
-    benchmarks = (from_cache, builtin_mod,
-                  source_using_bytecode, source_wo_bytecode,
-                  source_writing_bytecode,
-                  decimal_using_bytecode, decimal_writing_bytecode,
-                  decimal_wo_bytecode,)
-    seconds = 1
-    seconds_plural = u's' if seconds > 1 else u''
-    repeat = 3
-    header = u"Measuring imports/second over {} second{}, best out of {}\n"
-    print header.format(seconds, seconds_plural, repeat)
-    for benchmark in benchmarks:
-        print benchmark.__doc__, u"[",
-        sys.stdout.flush()
-        results = []
-        for result in benchmark(seconds=seconds, repeat=repeat):
-            results.append(result)
-            print result,
+    results = {}
+    try:
+        for benchmark in benchmarks:
+            print benchmark.__doc__ + u":"
             sys.stdout.flush()
-        assert not sys.dont_write_bytecode
-        print u"]", u"best is", format(max(results), u',d')
+            results[benchmark.__name__] = []
+            for result in benchmark(thread_counts, seconds):
+                results[benchmark.__name__].append(result)
+                print u"   ", format_contention(result)
+                sys.stdout.flush()
+    finally:
+        __builtins__.__import__ = original
+    return results
+
+
+def _sample_in_subprocess(label, benchmark, seconds, latency=0,
+                          memory=False):
+    u"""Take one sample of the benchmark in a fresh interpreter."""
+    flag = u'--builtin' if label == u'builtin' else u'--importlib'
+    command = [sys.executable, u'-m', u'importlib_full.test.benchmark', flag,
+               u'--sample', benchmark.__name__, u'--seconds', repr(seconds),
+               u'--latency', repr(latency * 1000)]
+    if memory:
+        command.append(u'--memory')
+    return json.loads(subprocess.check_output(command))
+
+
+@contextlib.contextmanager
+def _counted(latency):
+    u"""Yield the counts of the file system calls of importlib_full, delayed
+    by 'latency' seconds through util.slow_filesystem.
+
+    Without latency the calls are not wrapped, which would slow them down,
+    and the counts are taken from importlib_full.stats() instead when the
+    context exits; those have no 'read' or 'mkdir'.
+
+    """
+    if latency:
+        with util.slow_filesystem(latency) as counts:
+            yield counts
+        return
+    before = importlib_full.stats()
+    counts = {}
+    try:
+        yield counts
+    finally:
+        after = importlib_full.stats()
+        for call in (u'stat', u'listdir', u'open'):
+            counts[call] = after[call] - before[call]
+
+
+@contextlib.contextmanager
+def _filesystem(import_, latency=0, memory=False):
+    u"""Delay every file system call of importlib_full by 'latency' seconds,
+    on a new in-memory file system if 'memory' is true, yielding the counts
+    of the calls; for other implementations nothing is done and None is
+    yielded."""
+    global _memory
+    if import_ is not importlib_full.__import__:
+        yield None
+    elif memory:
+        with util.memory_filesystem() as _memory:
+            try:
+                with _counted(latency) as counts:
+                    yield counts
+            finally:
+                _memory = None
+    else:
+        with _counted(latency) as counts:
+            yield counts
+
+
+def run(label, import_, benchmarks, seconds=3, repeat=30,
+        noise_threshold=NOISE_THRESHOLD, fresh=False, latency=0,
+        memory=False):
+    u"""Run the benchmarks with 'import_' as __import__ and return a dict
+    mapping each benchmark's name to its summary.
+
+    With 'fresh' every sample is taken in a new interpreter. For
+    importlib_full.__import__, every file system call is delayed by 'latency'
+    seconds (see util.slow_filesystem), each benchmark is run on a new
+    util.MemoryFilesystem if 'memory' is true, and the calls made per import
+    are added to the summary as 'filesystem'.
+
+    """
+    global _executions
+    original = __builtins__.__import__
+    __builtins__.__import__ = import_
+    results = {}
+    try:
+        for benchmark in benchmarks:
+            print benchmark.__doc__ + u":",
+            sys.stdout.flush()
+            _executions = 0
+            if fresh:
+                samples = []
+                for x in xrange(repeat):
+                    sample = _sample_in_subprocess(label, benchmark,
+                                                   float(seconds) / repeat,
+                                                   latency, memory)
+                    if sample is None:
+                        break
+                    samples.append(sample)
+                counts = None
+            else:
+                with _filesystem(import_, latency, memory) as counts:
+                    samples = list(benchmark(seconds=seconds, repeat=repeat))
+            assert not sys.dont_write_bytecode
+            if samples:
+                summary = summarize(samples, noise_threshold)
+                if counts is not None and _executions:
+                    summary[u'filesystem'] = dict(
+                        (call, float(count) / _executions)
+                        for call, count in counts.items())
+                results[benchmark.__name__] = summary
+                print format_summary(summary)
+            else:
+                print u"skipped"
+    finally:
+        __builtins__.__import__ = original
+    return results
+
+
+def compare(results, baseline):
+    u"""Print the median of every benchmark next to the baseline's, noting
+    whether their confidence intervals overlap."""
+    print u"\nComparison with the baseline (median microseconds per import)\n"
+    for implementation, benchmarks in sorted(results.items()):
+        for benchmark in BENCHMARKS:
+            name = benchmark.__name__
+            new = benchmarks.get(name)
+            old = baseline.get(implementation, {}).get(name)
+            if not new or not old:
+                continue
+            if (new[u'median_ci'][0] > old[u'median_ci'][1] or
+                    new[u'median_ci'][1] < old[u'median_ci'][0]):
+                verdict = u'significant'
+            else:
+                verdict = u'within noise'
+            print u"{} [{}]: {:.2f} vs {:.2f} ({:+.1%}, {})".format(
+                benchmark.__doc__, implementation, new[u'median'] * 1e6,
+                old[u'median'] * 1e6,
+                (new[u'median'] - old[u'median']) / old[u'median'], verdict)
+
+
+def main(implementations, benchmarks=BENCHMARKS, seconds=3, repeat=30,
+         write=None, baseline=None, noise_threshold=NOISE_THRESHOLD,
+         fresh=False, thread_counts=THREAD_COUNTS, latencies=(0,),
+         memory=False):
+    u"""Run the benchmarks under each (label, __import__) implementation,
+    optionally writing the results to 'write' as JSON and comparing them to
+    the JSON results in the 'baseline' file.
+
+    Contention benchmarks among 'benchmarks' run for each of the
+    'thread_counts', for 'seconds' divided by the number of counts each.
+    importlib_full.__import__ runs once per file system latency in
+    'latencies' (in seconds), labelled with the latency unless it is 0, and
+    if 'memory' is true once more per latency on an in-memory file system,
+    labelled '@memory'; neither applies to the built-in __import__.
+
+    """
+    sampled = [benchmark for benchmark in benchmarks
+               if benchmark not in CONTENTION_BENCHMARKS]
+    contended = [benchmark for benchmark in benchmarks
+                 if benchmark in CONTENTION_BENCHMARKS]
+    if sampled:
+        header = (u"Taking {} samples over about {} seconds per benchmark{}; "
+                  u"confidence intervals are 95%\n")
+        print header.format(repeat, seconds,
+                            u", each in a fresh interpreter" if fresh else u"")
+    results = {}
+    for label, import_ in implementations:
+        if import_ is importlib_full.__import__:
+            runs = [(latency, in_memory)
+                    for in_memory in ((False, True) if memory else (False,))
+                    for latency in latencies]
+        else:
+            runs = [(0, False)]
+            if any(latencies) or memory:
+                print u"(the file system cannot be replaced for {})"\
+                      .format(label)
+        for latency, in_memory in runs:
+            run_label = label
+            if in_memory:
+                run_label += u'@memory'
+            if latency:
+                run_label += u'@{:g}ms'.format(latency * 1000)
+            print u"Using {}:".format(run_label)
+            results[run_label] = run(label, import_, sampled, seconds,
+                                     repeat, noise_threshold, fresh, latency,
+                                     in_memory)
+            with _filesystem(import_, latency, in_memory):
+                results[run_label].update(run_contention(
+                    import_, contended, thread_counts,
+                    float(seconds) / len(thread_counts)))
+            print
+    if write:
+        with open(write, u'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if baseline:
+        with open(baseline) as file:
+            compare(results, json.load(file))
 
 
 if __name__ == u'__main__':
@@ -166,12 +821,80 @@ if __name__ == u'__main__':
 
     parser = optparse.OptionParser()
     parser.add_option(u'-b', u'--builtin', dest=u'builtin', action=u'store_true',
-                        default=False, help=u"use the built-in __import__")
+                        default=False, help=u"use only the built-in __import__")
+    parser.add_option(u'-i', u'--importlib', dest=u'importlib',
+                      action=u'store_true', default=False,
+                      help=u"use only importlib_full.__import__")
+    parser.add_option(u'--benchmark', dest=u'benchmarks', action=u'append',
+                      metavar=u'NAME', help=u"run only the named benchmark "
+                                            u"(may be repeated)")
+    parser.add_option(u'-w', u'--write', dest=u'write', metavar=u'FILE',
+                      help=u"write the results to FILE as JSON")
+    parser.add_option(u'-r', u'--read', dest=u'baseline', metavar=u'FILE',
+                      help=u"compare against the JSON results in FILE")
+    parser.add_option(u'-n', u'--samples', dest=u'repeat', type=u'int',
+                      default=30, help=u"samples per benchmark (default 30)")
+    parser.add_option(u'-s', u'--seconds', dest=u'seconds', type=u'float',
+                      default=3, help=u"seconds of sampling per benchmark "
+                                      u"(default 3)")
+    parser.add_option(u'--fresh', dest=u'fresh', action=u'store_true',
+                      default=False,
+                      help=u"take every sample in a fresh interpreter")
+    parser.add_option(u'--noise-threshold', dest=u'noise_threshold',
+                      type=u'float', default=NOISE_THRESHOLD,
+                      help=u"flag results whose confidence intervals exceed "
+                           u"this fraction of the median (default "
+                           u"{})".format(NOISE_THRESHOLD))
+    parser.add_option(u'--contention', dest=u'contention',
+                      action=u'store_true', default=False,
+                      help=u"also run the multi-threaded benchmarks")
+    parser.add_option(u'--threads', dest=u'threads',
+                      default=u','.join(str(count)
+                                        for count in THREAD_COUNTS),
+                      help=u"comma separated thread counts for the "
+                           u"multi-threaded benchmarks (default "
+                           u"%default)")
+    parser.add_option(u'--latency', dest=u'latencies', default=u'0',
+                      help=u"comma separated file system latencies in "
+                           u"milliseconds to inject into importlib_full "
+                           u"(e.g. 0,0.1,1; default %default)")
+    parser.add_option(u'--memory', dest=u'memory', action=u'store_true',
+                      default=False,
+                      help=u"also run importlib_full on an in-memory file "
+                           u"system")
+    # Used by --fresh: print one sample of the named benchmark as JSON.
+    parser.add_option(u'--sample', dest=u'sample', help=optparse.SUPPRESS_HELP)
     options, args = parser.parse_args()
     if args:
         raise RuntimeError(u"unrecognized args: {}".format(args))
-    import_ = __import__
+    implementations = []
+    if not options.importlib:
+        implementations.append((u'builtin', __import__))
     if not options.builtin:
-        import_ = importlib_full.__import__
+        implementations.append((u'importlib_full', importlib_full.__import__))
+    benchmarks = BENCHMARKS
+    if options.contention:
+        benchmarks += CONTENTION_BENCHMARKS
+    by_name = dict((benchmark.__name__, benchmark)
+                   for benchmark in BENCHMARKS + CONTENTION_BENCHMARKS)
+    if options.benchmarks:
+        try:
+            benchmarks = [by_name[name] for name in options.benchmarks]
+        except KeyError, exc:
+            parser.error(u"unknown benchmark {}".format(exc.args[0]))
 
-    main(import_)
+    latencies = [float(latency) / 1000
+                 for latency in options.latencies.split(u',')]
+    if options.sample:
+        __builtins__.__import__ = implementations[-1][1]
+        with _filesystem(implementations[-1][1], latencies[0],
+                         options.memory):
+            samples = list(by_name[options.sample](seconds=options.seconds,
+                                                   repeat=1))
+        print json.dumps(samples[0] if samples else None)
+    else:
+        main(implementations, benchmarks, options.seconds, options.repeat,
+             options.write, options.baseline, options.noise_threshold,
+             options.fresh,
+             [int(count) for count in options.threads.split(u',')],
+             latencies, options.memory)
@@ -0,0 +1,297 @@
+u"""Benchmark the cold start of a synthetic large application.
+
+A tree of packages and modules is generated with source_util.create_modules,
+thousands of modules whose number, size and imports are configurable, and
+its root package, which imports everything else, is
+imported by fresh interpreters under these conditions:
+
+    no-pyc          no bytecode exists and none is written
+    valid-pyc       bytecode written by a previous run is used
+    readonly-pyc    no bytecode exists and the directories are not writable,
+                    so writing it fails (not enforceable when run as root)
+
+each with the built-in __import__ and importlib_full.__import__. For every
+configuration the median wall time is reported along with the file system
+calls made: the counters of importlib_full.stats() for importlib_full and,
+with --strace, the system calls counted by strace for both. A configuration
+whose child interpreter fails is reported with the error and the others
+still run.
+
+Run with ``python -m importlib_full.test.coldstart``.
+
+"""
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+from importlib_full.budget import percentile
+import json
+import os
+import random
+import subprocess
+import sys
+
+
+APP_NAME = u'__bench_app'
+
+CONDITIONS = (u'no-pyc', u'valid-pyc', u'readonly-pyc')
+
+# Executed by each child interpreter with the implementation and the name of
+# the package to import; prints the measurement as JSON.
+_CHILD = u"""\
+import sys, time
+import importlib_full
+implementation, name = sys.argv[1:]
+if implementation == 'importlib_full':
+    __builtins__.__import__ = importlib_full.__import__
+before = set(sys.modules)
+importlib_full.reset_stats()
+start = time.time()
+__import__(name)
+elapsed = time.time() - start
+counters = importlib_full.stats()
+modules = [module for module in set(sys.modules) - before
+           if sys.modules[module] is not None]
+import json
+sys.stdout.write(json.dumps({
+    'time': elapsed,
+    'modules': len(modules),
+    'counters': dict((key, counters[key])
+                     for key in ('stat', 'listdir', 'open', 'bytes_read'))
+                if implementation == 'importlib_full' else None}))
+"""
+
+
+def _module_source(index, size, imports):
+    u"""Return the source of a module with 'size' functions which imports
+    the modules named in 'imports'."""
+    lines = [u'import {}'.format(name) for name in imports]
+    lines.append(u'VALUE = {}'.format(index))
+    for function in xrange(size):
+        lines.extend([
+            u'',
+            u'def function{}(argument, *rest):'.format(function),
+            u'    u"""Return a value derived from the argument."""',
+            u'    total = argument',
+            u'    for item in rest:',
+            u'        total += item * {}'.format(function),
+            u'    return {{"value": total, "name": {!r}}}'.format(
+                u'function{}'.format(function)),
+        ])
+    return u'\n'.join(lines) + u'\n'
+
+
+def application_sources(depth=3, width=10, size=20, fanout=3, seed=0):
+    u"""Return the sources of the application package APP_NAME for
+    source_util.create_modules(), keyed by module name.
+
+    Every package holds 'width' modules and, above 'depth' levels, 'width'
+    subpackages, and imports all of them. Every module has 'size' functions
+    and imports 'fanout' modules chosen at random (deterministically from
+    'seed') among those generated after it, so there are no cycles.
+
+    """
+    chooser = random.Random(seed)
+    sources = {}
+    modules = []
+    def generate(package, level):
+        children = []
+        for index in xrange(width):
+            children.append(u'{}.module{}'.format(package, index))
+            modules.append(children[-1])
+        if level < depth:
+            for index in xrange(width):
+                children.append(u'{}.package{}'.format(package, index))
+                generate(children[-1], level + 1)
+        sources[package + u'.__init__'] = u''.join(
+            u'import {}\n'.format(child) for child in children)
+    generate(APP_NAME, 1)
+    for position, name in enumerate(modules):
+        later = modules[position + 1:]
+        imports = chooser.sample(later, min(fanout, len(later)))
+        sources[name] = _module_source(position, size, imports)
+    return sources
+
+
+def _remove_bytecode(root):
+    u"""Delete every bytecode file and __pycache__ directory under root."""
+    for path, directories, files in os.walk(root, topdown=False):
+        for name in files:
+            if name.endswith((u'.pyc', u'.pyo')):
+                os.unlink(os.path.join(path, name))
+        if os.path.basename(path) == u'__pycache__':
+            os.rmdir(path)
+
+
+def _has_bytecode(root):
+    u"""Return True if there is a bytecode file under root."""
+    for path, directories, files in os.walk(root):
+        if any(name.endswith((u'.pyc', u'.pyo')) for name in files):
+            return True
+    return False
+
+
+def _set_writable(root, writable):
+    u"""Make every directory under root writable or read-only."""
+    mode = 0755 if writable else 0555
+    for path in [path for path, directories, files in os.walk(root)]:
+        os.chmod(path, mode)
+
+
+def _run_child(implementation, directory, strace=None):
+    u"""Import the application in a new interpreter; return the dict the
+    child reported, with the strace counts under 'syscalls'. Raises
+    RuntimeError with the last line the child wrote to stderr if it fails."""
+    command = [sys.executable, u'-c', _CHILD, implementation, APP_NAME]
+    with util.straced(command, strace) as (command, syscalls):
+        process = subprocess.Popen(command,
+                                   env=util.child_environment(directory),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        output, error = process.communicate()
+    if process.returncode != 0:
+        lines = error.decode(u'utf-8', u'replace').strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else
+                           u"exit status {}".format(process.returncode))
+    result = json.loads(output)
+    result[u'syscalls'] = syscalls
+    return result
+
+
+def measure(directory, implementation, condition, runs=5, strace=None):
+    u"""Import the application 'runs' times under 'condition' and return a
+    summary of the median time and the counts of the median run, or with the
+    'error' a child interpreter failed with."""
+    try:
+        return _measure(directory, implementation, condition, runs, strace)
+    except RuntimeError, exc:
+        return {u'implementation': implementation, u'condition': condition,
+                u'runs': runs, u'error': unicode(exc)}
+    finally:
+        _set_writable(os.path.join(directory, APP_NAME), True)
+
+
+def _measure(directory, implementation, condition, runs, strace):
+    root = os.path.join(directory, APP_NAME)
+    results = []
+    enforced = True
+    for x in xrange(runs):
+        _set_writable(root, True)
+        if condition == u'valid-pyc':
+            if not x:
+                # Bytecode as this implementation writes it.
+                _remove_bytecode(root)
+                _run_child(implementation, directory)
+        else:
+            _remove_bytecode(root)
+            if condition == u'readonly-pyc':
+                _set_writable(root, False)
+        env_write = os.environ.pop(u'PYTHONDONTWRITEBYTECODE', None)
+        if condition == u'no-pyc':
+            os.environ[u'PYTHONDONTWRITEBYTECODE'] = u'1'
+        try:
+            results.append(_run_child(implementation, directory, strace))
+        finally:
+            os.environ.pop(u'PYTHONDONTWRITEBYTECODE', None)
+            if env_write is not None:
+                os.environ[u'PYTHONDONTWRITEBYTECODE'] = env_write
+        if condition == u'readonly-pyc' and _has_bytecode(root):
+            enforced = False
+    results.sort(key=lambda result: result[u'time'])
+    median = results[(len(results) - 1) // 2]
+    return {u'implementation': implementation, u'condition': condition,
+            u'runs': runs, u'enforced': enforced,
+            u'median': median[u'time'],
+            u'p95': percentile([result[u'time'] for result in results], 95),
+            u'modules': median[u'modules'],
+            u'counters': median[u'counters'],
+            u'syscalls': median[u'syscalls']}
+
+
+def format_result(result):
+    u"""Return a result as one line."""
+    if u'error' in result:
+        return u"{0[implementation]:>14} {0[condition]:>12}: failed, " \
+               u"{0[error]}".format(result)
+    line = u"{0[implementation]:>14} {0[condition]:>12}: median {1:.1f}ms, "\
+           u"p95 {2:.1f}ms, {0[modules]} modules".format(
+               result, result[u'median'] * 1e3, result[u'p95'] * 1e3)
+    if result[u'counters']:
+        line += (u", {0[stat]} stat {0[listdir]} listdir {0[open]} open "
+                 u"{0[bytes_read]:,d} bytes read".format(result[u'counters']))
+    if result[u'syscalls']:
+        line += u", {:,d} syscalls".format(sum(result[u'syscalls'].values()))
+        for name in (u'stat', u'lstat', u'fstat', u'newfstatat', u'open',
+                     u'openat', u'read', u'getdents', u'getdents64',
+                     u'write'):
+            if name in result[u'syscalls']:
+                line += u" {} {}".format(result[u'syscalls'][name], name)
+    if not result[u'enforced']:
+        line += u" (bytecode was written; running as root?)"
+    return line
+
+
+def main(args=None):
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option(u'--depth', type=u'int', default=3,
+                      help=u"levels of packages (default %default)")
+    parser.add_option(u'--width', type=u'int', default=10,
+                      help=u"modules and subpackages per package "
+                           u"(default %default)")
+    parser.add_option(u'--size', type=u'int', default=20,
+                      help=u"functions per module (default %default)")
+    parser.add_option(u'--fanout', type=u'int', default=3,
+                      help=u"imports per module (default %default)")
+    parser.add_option(u'--seed', type=u'int', default=0)
+    parser.add_option(u'-n', u'--runs', type=u'int', default=5,
+                      help=u"interpreters per configuration "
+                           u"(default %default)")
+    parser.add_option(u'--condition', dest=u'conditions', action=u'append',
+                      choices=CONDITIONS,
+                      help=u"run only this condition (may be repeated)")
+    parser.add_option(u'-b', u'--builtin', action=u'store_true',
+                      default=False, help=u"use only the built-in __import__")
+    parser.add_option(u'-i', u'--importlib', action=u'store_true',
+                      default=False,
+                      help=u"use only importlib_full.__import__")
+    parser.add_option(u'--strace', action=u'store_true', default=False,
+                      help=u"count system calls with strace")
+    parser.add_option(u'-w', u'--write', metavar=u'FILE',
+                      help=u"write the results to FILE as JSON")
+    options, args = parser.parse_args(args)
+    if args:
+        parser.error(u"unrecognized args: {}".format(args))
+    implementations = util.select_implementations(options.builtin,
+                                                  options.importlib)
+    strace = None
+    if options.strace:
+        strace = util.find_strace()
+        if strace is None:
+            parser.error(u"strace was not found")
+    sources = application_sources(options.depth, options.width,
+                                  options.size, options.fanout, options.seed)
+    count = len(sources)
+    with source_util.create_modules(*sources, sources=sources) as mapping:
+        directory = mapping[u'.root']
+        print u"Importing a synthetic application of {:,d} modules".format(
+            count)
+        print
+        results = []
+        for condition in options.conditions or CONDITIONS:
+            for implementation in implementations:
+                result = measure(directory, implementation, condition,
+                                 options.runs, strace)
+                result[u'application'] = {
+                    u'modules': count, u'depth': options.depth,
+                    u'width': options.width, u'size': options.size,
+                    u'fanout': options.fanout, u'seed': options.seed}
+                results.append(result)
+                print format_result(result)
+                sys.stdout.flush()
+    if options.write:
+        with open(options.write, u'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == u'__main__':
+    main()
@@ -133,6 +133,17 @@ class RelativeImports(unittest.TestCase):
             self.assertTrue(hasattr(module, u'subpkg2'))
             self.assertEqual(module.subpkg2.attr, u'pkg.subpkg2.__init__')
 
+    def test_module_without_fromlist(self):
+        # __import__('mod2', globals, {}, [], 1) from within pkg returns
+        # pkg.mod2, the first name relative to the package.
+        create = [u'pkg.__init__', u'pkg.mod1', u'pkg.mod2']
+        globals_ = {u'__package__': u'pkg'}, {u'__name__': u'pkg.mod1'}
+        def callback(global_):
+            import_util.import_(u'pkg')  # For __import__().
+            module = import_util.import_(u'mod2', global_, {}, [], 1)
+            self.assertEqual(module.__name__, u'pkg.mod2')
+        self.relative_import_test(create, globals_, callback)
+
     def test_deep_import(self):
         # [deep import]
         create = [u'pkg.__init__']
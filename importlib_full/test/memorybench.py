@@ -0,0 +1,275 @@
+u"""Benchmark the memory used by importing.
+
+Each scenario runs in a fresh interpreter which imports either 1,000, 5,000
+or 10,000 small modules or one very large module, with the built-in
+__import__ and with importlib_full.__import__. Bytecode is written by a
+previous run of the same implementation first.
+
+Reported for every configuration:
+
+    rss             growth of the resident set size over the imports, and
+                    the growth of its peak
+    traced          with tracemalloc, the bytes still allocated after the
+                    imports, the peak, and the part of the former allocated
+                    by importlib_full's machinery itself
+    finders         the entries added to sys.path_importer_cache and the
+                    bytes held by those finder objects
+    loaders         the distinct loaders attached as __loader__ and the bytes
+                    they hold
+    bytes_read      for importlib_full, the bytes returned by get_data(),
+                    which are sliced and unmarshalled or compiled and then
+                    dropped
+
+tracemalloc is only used where it exists (it does not on Python 2).
+
+Run with ``python -m importlib_full.test.memorybench``.
+
+"""
+from __future__ import with_statement
+from . import util
+from importlib_full import _memory
+import __builtin__
+import importlib_full
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+PACKAGE = u'__bench_mem'
+
+LARGE_MODULE = u'__bench_mem_large'
+
+# Small modules are spread over packages of this many modules.
+PACKAGE_SIZE = 500
+
+SCENARIOS = ((u'small-1k', 1000), (u'small-5k', 5000), (u'small-10k', 10000),
+             (u'large', None))
+
+
+def _small_names(count):
+    u"""Return the names of the 'count' small modules."""
+    return [u'{}.p{}.m{}'.format(PACKAGE, index // PACKAGE_SIZE, index)
+            for index in xrange(count)]
+
+
+def build_small(directory, count):
+    u"""Generate 'count' small modules under the package PACKAGE."""
+    root = os.path.join(directory, PACKAGE)
+    os.mkdir(root)
+    with open(os.path.join(root, u'__init__.py'), u'w') as file:
+        pass
+    for index, name in enumerate(_small_names(count)):
+        package = os.path.join(root, name.split(u'.')[1])
+        if not index % PACKAGE_SIZE:
+            os.mkdir(package)
+            with open(os.path.join(package, u'__init__.py'), u'w') as file:
+                pass
+        path = os.path.join(package, name.rpartition(u'.')[2] + u'.py')
+        with open(path, u'w') as file:
+            file.write(u'VALUE = {}\n\ndef get():\n    return VALUE\n'
+                       .format(index))
+
+
+def build_large(directory, functions=20000):
+    u"""Generate one module LARGE_MODULE of 'functions' functions and a large
+    constant table."""
+    path = os.path.join(directory, LARGE_MODULE + u'.py')
+    with open(path, u'w') as file:
+        file.write(u'TABLE = (\n')
+        for index in xrange(functions):
+            file.write(u'    ({0}, "entry {0}", {0}.5),\n'.format(index))
+        file.write(u')\n')
+        for index in xrange(functions):
+            file.write(u'\ndef function{0}(value):\n'
+                       u'    return TABLE[{0}][0] + value\n'.format(index))
+
+
+def _deep_size(obj, seen):
+    u"""Return the bytes of obj and of the strings, containers and instance
+    dicts reachable from it, skipping modules, types and what is in 'seen'.
+    """
+    if id(obj) in seen or isinstance(obj, (type(sys), type)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_size(key, seen) + _deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_size(item, seen)
+    elif hasattr(obj, u'__dict__'):
+        size += _deep_size(vars(obj), seen)
+    return size
+
+
+def _peak_rss():
+    u"""Return the peak resident set size in bytes, or None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes except on OS X.
+    return peak if sys.platform == u'darwin' else peak * 1024
+
+
+def _child(implementation, scenario):
+    u"""Import the scenario's modules and print the measurements as JSON.
+
+    Runs in the child interpreter.
+
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    count = dict(SCENARIOS)[scenario]
+    names = _small_names(count) if count else [LARGE_MODULE]
+    try:
+        measure_rss = _memory._resident_memory()
+    except ImportError:
+        measure_rss = None
+    if implementation == u'importlib_full':
+        __builtin__.__import__ = importlib_full.__import__
+    before_modules = set(sys.modules)
+    before_finders = set(sys.path_importer_cache)
+    gc.collect()
+    rss = measure_rss and measure_rss()
+    peak_rss = _peak_rss()
+    importlib_full.reset_stats()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    for name in names:
+        __import__(name)
+    gc.collect()
+    new_modules = [name for name in set(sys.modules) - before_modules
+                   if sys.modules[name] is not None]
+    result = {u'modules': len(new_modules)}
+    if tracemalloc is not None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        machinery = snapshot.filter_traces([tracemalloc.Filter(
+            True, os.path.join(os.path.dirname(importlib_full.__file__),
+                               u'*'))])
+        result[u'traced'] = {u'retained': current, u'peak': peak,
+                             u'machinery': sum(stat.size for stat in
+                                               machinery.statistics(u'filename'))}
+    else:
+        result[u'traced'] = None
+    after_rss = measure_rss and measure_rss()
+    after_peak = _peak_rss()
+    result[u'rss'] = {
+        u'retained': None if rss is None else after_rss - rss,
+        u'peak': None if peak_rss is None else after_peak - peak_rss}
+    seen = set()
+    finders = [sys.path_importer_cache[entry]
+               for entry in set(sys.path_importer_cache) - before_finders]
+    result[u'finders'] = {u'count': len(finders),
+                          u'bytes': sum(_deep_size(finder, seen)
+                                        for finder in finders)}
+    loaders = {}
+    for name in new_modules:
+        loader = getattr(sys.modules[name], u'__loader__', None)
+        if loader is not None:
+            loaders[id(loader)] = loader
+    result[u'loaders'] = {u'count': len(loaders),
+                          u'bytes': sum(_deep_size(loader, seen)
+                                        for loader in loaders.values())}
+    result[u'bytes_read'] = (importlib_full.stats()[u'bytes_read']
+                             if implementation == u'importlib_full' else None)
+    sys.stdout.write(json.dumps(result))
+
+
+def _run_child(implementation, scenario, directory):
+    u"""Run _child() in a new interpreter; return what it reported."""
+    env = util.child_environment(directory)
+    env.pop(u'PYTHONDONTWRITEBYTECODE', None)
+    code = (u'from importlib_full.test import memorybench\n'
+            u'memorybench._child({!r}, {!r})\n'.format(
+                str(implementation), str(scenario)))
+    output = subprocess.check_output([sys.executable, u'-c', code], env=env)
+    return json.loads(output)
+
+
+def measure(implementation, scenario):
+    u"""Build the scenario's modules and measure importing them."""
+    directory = tempfile.mkdtemp()
+    try:
+        count = dict(SCENARIOS)[scenario]
+        if count:
+            build_small(directory, count)
+        else:
+            build_large(directory)
+        # Bytecode as this implementation writes it.
+        _run_child(implementation, scenario, directory)
+        result = _run_child(implementation, scenario, directory)
+    finally:
+        shutil.rmtree(directory)
+    result[u'implementation'] = implementation
+    result[u'scenario'] = scenario
+    return result
+
+
+def _kb(value):
+    u"""Format a number of bytes, or None, in kilobytes."""
+    return u'-' if value is None else u'{:,d}KB'.format(value // 1024)
+
+
+def format_result(result):
+    u"""Return a result as one line."""
+    line = (u"{0[scenario]:>9} {0[implementation]:>14}: {0[modules]:,d} "
+            u"modules, rss +{1} (peak +{2})").format(
+        result, _kb(result[u'rss'][u'retained']),
+        _kb(result[u'rss'][u'peak']))
+    if result[u'traced']:
+        line += u", traced {} (peak {}, machinery {})".format(
+            _kb(result[u'traced'][u'retained']),
+            _kb(result[u'traced'][u'peak']),
+            _kb(result[u'traced'][u'machinery']))
+    line += u", {0[count]} finders {1}, {2[count]} loaders {3}".format(
+        result[u'finders'], _kb(result[u'finders'][u'bytes']),
+        result[u'loaders'], _kb(result[u'loaders'][u'bytes']))
+    if result[u'bytes_read'] is not None:
+        line += u", {} read".format(_kb(result[u'bytes_read']))
+    return line
+
+
+def main(args=None):
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option(u'--scenario', dest=u'scenarios', action=u'append',
+                      choices=[name for name, count in SCENARIOS],
+                      help=u"run only this scenario (may be repeated)")
+    parser.add_option(u'-b', u'--builtin', action=u'store_true',
+                      default=False, help=u"use only the built-in __import__")
+    parser.add_option(u'-i', u'--importlib', action=u'store_true',
+                      default=False,
+                      help=u"use only importlib_full.__import__")
+    parser.add_option(u'-w', u'--write', metavar=u'FILE',
+                      help=u"write the results to FILE as JSON")
+    options, args = parser.parse_args(args)
+    if args:
+        parser.error(u"unrecognized args: {}".format(args))
+    implementations = util.select_implementations(options.builtin,
+                                                  options.importlib)
+    results = []
+    for scenario in (options.scenarios or
+                     [name for name, count in SCENARIOS]):
+        for implementation in implementations:
+            result = measure(implementation, scenario)
+            results.append(result)
+            print format_result(result)
+            sys.stdout.flush()
+    if options.write:
+        with open(options.write, u'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == u'__main__':
+    main()
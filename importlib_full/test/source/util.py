@@ -42,10 +42,13 @@ def ensure_bytecode_path(bytecode_path):
 
 
 @contextlib.contextmanager
-def create_modules(*names):
+def create_modules(*names, **_3to2kwargs):
+    if 'sources' in _3to2kwargs: sources = _3to2kwargs['sources']; del _3to2kwargs['sources']
+    else: sources = None
     u"""Temporarily create each named module with an attribute (named 'attr')
     that contains the name passed into the context manager that caused the
-    creation of the module.
+    creation of the module. 'sources' may map some of the names to the source
+    to write for them instead.
 
     All files are created in a temporary directory returned by
     tempfile.mkdtemp(). This directory is inserted at the beginning of
@@ -83,7 +86,10 @@ def create_modules(*names):
                     created_paths.append(file_path)
             file_path = os.path.join(file_path, name_parts[-1] + u'.py')
             with open(file_path, u'w') as file:
-                file.write(source.format(name))
+                if sources is not None and name in sources:
+                    file.write(sources[name])
+                else:
+                    file.write(source.format(name))
             created_paths.append(file_path)
             mapping[name] = file_path
         uncache_manager = util.uncache(*import_names)
@@ -0,0 +1,375 @@
+u"""Benchmark importing every module of the standard library.
+
+The modules are found by walking the standard library directories on sys.path
+(site-packages excepted) without importing anything, then each is imported by
+a fresh interpreter, or by one interpreter per --batch of modules, with the
+built-in __import__ and with importlib_full.__import__. Recorded per module
+and implementation:
+
+    time            wall time of the import; the median over --runs
+    counters        for importlib_full, the stat, listdir and open calls and
+                    bytes read counted by importlib_full.stats()
+    syscalls        with --strace, the system calls counted by strace, less
+                    those of an interpreter importing nothing
+    error           the exception the import raised, or why the interpreter
+                    died, if it failed
+
+In a batch, modules already imported by earlier ones are not imported again,
+so only the first import of a shared dependency pays for it. Modules already
+imported by the interpreter before the measurement starts (those importlib_full
+itself needs) are marked as preloaded and left out of the comparison.
+
+The slowest modules are printed with the aggregate overhead of
+importlib_full.__import__: its total import time over that of the built-in
+__import__ for the modules both imported successfully.
+
+Run with ``python -m importlib_full.test.stdlibbench``.
+
+"""
+from __future__ import with_statement
+from . import util
+from importlib_full.budget import percentile
+import ast
+import imp
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+
+
+# Modules never imported: they open a web browser or print on import.
+EXCLUDE = (u'antigravity', u'this', u'__phello__')
+
+# Packages holding test suites, skipped unless --tests is given.
+TEST_PACKAGES = (u'test', u'tests', u'idle_test')
+
+_IDENTIFIER = re.compile(ur'[A-Za-z_][A-Za-z0-9_]*$')
+
+# Executed by each child interpreter with the implementation and the names of
+# the modules to import; prints one dict per module as a Python literal, so
+# that no module besides those importlib_full needs is imported up front.
+# Whatever the imported modules print goes to stderr instead.
+_CHILD = u"""\
+import os, sys, time
+out = os.fdopen(os.dup(1), 'w')
+os.dup2(2, 1)
+import importlib_full
+implementation, names = sys.argv[1], sys.argv[2:]
+if implementation == 'importlib_full':
+    __builtins__.__import__ = importlib_full.__import__
+for name in names:
+    preloaded = name in sys.modules
+    error = None
+    importlib_full.reset_stats()
+    start = time.time()
+    try:
+        __import__(name)
+    except BaseException, exc:
+        error = '%s: %s' % (type(exc).__name__, exc)
+    elapsed = time.time() - start
+    counters = importlib_full.stats()
+    out.write(repr({
+        'name': name, 'time': elapsed, 'error': error,
+        'preloaded': preloaded,
+        'counters': dict((key, counters[key])
+                         for key in ('stat', 'listdir', 'open', 'bytes_read'))
+                    if implementation == 'importlib_full' else None}) + '\\n')
+    out.flush()
+"""
+
+
+def stdlib_modules(tests=False, exclude=EXCLUDE):
+    u"""Return the sorted names of the modules and packages found in the
+    standard library directories on sys.path.
+
+    Nothing is imported. Packages named in TEST_PACKAGES and their contents
+    are left out unless 'tests' is true, as are the modules in 'exclude' and
+    their submodules.
+
+    """
+    library = os.path.dirname(os.path.abspath(os.__file__))
+    roots = [library]
+    for entry in sys.path:
+        entry = os.path.abspath(entry or os.curdir)
+        if (entry.startswith(library + os.sep) and os.path.isdir(entry) and
+                u'site-packages' not in entry and entry not in roots):
+            roots.append(entry)
+    suffixes = [suffix for suffix, mode, kind in imp.get_suffixes()]
+    names = set()
+    def walk(directory, prefix):
+        for entry in sorted(os.listdir(directory)):
+            path = os.path.join(directory, entry)
+            if os.path.isdir(path):
+                if (_IDENTIFIER.match(entry) and
+                        os.path.exists(os.path.join(path, u'__init__.py'))):
+                    names.add(prefix + entry)
+                    walk(path, prefix + entry + u'.')
+                continue
+            for suffix in suffixes:
+                base = entry[:-len(suffix)]
+                if (entry.endswith(suffix) and base != u'__init__' and
+                        _IDENTIFIER.match(base)):
+                    names.add(prefix + base)
+    for root in roots:
+        walk(root, u'')
+    def wanted(name):
+        parts = name.split(u'.')
+        if not tests and any(part in TEST_PACKAGES for part in parts):
+            return False
+        return not any(u'.'.join(parts[:index]) in exclude
+                       for index in xrange(1, len(parts) + 1))
+    return sorted(name for name in names if wanted(name))
+
+
+def _run_child(implementation, names, timeout=None, strace=None):
+    u"""Import 'names' in a new interpreter.
+
+    Returns the list of dicts the child reported (those it finished, should
+    it die), its exit status or None if it was killed after 'timeout'
+    seconds, and the strace counts.
+
+    """
+    command = [sys.executable, u'-c', _CHILD, implementation] + list(names)
+    with util.straced(command, strace) as (command, syscalls):
+        with open(os.devnull, u'w') as devnull:
+            process = subprocess.Popen(command,
+                                       env=util.child_environment(),
+                                       stdout=subprocess.PIPE, stderr=devnull)
+            killed = []
+            def kill():
+                killed.append(True)
+                process.kill()
+            timer = None
+            if timeout:
+                timer = threading.Timer(timeout, kill)
+                timer.start()
+            try:
+                output = process.communicate()[0]
+            finally:
+                if timer is not None:
+                    timer.cancel()
+    results = []
+    for line in output.splitlines():
+        try:
+            results.append(ast.literal_eval(line))
+        except (SyntaxError, ValueError):
+            # A line cut short by the interpreter dying.
+            break
+    return results, None if killed else process.returncode, syscalls
+
+
+def _run_batch(implementation, names, timeout=None, strace=None,
+               startup=None):
+    u"""Import 'names' in as few interpreters as possible and return a dict
+    mapping each name to its result.
+
+    When an interpreter dies or times out, the module it was importing is
+    recorded as failed and the rest of the batch is imported by a new one.
+    The 'startup' strace counts are subtracted from those of the child.
+
+    """
+    results = {}
+    pending = list(names)
+    while pending:
+        reported, status, syscalls = _run_child(implementation, pending,
+                                                timeout, strace)
+        for result in reported:
+            result[u'syscalls'] = None
+            results[result[u'name']] = result
+        if syscalls is not None and len(reported) == len(pending) == 1:
+            reported[0][u'syscalls'] = dict(
+                (call, max(count - (startup or {}).get(call, 0), 0))
+                for call, count in syscalls.items())
+        pending = [name for name in pending if name not in results]
+        if pending:
+            name = pending.pop(0)
+            error = (u'interpreter timed out' if status is None else
+                     u'interpreter exited with status {}'.format(status))
+            results[name] = {u'name': name, u'time': None, u'error': error,
+                             u'preloaded': False, u'counters': None,
+                             u'syscalls': None}
+    return results
+
+
+def measure(implementation, names, runs=1, batch=1, timeout=60, strace=None,
+            progress=None):
+    u"""Import every module in 'names' with 'implementation' and return a
+    dict mapping each name to its result, the time being the median over
+    'runs'.
+
+    Each interpreter imports up to 'batch' modules. System calls are only
+    counted with 'strace' when 'batch' is 1. 'progress' is called with the
+    number of modules done after every batch.
+
+    """
+    startup = None
+    if strace:
+        startup = _run_child(implementation, [], timeout, strace)[2]
+    batches = [names[index:index + batch]
+               for index in xrange(0, len(names), batch)]
+    all_runs = []
+    for x in xrange(runs):
+        results = {}
+        for index, chunk in enumerate(batches):
+            results.update(_run_batch(implementation, chunk, timeout, strace,
+                                      startup))
+            if progress is not None:
+                progress(min((index + 1) * batch, len(names)))
+        all_runs.append(results)
+    combined = all_runs[0]
+    for name, result in combined.items():
+        times = [results[name][u'time'] for results in all_runs
+                 if results[name][u'time'] is not None]
+        result[u'time'] = percentile(times, 50) if times else None
+    return combined
+
+
+def _succeeded(result):
+    return (result is not None and result[u'error'] is None and
+            not result[u'preloaded'])
+
+
+def summarize(results, limit=50):
+    u"""Summarize {implementation: {name: result}} from measure().
+
+    Returns a dict with the 'slowest' modules, as [name, {implementation:
+    seconds}] pairs ordered by the time of importlib_full (or of the only
+    implementation measured), and the 'failures' of each implementation.
+    With both implementations, the 'overhead' ratio of their total times
+    over the 'compared' modules imported successfully by both is added.
+
+    """
+    key = (u'importlib_full' if u'importlib_full' in results
+           else list(results)[0])
+    names = sorted(set().union(*[set(by_name) for by_name in
+                                 results.values()]))
+    rows = []
+    for name in names:
+        if _succeeded(results[key].get(name)):
+            rows.append([name, dict(
+                (implementation, by_name[name][u'time'])
+                for implementation, by_name in results.items()
+                if _succeeded(by_name.get(name)))])
+    rows.sort(key=lambda row: (-row[1][key], row[0]))
+    summary = {u'modules': len(names), u'slowest': rows[:limit],
+               u'failures': dict((implementation,
+                                  sorted(name for name, result
+                                         in by_name.items()
+                                         if result[u'error'] is not None))
+                                 for implementation, by_name
+                                 in results.items())}
+    if len(results) == 2:
+        both = [row[1] for row in rows if len(row[1]) == 2]
+        builtin = sum(times[u'builtin'] for times in both)
+        summary[u'compared'] = len(both)
+        summary[u'overhead'] = (sum(times[u'importlib_full']
+                                    for times in both) / builtin
+                                if builtin else None)
+    return summary
+
+
+def _ms(seconds):
+    return u'-' if seconds is None else u'{:.2f}ms'.format(seconds * 1e3)
+
+
+def format_summary(summary, results):
+    u"""Return the summary as text."""
+    implementations = [implementation
+                       for implementation in util.IMPLEMENTATIONS
+                       if implementation in results]
+    lines = [u"{} modules; slowest {}:".format(summary[u'modules'],
+                                               len(summary[u'slowest']))]
+    lines.append(u"{:>40} ".format(u'') + u' '.join(
+        u'{:>14}'.format(implementation)
+        for implementation in implementations))
+    for name, times in summary[u'slowest']:
+        line = u"{:>40} ".format(name) + u' '.join(
+            u'{:>14}'.format(_ms(times.get(implementation)))
+            for implementation in implementations)
+        result = results.get(u'importlib_full', {}).get(name)
+        if result and result[u'counters']:
+            line += (u"  {0[stat]} stat {0[listdir]} listdir {0[open]} "
+                     u"open".format(result[u'counters']))
+        lines.append(line)
+    for implementation in implementations:
+        failures = summary[u'failures'][implementation]
+        lines.append(u"{} failed with {}".format(len(failures),
+                                                 implementation))
+    if len(implementations) == 2:
+        only = sorted(set(summary[u'failures'][u'importlib_full']) -
+                      set(summary[u'failures'][u'builtin']))
+        for name in only:
+            lines.append(u"  only with importlib_full: {}: {}".format(
+                name, results[u'importlib_full'][name][u'error']))
+        if summary[u'overhead'] is not None:
+            lines.append(u"importlib_full overhead over {} modules: "
+                         u"{:.2f}x".format(summary[u'compared'],
+                                           summary[u'overhead']))
+    return u'\n'.join(lines)
+
+
+def main(args=None):
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option(u'-n', u'--runs', type=u'int', default=1,
+                      help=u"imports of every module per implementation "
+                           u"(default %default)")
+    parser.add_option(u'--batch', type=u'int', default=1,
+                      help=u"modules imported per interpreter "
+                           u"(default %default)")
+    parser.add_option(u'--timeout', type=u'float', default=60,
+                      help=u"seconds before an interpreter is killed "
+                           u"(default %default)")
+    parser.add_option(u'--limit', type=u'int', default=50,
+                      help=u"slowest modules to print (default %default)")
+    parser.add_option(u'--module', dest=u'modules', action=u'append',
+                      help=u"import only this module (may be repeated)")
+    parser.add_option(u'--tests', action=u'store_true', default=False,
+                      help=u"include the test packages")
+    parser.add_option(u'-b', u'--builtin', action=u'store_true',
+                      default=False, help=u"use only the built-in __import__")
+    parser.add_option(u'-i', u'--importlib', action=u'store_true',
+                      default=False,
+                      help=u"use only importlib_full.__import__")
+    parser.add_option(u'--strace', action=u'store_true', default=False,
+                      help=u"count system calls with strace (--batch 1 "
+                           u"only)")
+    parser.add_option(u'-w', u'--write', metavar=u'FILE',
+                      help=u"write the results to FILE as JSON")
+    options, args = parser.parse_args(args)
+    if args:
+        parser.error(u"unrecognized args: {}".format(args))
+    if options.runs < 1 or options.batch < 1:
+        parser.error(u"--runs and --batch must be positive")
+    if options.strace and options.batch != 1:
+        parser.error(u"--strace requires --batch 1")
+    implementations = util.select_implementations(options.builtin,
+                                                  options.importlib)
+    strace = None
+    if options.strace:
+        strace = util.find_strace()
+        if strace is None:
+            parser.error(u"strace was not found")
+    names = options.modules or stdlib_modules(options.tests)
+    results = {}
+    for implementation in implementations:
+        def progress(done):
+            sys.stderr.write(u"\r{}: {}/{}".format(implementation, done,
+                                                   len(names)))
+            sys.stderr.flush()
+        results[implementation] = measure(implementation, names,
+                                          options.runs, options.batch,
+                                          options.timeout, strace, progress)
+        sys.stderr.write(u"\n")
+    summary = summarize(results, options.limit)
+    print format_summary(summary, results)
+    if options.write:
+        with open(options.write, u'w') as file:
+            json.dump({u'summary': summary, u'results': results}, file,
+                      indent=2, sort_keys=True)
+
+
+if __name__ == u'__main__':
+    main()
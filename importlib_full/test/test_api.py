@@ -1,8 +1,14 @@
 from __future__ import with_statement
 from . import util
+from importlib_full import _async
 import imp
 import importlib_full
+import os
+import py_compile
+import shutil
+import subprocess
 import sys
+import tempfile
 import unittest
 
 
@@ -68,9 +74,216 @@ class ImportModuleTests(unittest.TestCase):
             importlib_full.import_module(u'.support')
 
 
+class ImportModuleAsyncTests(unittest.TestCase):
+
+    u"""Test importlib_full.import_module_async."""
+
+    def test_module_import(self):
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[mock]):
+                pending = importlib_full.import_module_async(u'top_level')
+                self.assertIsInstance(pending, _async.PendingImport)
+                self.assertTrue(pending.wait(5))
+                self.assertNotIn(u'top_level', sys.modules)
+                module = pending.result()
+                self.assertIs(module, sys.modules[u'top_level'])
+
+    def test_coalesced(self):
+        # Concurrent requests for the same module share one load.
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[mock]):
+                first = importlib_full.import_module_async(u'top_level')
+                second = importlib_full.import_module_async(u'top_level')
+                self.assertIs(first, second)
+                self.assertIs(first.result(), second.result())
+
+    def test_relative_import(self):
+        with util.mock_modules(u'pkg.__init__', u'pkg.mod') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'pkg')
+                pending = importlib_full.import_module_async(u'.mod', u'pkg')
+                self.assertEqual(pending.name, u'pkg.mod')
+                self.assertEqual(pending.result().__name__, u'pkg.mod')
+
+    def test_done_callback(self):
+        called = []
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[mock]):
+                pending = importlib_full.import_module_async(u'top_level')
+                pending.wait(5)
+                pending.add_done_callback(called.append)
+                self.assertEqual(called, [pending])
+                pending.result()
+
+    def test_failure(self):
+        # Errors while finding are raised by result().
+        with util.import_state(meta_path=[]):
+            pending = importlib_full.import_module_async(u'<not a module>')
+            self.assertRaises(ImportError, pending.result)
+
+    def test_prefetched_code(self):
+        # Code objects are read in the worker and executed by result().
+        name = u'_importlib_full_async_test'
+        temp_dir = tempfile.mkdtemp()
+        try:
+            source_path = os.path.join(temp_dir, name + u'.py')
+            with open(source_path, u'w') as file:
+                file.write(u'attr = 42\n')
+            py_compile.compile(source_path)
+            os.unlink(source_path)
+            with util.uncache(name):
+                with util.import_state(path=[temp_dir]):
+                    pending = importlib_full.import_module_async(name)
+                    pending.wait(5)
+                    self.assertIsNotNone(pending._code_object)
+                    self.assertEqual(pending.result().attr, 42)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class StatsTests(unittest.TestCase):
+
+    u"""Test importlib_full.stats and importlib_full.reset_stats."""
+
+    def test_reset(self):
+        importlib_full.reset_stats()
+        stats = importlib_full.stats()
+        self.assertEqual(set(stats.values()), set([0]))
+
+    def test_snapshot(self):
+        importlib_full.reset_stats()
+        stats = importlib_full.stats()
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'top_level')
+        self.assertEqual(stats[u'lock_acquires'], 0)
+        self.assertEqual(importlib_full.stats()[u'lock_acquires'], 1)
+
+    def test_file_counters(self):
+        name = u'_importlib_full_stats_test'
+        temp_dir = tempfile.mkdtemp()
+        try:
+            source_path = os.path.join(temp_dir, name + u'.py')
+            with open(source_path, u'w') as file:
+                file.write(u'attr = 42\n')
+            py_compile.compile(source_path)
+            os.unlink(source_path)
+            with util.uncache(name):
+                with util.import_state(path=[temp_dir]):
+                    importlib_full.reset_stats()
+                    importlib_full.import_module(name)
+                    stats = importlib_full.stats()
+            self.assertEqual(stats[u'open'], 1)
+            self.assertEqual(stats[u'bytes_read'],
+                             os.path.getsize(source_path + u'c'))
+            self.assertGreater(stats[u'stat'], 0)
+            self.assertEqual(stats[u'lock_acquires'], 1)
+            self.assertGreater(stats[u'lock_held'], 0)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class ImportHookTests(unittest.TestCase):
+
+    u"""Test importlib_full.add_import_hook."""
+
+    def setUp(self):
+        self.events = []
+        importlib_full.add_import_hook(self.hook)
+
+    def tearDown(self):
+        importlib_full.remove_import_hook(self.hook)
+
+    def hook(self, event, name, info):
+        self.assertIn(u'time', info)
+        self.events.append((event, name, info))
+
+    def test_events(self):
+        miss = util.mock_modules()
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[miss, mock]):
+                module = importlib_full.import_module(u'top_level')
+        self.assertEqual([event for event, name, info in self.events],
+                         [u'import_start', u'finder_miss', u'finder_hit',
+                          u'loader_chosen', u'exec_finished',
+                          u'import_finished'])
+        self.assertEqual(set(name for event, name, info in self.events),
+                         set([u'top_level']))
+        info = dict((event, info) for event, name, info in self.events)
+        self.assertIs(info[u'finder_miss'][u'finder'], miss)
+        self.assertIs(info[u'finder_hit'][u'loader'], mock)
+        self.assertIs(info[u'import_finished'][u'module'], module)
+        self.assertIsNone(info[u'import_finished'][u'error'])
+        self.assertGreaterEqual(info[u'exec_finished'][u'duration'], 0)
+
+    def test_failure(self):
+        with util.import_state(meta_path=[]):
+            self.assertRaises(ImportError, importlib_full.import_module,
+                              u'<no such module>')
+        event, name, info = self.events[-1]
+        self.assertEqual(event, u'import_finished')
+        self.assertIsInstance(info[u'error'], ImportError)
+
+    def test_cached(self):
+        # Modules already in sys.modules are not imported again.
+        importlib_full.import_module(u'sys')
+        self.assertEqual(self.events, [])
+
+    def test_bytecode_used(self):
+        name = u'_importlib_full_hook_test'
+        temp_dir = tempfile.mkdtemp()
+        try:
+            source_path = os.path.join(temp_dir, name + u'.py')
+            with open(source_path, u'w') as file:
+                file.write(u'attr = 42\n')
+            py_compile.compile(source_path)
+            os.unlink(source_path)
+            with util.uncache(name):
+                with util.import_state(path=[temp_dir]):
+                    importlib_full.import_module(name)
+        finally:
+            shutil.rmtree(temp_dir)
+        info = dict((event, info) for event, name, info in self.events)
+        self.assertEqual(info[u'bytecode_used'][u'path'], source_path + u'c')
+
+    def test_remove(self):
+        importlib_full.remove_import_hook(self.hook)
+        try:
+            with util.mock_modules(u'top_level') as mock:
+                with util.import_state(meta_path=[mock]):
+                    importlib_full.import_module(u'top_level')
+            self.assertEqual(self.events, [])
+        finally:
+            importlib_full.add_import_hook(self.hook)
+
+
+class PackageImportTests(unittest.TestCase):
+
+    u"""Test what importing importlib_full itself imports."""
+
+    def test_features_imported_when_used(self):
+        # Only _bootstrap is imported with the package; each feature's module
+        # is imported by the first call into it.
+        package_parent = os.path.dirname(os.path.dirname(
+            os.path.abspath(importlib_full.__file__)))
+        env = dict(os.environ, PYTHONPATH=package_parent)
+        output = subprocess.check_output(
+            [sys.executable, u'-c',
+             u'import sys, importlib_full\n'
+             u'importlib_full.start_profiling()\n'
+             u'print(" ".join(sorted(name for name in sys.modules\n'
+             u'    if name.startswith("importlib_full.")\n'
+             u'    and sys.modules[name] is not None)))\n'],
+            env=env)
+        self.assertEqual(output.split(),
+                         [u'importlib_full._bootstrap',
+                          u'importlib_full._profile'])
+
+
 def test_main():
     from test.test_support import run_unittest
-    run_unittest(ImportModuleTests)
+    run_unittest(ImportModuleTests, ImportModuleAsyncTests, StatsTests,
+                 ImportHookTests, PackageImportTests)
 
 
 if __name__ == u'__main__':
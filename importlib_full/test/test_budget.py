@@ -0,0 +1,93 @@
+from __future__ import with_statement
+from .source import util as source_util
+from importlib_full import budget
+from test import test_support
+import os
+import py_compile
+import unittest
+
+
+class BudgetTests(unittest.TestCase):
+
+    u"""Test importlib_full.budget."""
+
+    def measure(self, runs=3):
+        u"""Measure importing a bytecode-only module which imports
+        another."""
+        names = u'_budget_outer', u'_budget_inner'
+        with source_util.create_modules(*names) as mapping:
+            with open(mapping[names[0]], u'w') as file:
+                file.write(u'import _budget_inner\n')
+            for name in names:
+                py_compile.compile(mapping[name])
+                os.unlink(mapping[name])
+            with test_support.EnvironmentVarGuard() as env:
+                env[u'PYTHONPATH'] = mapping[u'.root']
+                return budget.measure(names[0], runs=runs)
+
+    def test_measure(self):
+        summary = self.measure()
+        self.assertEqual(summary[u'name'], u'_budget_outer')
+        self.assertEqual(summary[u'runs'], 3)
+        self.assertEqual(summary[u'modules'], 2)
+        self.assertLessEqual(summary[u'median'], summary[u'p95'])
+        self.assertEqual(sorted(name for name, seconds in summary[u'top']),
+                         [u'_budget_inner', u'_budget_outer'])
+
+    def test_source_package(self):
+        # Modules imported from source are measured, as are standard library
+        # modules, which importlib_full has not imported beforehand.
+        names = u'_budget_pkg.__init__', u'_budget_pkg.sub'
+        sources = {names[0]: u'import json\nimport _budget_pkg.sub\n'}
+        with source_util.create_modules(*names, sources=sources) as mapping:
+            with test_support.EnvironmentVarGuard() as env:
+                env[u'PYTHONPATH'] = mapping[u'.root']
+                summary = budget.measure(u'_budget_pkg', runs=1, top=100)
+        measured = set(name for name, seconds in summary[u'top'])
+        self.assertLessEqual(set([u'_budget_pkg', u'_budget_pkg.sub', u'json']),
+                             measured)
+        self.assertEqual(summary[u'modules'], len(measured))
+
+    def test_failure(self):
+        self.assertRaises(RuntimeError, budget.measure, u'<no such module>',
+                          runs=1)
+        self.assertRaises(ValueError, budget.measure, u'sys', runs=0)
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(budget.percentile(values, 50), 50)
+        self.assertEqual(budget.percentile(values, 95), 95)
+        self.assertEqual(budget.percentile([3.0], 95), 3.0)
+        self.assertEqual(budget.percentile([2, 1], 50), 1)
+
+    def test_check(self):
+        summary = {u'median': 0.01, u'p95': 0.02, u'modules': 10}
+        self.assertEqual(budget.check(summary), [])
+        self.assertEqual(budget.check(summary, max_time=0.01, max_p95=0.03,
+                                      max_modules=10), [])
+        self.assertEqual(len(budget.check(summary, max_time=0.005,
+                                          max_p95=0.01, max_modules=9)), 3)
+
+    def test_cli(self):
+        names = u'_budget_cli',
+        with source_util.create_modules(*names) as mapping:
+            py_compile.compile(mapping[names[0]])
+            os.unlink(mapping[names[0]])
+            with test_support.EnvironmentVarGuard() as env:
+                env[u'PYTHONPATH'] = mapping[u'.root']
+                with test_support.captured_stdout() as output:
+                    self.assertEqual(budget.main([u'-n', u'1', names[0]]), 0)
+                self.assertIn(u'modules 1', output.getvalue())
+                with test_support.captured_stdout() as output:
+                    status = budget.main([u'-n', u'1', u'--max-modules', u'0',
+                                          names[0]])
+                self.assertEqual(status, 1)
+                self.assertIn(u'BUDGET EXCEEDED', output.getvalue())
+
+
+def test_main():
+    test_support.run_unittest(BudgetTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -0,0 +1,161 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+from importlib_full import _bootstrap, _bundle, abc, bundle, machinery
+import importlib_full
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+import unittest
+
+
+class BundleTests(unittest.TestCase):
+
+    u"""Test importlib_full.bundle and importlib_full.machinery.BundleFinder."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.bundle = os.path.join(self.directory, u'app.bundle')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self):
+        u"""Bundle a module and a package with a submodule."""
+        names = (u'_bundle_mod', u'_bundle_pkg.__init__', u'_bundle_pkg.sub')
+        with source_util.create_modules(*names) as mapping:
+            with open(mapping[u'_bundle_pkg.sub'], u'a') as file:
+                file.write(u'\ndef fail():\n    raise ValueError\n')
+            count, failures = bundle.build(self.bundle, [mapping[u'.root']])
+            return mapping[u'_bundle_pkg.sub'], count, failures
+
+    def test_build(self):
+        sub_path, count, failures = self.build()
+        self.assertEqual((count, failures), (3, []))
+        loaded = _bundle._Bundle(self.bundle)
+        self.assertEqual(sorted(loaded.index),
+                         [u'_bundle_mod', u'_bundle_pkg', u'_bundle_pkg.sub'])
+        self.assertTrue(loaded.index[u'_bundle_pkg'][2])
+        self.assertFalse(loaded.index[u'_bundle_pkg.sub'][2])
+        self.assertEqual(loaded.index[u'_bundle_pkg.sub'][3], sub_path)
+
+    def test_import(self):
+        sub_path = self.build()[0]
+        names = u'_bundle_mod', u'_bundle_pkg', u'_bundle_pkg.sub'
+        with util.uncache(*names):
+            with util.import_state(path=[self.bundle]):
+                importlib_full.reset_stats()
+                module = importlib_full.import_module(u'_bundle_mod')
+                sub = importlib_full.import_module(u'_bundle_pkg.sub')
+                stats = importlib_full.stats()
+            self.assertEqual(module.attr, u'_bundle_mod')
+            self.assertEqual(sub.attr, u'_bundle_pkg.sub')
+            self.assertIsInstance(module.__loader__, machinery.BundleLoader)
+            self.assertEqual(sys.modules[u'_bundle_pkg'].__path__,
+                             [os.path.join(self.bundle, u'_bundle_pkg')])
+            self.assertEqual(sub.__file__,
+                             os.path.join(self.bundle, u'_bundle_pkg',
+                                          u'sub.py'))
+            # The bundle is opened once and nothing else is.
+            self.assertEqual(stats[u'open'], 1)
+            # Tracebacks show the source the code was compiled from.
+            try:
+                sub.fail()
+            except ValueError:
+                filename = traceback.extract_tb(sys.exc_info()[2])[-1][0]
+            self.assertEqual(filename, sub_path)
+
+    def test_source(self):
+        # Source is decoded as its coding cookie says, whether the module is
+        # imported from the bundle or from the source file itself.
+        name = u'_bundle_source'
+        source = b'# -*- coding: latin-1 -*-\nattr = u"caf\xe9"\r\n'
+        with source_util.create_modules(name) as mapping:
+            with open(mapping[name], u'wb') as file:
+                file.write(source)
+            bundle.build(self.bundle, [mapping[u'.root']])
+            expected = source.decode(u'latin-1').replace(u'\r\n', u'\n')
+            for path in self.bundle, mapping[u'.root']:
+                with util.uncache(name):
+                    with util.import_state(path=[path]):
+                        module = importlib_full.import_module(name)
+                    self.assertEqual(module.attr, u'caf\xe9')
+                    self.assertEqual(module.__loader__.get_source(name),
+                                     expected)
+
+    def test_loader(self):
+        self.build()
+        finder = machinery.BundleFinder(self.bundle)
+        self.assertIsNone(finder.find_module(u'missing'))
+        loader = finder.find_module(u'_bundle_pkg')
+        self.assertIsInstance(loader, abc.ExecutionLoader)
+        self.assertTrue(loader.is_package(u'_bundle_pkg'))
+        loader = machinery.BundleFinder(
+            os.path.join(self.bundle, u'_bundle_pkg')).find_module(
+                u'_bundle_pkg.sub')
+        self.assertFalse(loader.is_package(u'_bundle_pkg.sub'))
+        self.assertIsNotNone(loader.get_code(u'_bundle_pkg.sub'))
+        with self.assertRaises(ImportError):
+            machinery.BundleFinder(os.path.join(self.bundle, u'_bundle_mod'))
+
+    def test_corrupt_entry(self):
+        self.build()
+        loaded = _bundle._Bundle(self.bundle)
+        offset, size = loaded.index[u'_bundle_mod'][:2]
+        with open(self.bundle, u'r+b') as file:
+            file.seek(offset)
+            file.write(marshal.dumps(None).ljust(size, b'\0'))
+        loader = machinery.BundleFinder(self.bundle).find_module(
+            u'_bundle_mod')
+        with self.assertRaises(ImportError) as cm:
+            loader.get_code(u'_bundle_mod')
+        self.assertIn(self.bundle, str(cm.exception))
+
+    def test_not_a_bundle(self):
+        with open(self.bundle, u'wb') as file:
+            file.write(b'not a bundle')
+        with self.assertRaises(ImportError):
+            machinery.BundleFinder(self.bundle)
+
+    def test_other_python(self):
+        self.build()
+        with open(self.bundle, u'r+b') as file:
+            file.seek(12)
+            file.write(b'\0\0\0\0')
+        with self.assertRaises(ImportError):
+            _bundle._Bundle(self.bundle)
+
+    def test_implicit_path_hook(self):
+        self.build()
+        with util.import_state():
+            finder = _bootstrap._DefaultPathFinder._path_hooks(self.bundle)
+        self.assertIsInstance(finder, machinery.BundleFinder)
+
+    def test_command_line(self):
+        directory = os.path.join(self.directory, u'source')
+        os.mkdir(directory)
+        with open(os.path.join(directory, u'good.py'), u'w') as file:
+            file.write(u'attr = 1\n')
+        with open(os.path.join(directory, u'bad.py'), u'w') as file:
+            file.write(u'def\n')
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = open(os.devnull, u'w')
+        try:
+            status = bundle.main([u'-o', self.bundle, directory])
+        finally:
+            sys.stdout.close()
+            sys.stdout, sys.stderr = stdout, stderr
+        self.assertEqual(status, 1)
+        self.assertEqual(list(_bundle._Bundle(self.bundle).index), [u'good'])
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(BundleTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -0,0 +1,120 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+import importlib_full
+from importlib_full import _bootstrap
+import os
+import py_compile
+import sys
+import unittest
+
+
+class ExplainTests(unittest.TestCase):
+
+    u"""Test importlib_full.explain."""
+
+    def bytecode_modules(self, mapping, *names):
+        for name in names:
+            py_compile.compile(mapping[name])
+            os.unlink(mapping[name])
+
+    def test_in_sys_modules(self):
+        trace = importlib_full.explain(u'sys')
+        self.assertTrue(trace[u'in_sys_modules'])
+        self.assertEqual(trace[u'finders'], [])
+
+    def test_meta_path(self):
+        miss = util.mock_modules()
+        with util.mock_modules(u'top_level') as mock:
+            with util.import_state(meta_path=[miss, mock]):
+                trace = importlib_full.explain(u'top_level')
+        self.assertNotIn(u'top_level', sys.modules)
+        self.assertEqual([step[u'loader'] for step in trace[u'finders']],
+                         [None, repr(mock)])
+        self.assertEqual(trace[u'loader'], repr(mock))
+        self.assertIsNone(trace[u'bytecode'])
+        self.assertIsNone(trace[u'error'])
+
+    def test_not_found(self):
+        with util.import_state(meta_path=[], path=[]):
+            trace = importlib_full.explain(u'<no such module>')
+        self.assertIsNone(trace[u'loader'])
+        self.assertEqual(trace[u'error'], u'No module named <no such module>')
+
+    def test_path_entries(self):
+        name = u'_explain_test'
+        with source_util.create_modules(name) as mapping:
+            self.bytecode_modules(mapping, name)
+            root = mapping[u'.root']
+            missing = os.path.join(root, u'missing')
+            sys.path.insert(0, missing)
+            trace = importlib_full.explain(name)
+            self.assertNotIn(name, sys.modules)
+            self.assertEqual(sys.path_importer_cache, {})
+        path_finder = trace[u'finders'][-1]
+        self.assertEqual(path_finder[u'loader'], trace[u'loader'])
+        first, second = path_finder[u'entries']
+        self.assertEqual(first[u'entry'], missing)
+        self.assertIn(u'NullImporter', first[u'finder'])
+        self.assertIsNone(first[u'loader'])
+        self.assertEqual(first[u'calls'][0][u'result'], u'ENOENT')
+        self.assertEqual(second[u'entry'], root)
+        self.assertIn(u'_FileFinder', second[u'finder'])
+        probed = [call[u'path'] for call in second[u'calls']
+                  if call[u'call'] == u'stat']
+        self.assertIn(os.path.join(root, name + u'.pyc'), probed)
+        self.assertEqual(trace[u'bytecode'][u'status'], u'accepted')
+
+    def test_rejected_bytecode(self):
+        name = u'_explain_test'
+        with source_util.create_modules(name) as mapping:
+            self.bytecode_modules(mapping, name)
+            with open(mapping[name] + u'c', u'r+b') as file:
+                file.write(b'\0\0\0\0')
+            trace = importlib_full.explain(name)
+        self.assertEqual(trace[u'bytecode'][u'status'], u'rejected')
+        self.assertIn(u'magic', trace[u'bytecode'][u'reason'])
+
+    def test_source(self):
+        name = u'_explain_test'
+        with source_util.create_modules(name) as mapping:
+            source_path = mapping[name]
+            trace = importlib_full.explain(name)
+            self.assertIn(u'_SourceFileLoader', trace[u'loader'])
+            self.assertEqual(trace[u'bytecode'][u'status'], u'missing')
+            py_compile.compile(source_path)
+            trace = importlib_full.explain(name)
+            self.assertEqual(trace[u'bytecode'][u'status'], u'accepted')
+            self.assertIn(u'timestamp', trace[u'bytecode'][u'reason'])
+            mtime = os.stat(source_path).st_mtime + 2
+            os.utime(source_path, (mtime, mtime))
+            trace = importlib_full.explain(name)
+            self.assertEqual(trace[u'bytecode'][u'status'], u'rejected')
+            self.assertIn(u'stale', trace[u'bytecode'][u'reason'])
+            self.assertNotIn(name, sys.modules)
+            module = importlib_full.import_module(name)
+        self.assertEqual(module.attr, name)
+
+    def test_unimported_parent(self):
+        names = u'_explain_pkg.__init__', u'_explain_pkg.mod'
+        with source_util.create_modules(*names) as mapping:
+            self.bytecode_modules(mapping, *names)
+            trace = importlib_full.explain(u'_explain_pkg.mod')
+            self.assertNotIn(u'_explain_pkg', sys.modules)
+        self.assertEqual(trace[u'parent'][u'name'], u'_explain_pkg')
+        self.assertIn(u'_SourcelessFileLoader', trace[u'loader'])
+
+    def test_restores_os(self):
+        os_module = _bootstrap._os
+        with util.import_state(meta_path=[], path=[]):
+            importlib_full.explain(u'<no such module>')
+        self.assertIs(_bootstrap._os, os_module)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(ExplainTests)
+
+
+if __name__ == u'__main__':
+    test_main()
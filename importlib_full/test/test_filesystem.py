@@ -0,0 +1,53 @@
+from __future__ import with_statement
+from . import util
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class MemoryFilesystemTests(unittest.TestCase):
+
+    u"""Test importlib_full.test.util.MemoryFilesystem."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filesystem = util.MemoryFilesystem()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing_file(self):
+        # Like FileIO, opening a missing file raises IOError, not OSError.
+        path = os.path.join(self.directory, u'missing')
+        with self.assertRaises(IOError) as cm:
+            self.filesystem.open(path)
+        self.assertNotIsInstance(cm.exception, OSError)
+        self.assertEqual(cm.exception.errno, errno.ENOENT)
+        with self.assertRaises(OSError):
+            self.filesystem.stat(path)
+
+    def test_read_through(self):
+        path = os.path.join(self.directory, u'file')
+        with open(path, u'wb') as file:
+            file.write(b'data')
+        self.assertEqual(self.filesystem.open(path).read(), b'data')
+        os.unlink(path)
+        self.assertEqual(self.filesystem.open(path).read(), b'data')
+
+    def test_written_file(self):
+        path = os.path.join(self.directory, u'file')
+        self.filesystem.add_file(path, b'data')
+        self.assertEqual(self.filesystem.open(path).read(), b'data')
+        self.assertEqual(self.filesystem.stat(path).st_size, 4)
+        self.assertFalse(os.path.exists(path))
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(MemoryFilesystemTests)
+
+
+if __name__ == u'__main__':
+    test_main()
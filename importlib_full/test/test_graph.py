@@ -0,0 +1,126 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+from importlib_full import _graph
+import importlib_full
+import json
+import os
+import py_compile
+import tempfile
+import unittest
+
+
+class DependencyGraphTests(unittest.TestCase):
+
+    u"""Test importlib_full.start_dependency_graph."""
+
+    def capture(self):
+        u"""Capture importing a bytecode-only module which imports another,
+        then importing the second one again."""
+        names = u'_graph_outer', u'_graph_inner'
+        with source_util.create_modules(*names) as mapping:
+            with open(mapping[names[0]], u'w') as file:
+                file.write(u'__import__("importlib_full").import_module('
+                           u'"_graph_inner")\n')
+            for name in names:
+                py_compile.compile(mapping[name])
+                os.unlink(mapping[name])
+            graph = importlib_full.start_dependency_graph()
+            try:
+                importlib_full.import_module(names[0])
+                importlib_full.import_module(names[1])
+            finally:
+                importlib_full.stop_dependency_graph(graph)
+        self.assertIsInstance(graph, _graph.DependencyGraph)
+        return graph
+
+    def test_edges(self):
+        # Importing _graph_inner again outside of any import, from
+        # sys.modules, adds no edge.
+        graph = self.capture()
+        self.assertEqual(graph.dependencies(__name__),
+                         set([u'_graph_outer']))
+        self.assertEqual(graph.dependencies(u'_graph_outer'),
+                         set([u'_graph_inner']))
+        self.assertEqual(graph.importers(u'_graph_inner'),
+                         set([u'_graph_outer']))
+        self.assertEqual(graph.dependencies(__name__, transitive=True),
+                         set([u'_graph_outer', u'_graph_inner']))
+
+    def test_timing(self):
+        graph = self.capture()
+        outer = graph.timing(u'_graph_outer')
+        inner = graph.timing(u'_graph_inner')
+        self.assertGreaterEqual(outer[0], inner[0])
+        self.assertAlmostEqual(outer[1], outer[0] - inner[0])
+        self.assertIsNone(graph.timing(__name__))
+        self.assertAlmostEqual(graph.transitive_cost(u'_graph_outer'),
+                               outer[0])
+
+    def test_caller_looked_up_on_load(self):
+        calls = []
+        caller_name = _graph._caller_name
+        def counted():
+            calls.append(None)
+            return caller_name()
+        _graph._caller_name = counted
+        try:
+            self.capture()
+        finally:
+            _graph._caller_name = caller_name
+        self.assertEqual(len(calls), 1)
+
+    def test_parent_package(self):
+        names = u'_graph_pkg.__init__', u'_graph_pkg.mod'
+        with source_util.create_modules(*names):
+            graph = importlib_full.start_dependency_graph()
+            try:
+                importlib_full.import_module(u'_graph_pkg.mod')
+            finally:
+                importlib_full.stop_dependency_graph(graph)
+        self.assertEqual(graph.dependencies(__name__),
+                         set([u'_graph_pkg.mod']))
+        self.assertEqual(graph.dependencies(u'_graph_pkg.mod'), set())
+        self.assertEqual(graph.modules(), [u'_graph_pkg', u'_graph_pkg.mod',
+                                           __name__])
+        self.assertIsNotNone(graph.timing(u'_graph_pkg'))
+
+    def test_stopped(self):
+        graph = self.capture()
+        with util.mock_modules(u'a') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'a')
+        self.assertNotIn(u'a', graph.modules())
+
+    def test_json(self):
+        graph = self.capture()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, u'graph.json')
+            graph.write(path)
+            with open(path) as file:
+                data = json.load(file)
+            self.assertEqual(data, graph.to_dict())
+            self.assertIn([u'_graph_outer', u'_graph_inner'], data[u'edges'])
+            self.assertEqual([node[u'name'] for node in data[u'nodes']],
+                             graph.modules())
+            self.assertRaises(ValueError, graph.write, path, u'svg')
+        finally:
+            for name in os.listdir(directory):
+                os.unlink(os.path.join(directory, name))
+            os.rmdir(directory)
+
+    def test_dot(self):
+        dot = self.capture().to_dot()
+        self.assertTrue(dot.startswith(u'digraph imports {'))
+        self.assertIn(u'"_graph_outer" -> "_graph_inner";', dot)
+        self.assertIn(u'"%s" [label="%s"];' % (__name__, __name__), dot)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(DependencyGraphTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -0,0 +1,102 @@
+from __future__ import with_statement
+from . import util
+import importlib_full
+from importlib_full import _late
+import unittest
+import warnings
+
+
+class LateImportTests(unittest.TestCase):
+
+    u"""Test importlib_full.mark_startup_complete."""
+
+    def tearDown(self):
+        _late._reset()
+
+    def test_before_startup_complete(self):
+        with util.mock_modules(u'a') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'a')
+        self.assertEqual(importlib_full.late_imports(), [])
+
+    def test_recorded(self):
+        with util.mock_modules(u'pkg.__init__', u'pkg.mod') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'pkg')
+                importlib_full.mark_startup_complete()
+                # Cached imports are not late.
+                importlib_full.import_module(u'pkg')
+                importlib_full.import_module(u'pkg.mod')
+        record, = importlib_full.late_imports()
+        self.assertEqual(record[u'name'], u'pkg.mod')
+        self.assertIsNone(record[u'parent'])
+        self.assertIsNone(record[u'error'])
+        self.assertGreaterEqual(record[u'duration'], 0)
+        self.assertEqual(record[u'stack'][-1][0], __file__.rstrip(u'c'))
+        report = importlib_full.late_import_report()
+        self.assertTrue(report.startswith(u'pkg.mod: '))
+
+    def test_nested(self):
+        # Importing a submodule of a package not yet imported is two imports.
+        with util.mock_modules(u'pkg.__init__', u'pkg.mod') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.mark_startup_complete()
+                importlib_full.import_module(u'pkg.mod')
+        records = importlib_full.late_imports()
+        self.assertEqual([(record[u'name'], record[u'parent'])
+                          for record in records],
+                         [(u'pkg.mod', None), (u'pkg', u'pkg.mod')])
+        self.assertEqual(len(importlib_full.late_import_report().splitlines()),
+                         2)
+
+    def test_warn(self):
+        with util.mock_modules(u'a') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.mark_startup_complete(u'warn')
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter(u'always')
+                    importlib_full.import_module(u'a')
+        warning, = caught
+        self.assertIs(warning.category, importlib_full.LateImportWarning)
+
+    def test_raise(self):
+        with util.mock_modules(u'a') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.mark_startup_complete(u'raise')
+                self.assertRaises(importlib_full.LateImportError,
+                                  importlib_full.import_module, u'a')
+        record, = importlib_full.late_imports()
+        self.assertEqual(record[u'error'], u'LateImportError')
+
+    def test_raise_finishes_other_hooks(self):
+        # Hooks see the refused import finish with the error.
+        events = []
+        def hook(event, name, info):
+            if event in (u'import_start', u'import_finished'):
+                events.append((event, name, info.get(u'error')))
+        importlib_full.add_import_hook(hook)
+        try:
+            with util.mock_modules(u'a') as mock:
+                with util.import_state(meta_path=[mock]):
+                    importlib_full.mark_startup_complete(u'raise')
+                    self.assertRaises(importlib_full.LateImportError,
+                                      importlib_full.import_module, u'a')
+        finally:
+            importlib_full.remove_import_hook(hook)
+        (start, finished) = events
+        self.assertEqual(start, (u'import_start', u'a', None))
+        self.assertEqual(finished[:2], (u'import_finished', u'a'))
+        self.assertIsInstance(finished[2], importlib_full.LateImportError)
+
+    def test_bad_action(self):
+        self.assertRaises(ValueError, importlib_full.mark_startup_complete,
+                          u'ignore')
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(LateImportTests)
+
+
+if __name__ == u'__main__':
+    test_main()
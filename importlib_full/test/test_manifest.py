@@ -0,0 +1,109 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+import importlib_full
+from importlib_full import _bootstrap
+import json
+import os
+import py_compile
+import sys
+import tempfile
+import unittest
+
+
+class ManifestTests(unittest.TestCase):
+
+    u"""Test recording and replaying import manifests."""
+
+    name = u'_manifest_test'
+
+    def setUp(self):
+        fd, self.manifest = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.manifest)
+        _bootstrap._record_loader = None
+        _bootstrap._replay_loader = None
+
+    def bytecode_module(self, mapping):
+        py_compile.compile(mapping[self.name])
+        os.unlink(mapping[self.name])
+        return mapping[self.name] + u'c'
+
+    def record(self):
+        importlib_full.record_manifest(self.manifest)
+        importlib_full.import_module(self.name)
+        importlib_full.save_manifest()
+        del sys.modules[self.name]
+        with open(self.manifest) as file:
+            return json.load(file)
+
+    def test_record(self):
+        with source_util.create_modules(self.name) as mapping:
+            path = self.bytecode_module(mapping)
+            size = os.path.getsize(path)
+            manifest = self.record()
+        entries = manifest[u'modules']
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0][u'name'], self.name)
+        self.assertEqual(entries[0][u'loader'], u'_SourcelessFileLoader')
+        self.assertEqual(entries[0][u'path'], path)
+        self.assertEqual(entries[0][u'size'], size)
+
+    def test_not_recording(self):
+        self.assertRaises(RuntimeError, importlib_full.save_manifest)
+
+    def test_replay(self):
+        # Replayed modules are loaded without consulting the meta path.
+        with source_util.create_modules(self.name) as mapping:
+            self.bytecode_module(mapping)
+            self.record()
+            self.assertEqual(importlib_full.replay_manifest(self.manifest), 1)
+            with util.import_state(meta_path=[], path=[]):
+                sys.modules.pop(self.name, None)
+                module = importlib_full.import_module(self.name)
+            self.assertEqual(module.attr, self.name)
+            self.assertEqual(importlib_full.stop_replay(), (1, 0))
+
+    def test_source_round_trip(self):
+        with source_util.create_modules(self.name) as mapping:
+            manifest = self.record()
+            entry, = manifest[u'modules']
+            self.assertEqual(entry[u'loader'], u'_SourceFileLoader')
+            self.assertEqual(entry[u'path'], mapping[self.name])
+            self.assertEqual(importlib_full.replay_manifest(self.manifest), 1)
+            with util.import_state(meta_path=[], path=[]):
+                sys.modules.pop(self.name, None)
+                module = importlib_full.import_module(self.name)
+            self.assertEqual(module.attr, self.name)
+            self.assertEqual(module.__file__, mapping[self.name])
+            self.assertEqual(importlib_full.stop_replay(), (1, 0))
+
+    def test_replay_mismatch(self):
+        # A changed file falls back to a normal import.
+        with source_util.create_modules(self.name) as mapping:
+            path = self.bytecode_module(mapping)
+            self.record()
+            with open(path, u'ab') as file:
+                file.write(b'\0')
+            importlib_full.replay_manifest(self.manifest, prefetch=False)
+            with util.import_state(meta_path=[], path=[]):
+                self.assertRaises(ImportError, importlib_full.import_module,
+                                  self.name)
+            self.assertEqual(importlib_full.stop_replay(), (0, 1))
+
+    def test_other_magic(self):
+        with open(self.manifest, u'w') as file:
+            json.dump({u'version': 1, u'magic': u'00000000',
+                       u'modules': []}, file)
+        self.assertEqual(importlib_full.replay_manifest(self.manifest), 0)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(ManifestTests)
+
+
+if __name__ == u'__main__':
+    test_main()
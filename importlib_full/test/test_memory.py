@@ -0,0 +1,126 @@
+from __future__ import with_statement
+from .source import util as source_util
+from importlib_full import _memory
+import importlib_full
+import json
+import os
+import py_compile
+import tempfile
+import unittest
+
+
+# Stands in for the allocator: module bodies extend it and the measure is its
+# length.
+ALLOCATIONS = []
+
+_ALLOCATE = (u'__import__("sys").modules["importlib_full.test.test_memory"]'
+             u'.ALLOCATIONS.extend([0] * %d)\n')
+
+
+class MemoryProfilerTests(unittest.TestCase):
+
+    u"""Test importlib_full.start_memory_profiling."""
+
+    def profile(self):
+        u"""Profile importing a bytecode-only module allocating 100 'bytes'
+        which imports one allocating 30."""
+        del ALLOCATIONS[:]
+        names = u'_memory_outer', u'_memory_inner'
+        with source_util.create_modules(*names) as mapping:
+            with open(mapping[names[0]], u'w') as file:
+                file.write(_ALLOCATE % 60)
+                file.write(u'__import__("importlib_full").import_module('
+                           u'"_memory_inner")\n')
+                file.write(_ALLOCATE % 40)
+            with open(mapping[names[1]], u'w') as file:
+                file.write(_ALLOCATE % 30)
+            for name in names:
+                py_compile.compile(mapping[name])
+                os.unlink(mapping[name])
+            profiler = importlib_full.start_memory_profiling(
+                lambda: len(ALLOCATIONS))
+            try:
+                importlib_full.import_module(names[0])
+            finally:
+                self.assertIs(importlib_full.stop_profiling(), profiler)
+        return profiler
+
+    def test_tree(self):
+        profile = self.profile().to_dict()
+        self.assertEqual(profile[u'unit'], u'bytes')
+        outer, = profile[u'imports']
+        inner, = outer[u'children']
+        self.assertEqual(outer[u'name'], u'_memory_outer')
+        self.assertEqual(outer[u'cumulative'], 130)
+        self.assertEqual(outer[u'self'], 100)
+        self.assertEqual(outer[u'exec'], {u'cumulative': 130, u'self': 100})
+        self.assertEqual(inner[u'name'], u'_memory_inner')
+        self.assertEqual(inner[u'cumulative'], 30)
+        self.assertEqual(inner[u'self'], 30)
+
+    def test_code_size(self):
+        profiler = self.profile()
+        for name in (u'_memory_outer', u'_memory_inner'):
+            self.assertGreater(profiler.code_sizes[name], 0)
+        self.assertGreater(profiler.code_sizes[u'_memory_outer'],
+                           profiler.code_sizes[u'_memory_inner'])
+
+    def test_report(self):
+        profiler = self.profile()
+        self.assertEqual([module[u'name'] for module in profiler.modules()],
+                         [u'_memory_outer', u'_memory_inner'])
+        lines = profiler.report().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith(u'_memory_outer'))
+        self.assertEqual(len(profiler.report(limit=1).splitlines()), 2)
+
+    def test_write(self):
+        profiler = self.profile()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, u'memory.json')
+            profiler.write(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file), profiler.to_dict())
+            self.assertRaises(ValueError, profiler.write, path, u'chrome')
+        finally:
+            for name in os.listdir(directory):
+                os.unlink(os.path.join(directory, name))
+            os.rmdir(directory)
+
+    def test_default_measure(self):
+        # Without a measure, tracemalloc or the resident set size is used.
+        profiler = _memory.MemoryProfiler()
+        self.assertGreater(profiler.clock(), 0)
+        with source_util.create_modules(u'_memory_default') as mapping:
+            with open(mapping[u'_memory_default'], u'w') as file:
+                file.write(u'attr = [0] * 1000000\n')
+            py_compile.compile(mapping[u'_memory_default'])
+            os.unlink(mapping[u'_memory_default'])
+            started = importlib_full.start_memory_profiling()
+            try:
+                importlib_full.import_module(u'_memory_default')
+            finally:
+                self.assertIs(importlib_full.stop_profiling(), started)
+        module, = started.to_dict()[u'imports']
+        self.assertEqual(module[u'name'], u'_memory_default')
+        # A list of a million references takes megabytes either way.
+        self.assertGreater(module[u'cumulative'], 1000000)
+
+    @unittest.skipUnless(os.path.exists(u'/proc/self/statm'),
+                         u"requires /proc/self/statm")
+    def test_resident_memory(self):
+        # The file is opened once, not for every measurement.
+        measure = _memory._resident_memory()
+        fd = measure.fd
+        self.assertGreater(measure(), 0)
+        self.assertEqual(measure.fd, fd)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(MemoryProfilerTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -0,0 +1,159 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+from importlib_full import _bootstrap, _packed
+import importlib_full
+import importlib_full.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+class PackedBytecodeTests(unittest.TestCase):
+
+    u"""Test importlib_full._packed.PackedBytecode."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, u'mod.py')
+        self.pack = os.path.join(self.directory, u'__pycache__',
+                                 _packed.PACK_NAME)
+        self.code = compile(u'attr = 1\n', self.source, u'exec')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        packed = _packed.PackedBytecode()
+        self.assertIsNone(packed.get(self.source, 10, 9))
+        packed.put(self.source, 10, 9, self.code)
+        packed.flush()
+        self.assertTrue(os.path.exists(self.pack))
+        packed = _packed.PackedBytecode()
+        self.assertEqual(packed.get(self.source, 10, 9), self.code)
+        # Entries are validated by both the mtime and size of the source.
+        self.assertIsNone(packed.get(self.source, 11, 9))
+        self.assertIsNone(packed.get(self.source, 10, 8))
+
+    def test_pack_read_once(self):
+        packed = _packed.PackedBytecode()
+        packed.put(self.source, 10, 9, self.code)
+        packed.flush()
+        packed = _packed.PackedBytecode()
+        importlib_full.reset_stats()
+        packed.get(self.source, 10, 9)
+        packed.get(os.path.join(self.directory, u'other.py'), 10, 9)
+        packed.get(self.source, 10, 9)
+        self.assertEqual(importlib_full.stats()[u'open'], 1)
+
+    def test_flush_merges(self):
+        # Entries packed by another process since the pack was read are kept.
+        other = os.path.join(self.directory, u'other.py')
+        first, second = _packed.PackedBytecode(), _packed.PackedBytecode()
+        first.put(self.source, 10, 9, self.code)
+        second.put(other, 10, 9, self.code)
+        first.flush()
+        second.flush()
+        packed = _packed.PackedBytecode()
+        self.assertIsNotNone(packed.get(self.source, 10, 9))
+        self.assertIsNotNone(packed.get(other, 10, 9))
+        self.assertEqual(os.listdir(os.path.dirname(self.pack)),
+                         [_packed.PACK_NAME])
+
+    def test_unusable_pack(self):
+        os.mkdir(os.path.dirname(self.pack))
+        for data in (b'', b'garbage', b'\0\0\0\0garbage'):
+            with open(self.pack, u'wb') as file:
+                file.write(data)
+            self.assertIsNone(
+                _packed.PackedBytecode().get(self.source, 10, 9))
+
+
+class PackedImportTests(unittest.TestCase):
+
+    u"""Test importing with importlib_full.util.enable_packed_bytecode()."""
+
+    def tearDown(self):
+        importlib_full.util.disable_packed_bytecode()
+
+    def test_enable_disable(self):
+        packed = importlib_full.util.enable_packed_bytecode()
+        self.assertIs(importlib_full.util.enable_packed_bytecode(), packed)
+        self.assertIs(_bootstrap._packed_bytecode, packed)
+        self.assertIs(importlib_full.util.disable_packed_bytecode(), packed)
+        self.assertIsNone(_bootstrap._packed_bytecode)
+        self.assertIsNone(importlib_full.util.disable_packed_bytecode())
+
+    def pack(self, mapping, *names):
+        u"""Write the pack of the modules 'names' compiled from their
+        source."""
+        packed = _packed.PackedBytecode()
+        for name in names:
+            path = mapping[name]
+            with open(path) as file:
+                code_object = compile(file.read(), path, u'exec')
+            stat_info = os.stat(path)
+            packed.put(path, int(stat_info.st_mtime), stat_info.st_size,
+                       code_object)
+        packed.flush()
+        return packed.pack_path(mapping[names[0]])
+
+    def test_siblings_from_pack(self):
+        names = u'_packed_first', u'_packed_second'
+        with source_util.create_modules(*names) as mapping:
+            pack_path = self.pack(mapping, *names)
+            importlib_full.util.enable_packed_bytecode()
+            with util.import_state(path=[mapping[u'.root']]):
+                importlib_full.reset_stats()
+                modules = [importlib_full.import_module(name)
+                           for name in names]
+                stats = importlib_full.stats()
+        self.assertEqual([module.attr for module in modules], list(names))
+        self.assertEqual([module.__cached__ for module in modules],
+                         [pack_path, pack_path])
+        self.assertEqual(stats[u'bytecode_hits'], 2)
+        self.assertEqual(stats[u'source_compiles'], 0)
+        # Only the pack is opened.
+        self.assertEqual(stats[u'open'], 1)
+
+    def test_module_added_later(self):
+        # A module missing from the pack is compiled and added to it rather
+        # than to a bytecode file of its own.
+        names = u'_packed_first', u'_packed_added'
+        dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+        try:
+            with source_util.create_modules(*names) as mapping:
+                pack_path = self.pack(mapping, names[0])
+                importlib_full.util.enable_packed_bytecode()
+                with util.import_state(path=[mapping[u'.root']]):
+                    importlib_full.reset_stats()
+                    module = importlib_full.import_module(names[1])
+                    importlib_full.import_module(names[0])
+                    stats = importlib_full.stats()
+                importlib_full.util.disable_packed_bytecode()
+                self.assertEqual(os.listdir(os.path.dirname(pack_path)),
+                                 [_packed.PACK_NAME])
+                self.assertFalse(os.path.exists(
+                    _bootstrap._cache_from_source(mapping[names[1]])))
+                added = mapping[names[1]]
+                stat_info = os.stat(added)
+                found = _packed.PackedBytecode().get(
+                    added, int(stat_info.st_mtime), stat_info.st_size)
+        finally:
+            sys.dont_write_bytecode = dont_write_bytecode
+        self.assertEqual(module.attr, names[1])
+        self.assertEqual(stats[u'bytecode_hits'], 1)
+        self.assertEqual(stats[u'source_compiles'], 1)
+        self.assertEqual(stats[u'bytecode_writes'], 0)
+        self.assertEqual(found.co_filename, added)
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(PackedBytecodeTests, PackedImportTests)
+
+
+if __name__ == u'__main__':
+    test_main()
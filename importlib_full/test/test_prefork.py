@@ -0,0 +1,93 @@
+from __future__ import with_statement
+from .source import util as source_util
+from importlib_full import prefork
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+
+@unittest.skipUnless(hasattr(os, u'fork'), u"requires os.fork()")
+class PreforkServerTests(unittest.TestCase):
+
+    u"""Test importlib_full.prefork."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, u'server')
+        self.server = prefork.PreforkServer(self.socket_path, [u'json'])
+        self.server.preload()
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={u'poll_interval': 0.05})
+        self.thread.start()
+        while not os.path.exists(self.socket_path):
+            self.thread.join(0.01)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        shutil.rmtree(self.temp_dir)
+
+    def run_module(self, source, **kwargs):
+        name = u'_prefork_test'
+        with source_util.create_modules(name) as mapping:
+            with open(mapping[name], u'w') as file:
+                file.write(source)
+            return prefork.spawn(self.socket_path, name, **kwargs)
+
+    def test_argv(self):
+        source = u'import sys\nsys.exit(int(sys.argv[1]))\n'
+        pid, status = self.run_module(source, argv=[u'prog', u'3'])
+        self.assertNotEqual(pid, os.getpid())
+        self.assertEqual(status, 3)
+
+    def test_env(self):
+        source = u'import os, sys\nsys.exit(int(os.environ["CODE"]))\n'
+        self.assertEqual(self.run_module(source, env={u'CODE': u'5'})[1], 5)
+
+    def test_preloaded(self):
+        source = u'import sys\nsys.exit(0 if "json" in sys.modules else 1)\n'
+        self.assertEqual(self.run_module(source)[1], 0)
+
+    def test_failure(self):
+        source = u'raise ValueError\n'
+        with open(os.devnull, u'w') as devnull:
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                self.assertEqual(self.run_module(source)[1], 1)
+            finally:
+                sys.stderr = stderr
+
+    def test_stats(self):
+        self.run_module(u'')
+        stats = prefork.server_stats(self.socket_path)
+        self.assertEqual(stats[u'spawns'], 1)
+        self.assertEqual(stats[u'modules'], 1)
+        self.assertGreaterEqual(stats[u'spawn_ms'][u'max'], 0)
+
+    def test_fork_failure(self):
+        # The request is refused and the server keeps serving.
+        def fork():
+            raise OSError(errno.EAGAIN, os.strerror(errno.EAGAIN))
+        original, os.fork = os.fork, fork
+        try:
+            with self.assertRaises(RuntimeError):
+                self.run_module(u'')
+        finally:
+            os.fork = original
+        self.assertEqual(self.run_module(u'')[1], 0)
+        stats = prefork.server_stats(self.socket_path)
+        self.assertEqual(stats[u'failures'], 1)
+        self.assertEqual(stats[u'spawns'], 1)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(PreforkServerTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -0,0 +1,103 @@
+from __future__ import with_statement
+from . import util
+from .source import util as source_util
+from importlib_full import _profile
+import importlib_full
+import json
+import os
+import py_compile
+import tempfile
+import unittest
+
+
+class ProfilerTests(unittest.TestCase):
+
+    u"""Test importlib_full.start_profiling and the exported profiles."""
+
+    def profile(self):
+        u"""Profile importing a bytecode-only module which imports another."""
+        names = u'_profile_outer', u'_profile_inner'
+        with source_util.create_modules(*names) as mapping:
+            with open(mapping[names[0]], u'w') as file:
+                file.write(u'__import__("importlib_full").import_module('
+                           u'"_profile_inner")\n')
+            for name in names:
+                py_compile.compile(mapping[name])
+                os.unlink(mapping[name])
+            profiler = importlib_full.start_profiling()
+            try:
+                importlib_full.import_module(names[0])
+            finally:
+                self.assertIs(importlib_full.stop_profiling(), profiler)
+        self.assertIsInstance(profiler, _profile.Profiler)
+        return profiler
+
+    def test_tree(self):
+        profile = self.profile().to_dict()
+        outer, = profile[u'imports']
+        self.assertEqual(outer[u'name'], u'_profile_outer')
+        inner, = outer[u'children']
+        self.assertEqual(inner[u'name'], u'_profile_inner')
+        self.assertEqual(inner[u'children'], [])
+        self.assertFalse(outer[u'failed'])
+        self.assertLessEqual(outer[u'self'], outer[u'cumulative'])
+        self.assertAlmostEqual(outer[u'self'] + inner[u'cumulative'],
+                               outer[u'cumulative'])
+
+    def test_phases(self):
+        outer, = self.profile().to_dict()[u'imports']
+        self.assertEqual(set(outer[u'phases']),
+                         set([u'find', u'read', u'validate', u'unmarshal',
+                              u'exec']))
+        execution = outer[u'phases'][u'exec']
+        self.assertLess(execution[u'self'], execution[u'cumulative'])
+
+    def test_failure(self):
+        profiler = importlib_full.start_profiling()
+        try:
+            with util.import_state(meta_path=[]):
+                self.assertRaises(ImportError, importlib_full.import_module,
+                                  u'<no such module>')
+        finally:
+            importlib_full.stop_profiling()
+        self.assertTrue(profiler.to_dict()[u'imports'][0][u'failed'])
+
+    def test_chrome_trace(self):
+        events = self.profile().to_chrome_trace()[u'traceEvents']
+        imports = [event[u'name'] for event in events
+                   if event[u'cat'] == u'import']
+        self.assertEqual(imports, [u'_profile_outer', u'_profile_inner'])
+        self.assertTrue(all(event[u'dur'] >= 0 for event in events))
+
+    def test_speedscope(self):
+        profile = self.profile().to_speedscope()
+        frames = profile[u'shared'][u'frames']
+        events, = [profile[u'events'] for profile in profile[u'profiles']]
+        self.assertEqual(frames[events[0][u'frame']][u'name'],
+                         u'_profile_outer')
+        depth = 0
+        for event in events:
+            depth += 1 if event[u'type'] == u'O' else -1
+            self.assertGreaterEqual(depth, 0)
+        self.assertEqual(depth, 0)
+
+    def test_write(self):
+        profiler = self.profile()
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            profiler.write(path, u'chrome')
+            with open(path) as file:
+                self.assertIn(u'traceEvents', json.load(file))
+            self.assertRaises(ValueError, profiler.write, path, u'pstats')
+        finally:
+            os.unlink(path)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(ProfilerTests)
+
+
+if __name__ == u'__main__':
+    test_main()
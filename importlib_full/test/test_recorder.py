@@ -0,0 +1,105 @@
+from __future__ import with_statement
+from . import util
+import importlib_full
+import json
+import os
+import signal
+import StringIO
+import tempfile
+import unittest
+
+
+class FlightRecorderTests(unittest.TestCase):
+
+    u"""Test importlib_full.start_flight_recorder."""
+
+    def record(self, *names, **kwargs):
+        recorder = importlib_full.start_flight_recorder(**kwargs)
+        try:
+            with util.mock_modules(*names) as mock:
+                with util.import_state(meta_path=[mock]):
+                    for name in names:
+                        importlib_full.import_module(name)
+                    try:
+                        importlib_full.import_module(u'<no such module>')
+                    except ImportError:
+                        pass
+        finally:
+            importlib_full.stop_flight_recorder(recorder)
+        return recorder
+
+    def test_records(self):
+        records = self.record(u'a', u'b').records()
+        self.assertEqual([record[u'name'] for record in records],
+                         [u'a', u'b', u'<no such module>'])
+        self.assertEqual([record[u'outcome'] for record in records],
+                         [u'ok', u'ok', u'ImportError'])
+        for record in records:
+            self.assertLessEqual(record[u'start'], record[u'end'])
+            self.assertGreaterEqual(record[u'find'], 0)
+
+    def test_ring(self):
+        # Only the most recent imports are kept.
+        records = self.record(u'a', u'b', u'c', size=2).records()
+        self.assertEqual([record[u'name'] for record in records],
+                         [u'c', u'<no such module>'])
+        self.assertEqual([record[u'seq'] for record in records], [2, 3])
+
+    def test_ring_smaller_than_nesting(self):
+        # Importing pkg.mod imports pkg while it runs, reusing its slot.
+        recorder = importlib_full.start_flight_recorder(1)
+        try:
+            with util.mock_modules(u'pkg.__init__', u'pkg.mod',
+                                   u'a') as mock:
+                with util.import_state(meta_path=[mock]):
+                    importlib_full.import_module(u'pkg.mod')
+                    self.assertEqual(recorder.records()[0][u'name'], u'pkg')
+                    self.assertEqual(recorder._active(), [])
+                    importlib_full.import_module(u'a')
+        finally:
+            importlib_full.stop_flight_recorder(recorder)
+        record, = recorder.records()
+        self.assertEqual(record[u'name'], u'a')
+        self.assertEqual(record[u'outcome'], u'ok')
+        self.assertIsNotNone(record[u'end'])
+
+    def test_stopped(self):
+        recorder = self.record(u'a')
+        with util.mock_modules(u'b') as mock:
+            with util.import_state(meta_path=[mock]):
+                importlib_full.import_module(u'b')
+        self.assertNotIn(u'b', [record[u'name']
+                                for record in recorder.records()])
+
+    def test_dump(self):
+        output = StringIO.StringIO()
+        self.record(u'a').dump(output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line)[u'name'] for line in lines],
+                         [u'a', u'<no such module>'])
+
+    @unittest.skipUnless(hasattr(signal, u'SIGUSR1'), u"requires SIGUSR1")
+    def test_dump_on_signal(self):
+        recorder = self.record(u'a')
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        previous = recorder.dump_on_signal(signal.SIGUSR1, path)
+        try:
+            os.kill(os.getpid(), signal.SIGUSR1)
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 2)
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+            os.unlink(path)
+
+    def test_size(self):
+        self.assertRaises(ValueError, importlib_full.start_flight_recorder, 0)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(FlightRecorderTests)
+
+
+if __name__ == u'__main__':
+    test_main()
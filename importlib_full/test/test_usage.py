@@ -0,0 +1,81 @@
+from __future__ import with_statement
+from .source import util as source_util
+from importlib_full import _usage
+import importlib_full
+import os
+import py_compile
+import sys
+import unittest
+
+
+class UsageTrackingTests(unittest.TestCase):
+
+    u"""Test importlib_full.start_usage_tracking."""
+
+    names = u'_usage_used', u'_usage_unused', u'_usage_dependency'
+
+    def track(self):
+        u"""Track importing three bytecode-only modules, the first of which
+        imports and uses the third; return the tracker and the modules."""
+        with source_util.create_modules(*self.names) as mapping:
+            with open(mapping[self.names[0]], u'w') as file:
+                file.write(u'value = 1\n'
+                           u'dependency = __import__("importlib_full")'
+                           u'.import_module("_usage_dependency")\n'
+                           u'dependency.value\n')
+            for name in self.names[1:]:
+                with open(mapping[name], u'w') as file:
+                    file.write(u'value = 2\n')
+            for name in self.names:
+                py_compile.compile(mapping[name])
+                os.unlink(mapping[name])
+            tracker = importlib_full.start_usage_tracking(
+                report_at_exit=False)
+            try:
+                modules = [importlib_full.import_module(name)
+                           for name in self.names[:2]]
+            finally:
+                self.assertIs(importlib_full.stop_usage_tracking(), tracker)
+        return tracker, modules
+
+    def test_unused(self):
+        tracker, (used, unused) = self.track()
+        self.assertEqual(sorted(tracker.costs), sorted(self.names))
+        # Reading attributes while the module body runs does not count.
+        self.assertEqual(tracker.used, set([u'_usage_dependency']))
+        used.value
+        self.assertEqual(tracker.unused(), [(u'_usage_unused',
+                                             tracker.costs[u'_usage_unused'])])
+        self.assertIs(type(used), _usage._TouchedModule)
+        self.assertIs(type(unused), _usage._UntouchedModule)
+
+    def test_machinery_attributes(self):
+        tracker, (used, unused) = self.track()
+        unused.__name__, unused.__file__, unused.__package__
+        self.assertNotIn(u'_usage_unused', tracker.used)
+
+    def test_ranking(self):
+        tracker = _usage.UsageTracker()
+        tracker._loaded(u'cheap', 0.001)
+        tracker._loaded(u'costly', 0.5)
+        tracker._loaded(u'touched', 1.0)
+        tracker._touched(u'touched')
+        self.assertEqual([name for name, cost in tracker.unused()],
+                         [u'costly', u'cheap'])
+        lines = tracker.report().splitlines()
+        self.assertEqual(lines[0],
+                         u'2 of 3 tracked modules imported but never used:')
+        self.assertTrue(lines[1].endswith(u'costly'))
+
+    def tearDown(self):
+        for name in self.names:
+            sys.modules.pop(name, None)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(UsageTrackingTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -1,7 +1,12 @@
 from __future__ import with_statement
 from importlib_full import util
+from importlib_full import _lazy
+import importlib_full
 from . import util as test_util
+from .source import util as source_util
 import imp
+import os
+import py_compile
 import sys
 import types
 import unittest
@@ -110,9 +115,96 @@ class SetPackageTests(unittest.TestCase):
             self.verify(module, value)
 
 
+class CountingLoader(object):
+
+    u"""Loader which executes 'attr = <name>' into the module in sys.modules
+    and counts how often it does so."""
+
+    def __init__(self, is_package=False):
+        self.loads = 0
+        self._is_package = is_package
+
+    def get_filename(self, fullname):
+        return os.path.join(u'<path>', u'__init__.py' if self._is_package
+                                       else u'mod.py')
+
+    def is_package(self, fullname):
+        return self._is_package
+
+    def load_module(self, fullname):
+        self.loads += 1
+        module = sys.modules.setdefault(fullname, imp.new_module(fullname))
+        module.attr = fullname
+        return module
+
+
+class LazyLoaderTests(unittest.TestCase):
+
+    u"""Tests for importlib_full.util.LazyLoader."""
+
+    def test_placeholder(self):
+        # Nothing is executed until an attribute is read.
+        loader = CountingLoader()
+        with test_util.uncache(u'mod'):
+            module = util.LazyLoader(loader).load_module(u'mod')
+            self.assertIs(sys.modules[u'mod'], module)
+            self.assertEqual(module.__name__, u'mod')
+            self.assertEqual(module.__package__, u'')
+            self.assertIs(module.__loader__, loader)
+            self.assertEqual(loader.loads, 0)
+            self.assertEqual(module.attr, u'mod')
+            self.assertEqual(module.attr, u'mod')
+            self.assertEqual(loader.loads, 1)
+            self.assertIs(sys.modules[u'mod'], module)
+
+    def test_package(self):
+        # __path__ is available without loading so submodules can be found.
+        loader = CountingLoader(is_package=True)
+        with test_util.uncache(u'pkg'):
+            module = util.LazyLoader(loader).load_module(u'pkg')
+            self.assertEqual(module.__path__, [u'<path>'])
+            self.assertEqual(module.__package__, u'pkg')
+            self.assertEqual(loader.loads, 0)
+
+    def test_failure(self):
+        # A failed load leaves the placeholder lazy so it can be retried.
+        class FailingLoader(CountingLoader):
+            def load_module(self, fullname):
+                raise ImportError
+        with test_util.uncache(u'mod'):
+            module = util.LazyLoader(FailingLoader()).load_module(u'mod')
+            self.assertRaises(ImportError, getattr, module, u'attr')
+            self.assertRaises(ImportError, getattr, module, u'attr')
+
+    def lazy_import(self, name, **kwargs):
+        u"""Import the bytecode-only module 'name' with lazy loading on."""
+        with source_util.create_modules(name) as mapping:
+            py_compile.compile(mapping[name])
+            os.unlink(mapping[name])
+            util.enable_lazy_loading(**kwargs)
+            try:
+                module = importlib_full.__import__(name)
+            finally:
+                util.disable_lazy_loading()
+            is_lazy = isinstance(module, _lazy._LazyModule)
+            self.assertEqual(module.attr, name)
+            return is_lazy
+
+    def test_enable(self):
+        self.assertTrue(self.lazy_import(u'_lazy_test'))
+
+    def test_allow(self):
+        self.assertTrue(self.lazy_import(u'_lazy_test', allow=[u'_lazy_test']))
+        self.assertFalse(self.lazy_import(u'_lazy_test', allow=[u'other']))
+
+    def test_deny(self):
+        self.assertFalse(self.lazy_import(u'_lazy_test', deny=[u'_lazy_test']))
+
+
 def test_main():
     from test import test_support as support
-    support.run_unittest(ModuleForLoaderTests, SetPackageTests)
+    support.run_unittest(ModuleForLoaderTests, SetPackageTests,
+                         LazyLoaderTests)
 
 
 if __name__ == u'__main__':
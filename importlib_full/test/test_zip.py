@@ -0,0 +1,210 @@
+from __future__ import with_statement
+from . import util
+from importlib_full import _bootstrap, _zip, abc, machinery
+import importlib_full
+import imp
+import marshal
+import os
+import py_compile
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import unittest
+import zipfile
+
+
+def _bytecode(source):
+    u"""Return the bytecode file contents for 'source'."""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, u'module.py')
+        with open(path, u'w') as file:
+            file.write(source)
+        py_compile.compile(path)
+        with open(path + u'c', u'rb') as file:
+            return file.read()
+    finally:
+        shutil.rmtree(directory)
+
+
+class ZipImportTests(unittest.TestCase):
+
+    u"""Test importlib_full.machinery.ZipFinder and its loaders."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = os.path.join(self.directory, u'app.zip')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, members, prefix=b'', compression=zipfile.ZIP_DEFLATED):
+        u"""Write the archive with the {name: data} members after
+        'prefix'."""
+        with open(self.archive, u'wb') as file:
+            file.write(prefix)
+            archive = zipfile.ZipFile(file, u'w', compression)
+            for name, data in sorted(members.items()):
+                archive.writestr(name, data)
+            archive.close()
+
+    def test_import_bytecode(self):
+        # Bytecode without source is imported from the archive, packages
+        # included, whether stored or compressed.
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            self.build({u'mod.pyc': _bytecode(u'attr = "mod"\n'),
+                        u'pkg/__init__.pyc': _bytecode(u''),
+                        u'pkg/sub.pyc': _bytecode(u'attr = "sub"\n')},
+                       compression=compression)
+            with util.uncache(u'mod', u'pkg', u'pkg.sub'):
+                with util.import_state(path=[self.archive]):
+                    module = importlib_full.import_module(u'mod')
+                    sub = importlib_full.import_module(u'pkg.sub')
+                self.assertEqual(module.attr, u'mod')
+                self.assertEqual(sub.attr, u'sub')
+                self.assertEqual(module.__file__,
+                                 os.path.join(self.archive, u'mod.pyc'))
+                self.assertEqual(sys.modules[u'pkg'].__path__,
+                                 [os.path.join(self.archive, u'pkg')])
+                self.assertIsInstance(module.__loader__,
+                                      _zip._SourcelessZipLoader)
+
+    def test_import_source(self):
+        # Source is compiled once, its bytecode going to the sidecar cache.
+        self.build({u'src_mod.py': b'attr = "src_mod"\n',
+                    u'srcpkg/__init__.py': b'',
+                    u'srcpkg/sub.py': b'attr = "sub"\n'})
+        names = u'src_mod', u'srcpkg', u'srcpkg.sub'
+        dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+        try:
+            with util.import_state(path=[self.archive]):
+                with util.uncache(*names):
+                    module = importlib_full.import_module(u'src_mod')
+                    sub = importlib_full.import_module(u'srcpkg.sub')
+                with util.uncache(*names):
+                    importlib_full.reset_stats()
+                    importlib_full.import_module(u'src_mod')
+                    stats = importlib_full.stats()
+        finally:
+            sys.dont_write_bytecode = dont_write_bytecode
+        self.assertEqual((module.attr, sub.attr), (u'src_mod', u'sub'))
+        self.assertIsInstance(module.__loader__, machinery.ZipLoader)
+        self.assertEqual(module.__file__,
+                         os.path.join(self.archive, u'src_mod.py'))
+        self.assertTrue(os.path.exists(_bootstrap._cache_from_source(
+            os.path.join(self.archive + u'.cache', u'src_mod.py'))))
+        self.assertEqual(stats[u'bytecode_hits'], 1)
+        self.assertEqual(stats[u'source_compiles'], 0)
+
+    def test_archived_bytecode_read_once(self):
+        # Bytecode stored next to the source is read once per import, for
+        # its timestamp and its code together.
+        date_time = time.localtime()[:5] + (0,)
+        mtime = int(time.mktime(date_time + (0, 0, -1)))
+        bytecode = (imp.get_magic() + struct.pack(u'<L', mtime) +
+                    marshal.dumps(compile(u'attr = "archived"\n',
+                                          u'mod.py', u'exec')))
+        with open(self.archive, u'wb') as file:
+            archive = zipfile.ZipFile(file, u'w', zipfile.ZIP_DEFLATED)
+            for name, data in ((u'mod.py', b'attr = "source"\n'),
+                               (u'mod.pyc', bytecode)):
+                archive.writestr(zipfile.ZipInfo(name, date_time), data)
+            archive.close()
+        finder = machinery.ZipFinder(self.archive)
+        reads = []
+        read = finder.archive.read
+        finder.archive.read = lambda name: reads.append(name) or read(name)
+        try:
+            with util.uncache(u'mod'):
+                with util.import_state(path=[self.archive]):
+                    sys.path_importer_cache[self.archive] = finder
+                    importlib_full.reset_stats()
+                    module = importlib_full.import_module(u'mod')
+                    stats = importlib_full.stats()
+        finally:
+            del finder.archive.read
+        self.assertEqual(module.attr, u'archived')
+        self.assertEqual(stats[u'bytecode_hits'], 1)
+        self.assertEqual(reads, [u'mod.pyc'])
+
+    def test_prefixed_archive(self):
+        # Bytes before the archive, like a launcher script, are skipped.
+        self.build({u'mod.pyc': _bytecode(u'attr = 1\n')},
+                   prefix=b'#!/usr/bin/env python\n')
+        loader = machinery.ZipFinder(self.archive).find_module(u'mod')
+        self.assertEqual(loader.get_data(loader.get_filename(u'mod'))[:4],
+                         imp.get_magic())
+
+    def test_subdirectory_entry(self):
+        self.build({u'lib/mod.py': b'attr = 1\n'})
+        finder = machinery.ZipFinder(os.path.join(self.archive, u'lib'))
+        self.assertEqual(finder.prefix, u'lib/')
+        self.assertIsNotNone(finder.find_module(u'mod'))
+        with self.assertRaises(ImportError):
+            machinery.ZipFinder(os.path.join(self.archive, u'missing'))
+
+    def test_not_an_archive(self):
+        with open(self.archive, u'wb') as file:
+            file.write(b'not a zip archive')
+        with self.assertRaises(ImportError):
+            machinery.ZipFinder(self.archive)
+        with self.assertRaises(ImportError):
+            machinery.ZipFinder(self.directory)
+
+    def test_index_reused(self):
+        # The central directory is parsed once per archive and lookups do not
+        # read it again.
+        self.build({u'mod.py': b'attr = 1\n'})
+        first = machinery.ZipFinder(self.archive)
+        second = machinery.ZipFinder(self.archive)
+        self.assertIs(first.archive, second.archive)
+        first.archive._read_directory = None
+        self.assertIsNotNone(first.find_module(u'mod'))
+        self.assertIsNone(first.find_module(u'missing'))
+
+    def test_source_loader(self):
+        self.build({u'pkg/__init__.py': b'', u'pkg/mod.py': b'attr = 1\n'})
+        finder = machinery.ZipFinder(self.archive)
+        loader = finder.find_module(u'pkg')
+        self.assertIsInstance(loader, abc.SourceLoader)
+        self.assertTrue(loader.is_package(u'pkg'))
+        loader = machinery.ZipFinder(os.path.join(self.archive, u'pkg')) \
+            .find_module(u'pkg.mod')
+        self.assertFalse(loader.is_package(u'pkg.mod'))
+        self.assertEqual(loader.get_data(loader.get_filename(u'pkg.mod')),
+                         b'attr = 1\n')
+        info = zipfile.ZipFile(self.archive).getinfo(u'pkg/mod.py')
+        self.assertEqual(loader.archive.mtime(u'pkg/mod.py'),
+                         int(time.mktime(info.date_time + (0, 0, -1))))
+
+    def test_sidecar_cache(self):
+        # Bytecode not in the archive is read from and written to the
+        # sidecar cache.
+        self.build({u'mod.py': b'attr = 1\n'})
+        loader = machinery.ZipFinder(self.archive).find_module(u'mod')
+        bytecode_path = os.path.join(self.archive, u'__pycache__',
+                                     u'mod.pyc')
+        with self.assertRaises(IOError):
+            loader.get_data(bytecode_path)
+        loader.set_data(bytecode_path, b'bytecode')
+        self.assertTrue(os.path.exists(os.path.join(
+            self.archive + u'.cache', u'__pycache__', u'mod.pyc')))
+        self.assertEqual(loader.get_data(bytecode_path), b'bytecode')
+
+    def test_implicit_path_hook(self):
+        self.build({u'mod.pyc': _bytecode(u'')})
+        with util.import_state():
+            finder = _bootstrap._DefaultPathFinder._path_hooks(self.archive)
+        self.assertIsInstance(finder, machinery.ZipFinder)
+
+
+def test_main():
+    from test.test_support import run_unittest
+    run_unittest(ZipImportTests)
+
+
+if __name__ == u'__main__':
+    test_main()
@@ -1,6 +1,9 @@
 from contextlib import contextmanager
+import errno
 import imp
 import os.path
+import stat
+import tempfile
 from test import test_support as support
 import unittest
 import sys
@@ -129,3 +132,350 @@ class mock_modules(object):
 
     def __exit__(self, *exc_info):
         self._uncache.__exit__(None, None, None)
+
+
+class _SlowFile(object):
+
+    u"""File wrapper delaying every read."""
+
+    def __init__(self, file, delay):
+        self._file = file
+        self._delay = delay
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._file.__exit__(*exc_info)
+
+    def read(self, *args):
+        self._delay(u'read')
+        return self._file.read(*args)
+
+
+class _SlowModule(object):
+
+    u"""Stand-in for the _os or _io module of importlib_full._bootstrap which
+    delays the named calls."""
+
+    def __init__(self, module, delay, calls):
+        self._module = module
+        self._delay = delay
+        self._calls = calls
+
+    def __getattr__(self, attr):
+        function = getattr(self._module, attr)
+        if attr not in self._calls:
+            return function
+        call = self._calls[attr]
+        def delayed(*args, **kwargs):
+            self._delay(call)
+            result = function(*args, **kwargs)
+            if attr == u'FileIO':
+                result = _SlowFile(result, self._delay)
+            return result
+        return delayed
+
+
+@contextmanager
+def slow_filesystem(latency=0):
+    u"""Make every file system call of importlib_full take at least 'latency'
+    more seconds and count the calls.
+
+    The stat(), mkdir() and listdir() calls (the latter made to check case),
+    the opening of files and the reads from them are delayed and counted;
+    the counts are in the dict returned by the context manager. The built-in
+    import is not affected.
+
+    time.sleep() cannot wait for less than the granularity of the system's
+    timers, often tens or hundreds of microseconds, so latencies below a
+    millisecond are busy-waited instead.
+
+    """
+    from importlib_full import _bootstrap
+    import time
+    counts = dict.fromkeys([u'stat', u'listdir', u'mkdir', u'open', u'read'],
+                           0)
+    def delay(call):
+        counts[call] += 1
+        if latency >= 0.001:
+            time.sleep(latency)
+        elif latency:
+            deadline = time.time() + latency
+            while time.time() < deadline:
+                pass
+    original_os = _bootstrap._os
+    original_io = _bootstrap._io
+    original_case_ok = _bootstrap._case_ok
+    def case_ok(directory, check):
+        if u'PYTHONCASEOK' not in os.environ:
+            delay(u'listdir')
+        return original_case_ok(directory, check)
+    _bootstrap._os = _SlowModule(original_os, delay,
+                                 {u'stat': u'stat', u'mkdir': u'mkdir'})
+    _bootstrap._io = _SlowModule(original_io, delay, {u'FileIO': u'open'})
+    _bootstrap._case_ok = case_ok
+    try:
+        yield counts
+    finally:
+        _bootstrap._os = original_os
+        _bootstrap._io = original_io
+        _bootstrap._case_ok = original_case_ok
+
+
+class _MemoryStat(object):
+
+    u"""The parts of a stat result used by importlib_full._bootstrap."""
+
+    __slots__ = (u'st_mode', u'st_mtime', u'st_size')
+
+    def __init__(self, st_mode, st_mtime, st_size):
+        self.st_mode = st_mode
+        self.st_mtime = st_mtime
+        self.st_size = st_size
+
+
+class _MemoryWriter(object):
+
+    u"""File opened for writing by MemoryFilesystem; stored when closed."""
+
+    def __init__(self, filesystem, path):
+        self._filesystem = filesystem
+        self._path = path
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def close(self):
+        if self._chunks is not None:
+            self._filesystem.add_file(self._path, b''.join(self._chunks))
+            self._chunks = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _MemoryModule(object):
+
+    u"""Stand-in for the _os or _io module of importlib_full._bootstrap which
+    serves the named calls from a MemoryFilesystem."""
+
+    def __init__(self, module, calls):
+        self._module = module
+        self._calls = calls
+
+    def __getattr__(self, attr):
+        if attr in self._calls:
+            return self._calls[attr]
+        return getattr(self._module, attr)
+
+
+class MemoryFilesystem(object):
+
+    u"""In-memory file system for importlib_full; install it with
+    memory_filesystem().
+
+    Paths are looked up on disk the first time they are used and served from
+    memory from then on, so once warmed up imports make no system calls. Files
+    written and directories made by importlib_full, or added with add_file(),
+    only exist in memory. Changes made on disk after a path was first used are
+    not seen.
+
+    """
+
+    def __init__(self):
+        from importlib_full import _bootstrap
+        self._os = _bootstrap._os
+        self._io = _bootstrap._io
+        self._time = _bootstrap.time.time
+        self._counters = _bootstrap._stats
+        self._cwd = self._os.getcwd()
+        # Path to _MemoryStat, or None if it does not exist.
+        self._stats = {}
+        self._files = {}
+        self._listings = {}
+
+    def _entered(self, path, mode, data=None):
+        u"""Record that 'path' now exists."""
+        self._stats[path] = _MemoryStat(mode, self._time(),
+                                        0 if data is None else len(data))
+        parent, _, name = path.rpartition(os.sep)
+        listing = self._listings.get(parent or os.sep)
+        if listing is not None and name not in listing:
+            listing.append(name)
+
+    def stat(self, path):
+        u"""Return the stat result of 'path', raising OSError if missing."""
+        try:
+            result = self._stats[path]
+        except KeyError:
+            try:
+                real = self._os.stat(path)
+            except OSError:
+                result = None
+            else:
+                result = _MemoryStat(real.st_mode, real.st_mtime,
+                                     real.st_size)
+            self._stats[path] = result
+        if result is None:
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return result
+
+    def listdir(self, path):
+        u"""Return the names in the directory 'path'."""
+        try:
+            return self._listings[path]
+        except KeyError:
+            listing = self._listings[path] = list(self._os.listdir(path))
+            return listing
+
+    def mkdir(self, path, mode=0777):
+        u"""Make the directory 'path' in memory."""
+        try:
+            self.stat(path)
+        except OSError:
+            self._entered(path, stat.S_IFDIR | mode)
+            self._listings[path] = []
+        else:
+            raise OSError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+
+    def add_file(self, path, data):
+        u"""Create or replace the file 'path' in memory with 'data'."""
+        self._files[path] = bytes(data)
+        self._entered(path, stat.S_IFREG | 0644, data)
+
+    def unlink(self, path):
+        u"""Remove the file 'path'."""
+        self.stat(path)
+        self._files.pop(path, None)
+        self._stats[path] = None
+        parent, _, name = path.rpartition(os.sep)
+        listing = self._listings.get(parent or os.sep)
+        if listing is not None and name in listing:
+            listing.remove(name)
+
+    def open(self, path, mode=u'r'):
+        u"""Open 'path' for reading or, with a mode containing 'w',
+        writing."""
+        if u'w' in mode:
+            return _MemoryWriter(self, path)
+        try:
+            data = self._files[path]
+        except KeyError:
+            # A missing file raises IOError, as FileIO does.
+            try:
+                self.stat(path)
+            except OSError:
+                raise IOError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            with self._io.FileIO(path, u'r') as file:
+                data = self._files[path] = file.read()
+        return self._io.BytesIO(data)
+
+    def case_ok(self, directory, check):
+        u"""Replacement for importlib_full's _case_ok() using listdir()."""
+        if u'PYTHONCASEOK' in os.environ:
+            return True
+        self._counters[u'listdir'] += 1
+        return check in self.listdir(directory or self._cwd)
+
+
+@contextmanager
+def memory_filesystem(filesystem=None):
+    u"""Make importlib_full use 'filesystem', a new MemoryFilesystem by
+    default, which the context manager returns.
+
+    Only the calls importlib_full._bootstrap makes through its _os and _io
+    modules and _case_ok() are redirected; the built-in import and anything
+    else using the os module are not affected.
+
+    """
+    from importlib_full import _bootstrap
+    if filesystem is None:
+        filesystem = MemoryFilesystem()
+    original_os = _bootstrap._os
+    original_io = _bootstrap._io
+    original_case_ok = _bootstrap._case_ok
+    _bootstrap._os = _MemoryModule(original_os, {
+        u'stat': filesystem.stat, u'mkdir': filesystem.mkdir,
+        u'listdir': filesystem.listdir,
+        u'getcwd': lambda: filesystem._cwd})
+    _bootstrap._io = _MemoryModule(original_io, {u'FileIO': filesystem.open})
+    _bootstrap._case_ok = filesystem.case_ok
+    try:
+        yield filesystem
+    finally:
+        _bootstrap._os = original_os
+        _bootstrap._io = original_io
+        _bootstrap._case_ok = original_case_ok
+
+
+# Helpers for the benchmarks running child interpreters ##############
+
+IMPLEMENTATIONS = (u'builtin', u'importlib_full')
+
+
+def select_implementations(builtin=False, importlib=False):
+    u"""Return the IMPLEMENTATIONS left by the --builtin and --importlib
+    options of the benchmarks."""
+    return [implementation for implementation in IMPLEMENTATIONS
+            if not (builtin and implementation != u'builtin') and
+               not (importlib and implementation != u'importlib_full')]
+
+
+def child_environment(*paths):
+    u"""Return a copy of os.environ for a child interpreter whose
+    PYTHONPATH is 'paths' followed by the directory holding this copy of
+    importlib_full."""
+    import importlib_full
+    package_parent = os.path.dirname(os.path.dirname(
+        os.path.abspath(importlib_full.__file__)))
+    env = dict(os.environ)
+    env[u'PYTHONPATH'] = os.pathsep.join(list(paths) + [package_parent])
+    return env
+
+
+def find_strace():
+    u"""Return the path of strace on PATH, or None."""
+    for path in os.environ.get(u'PATH', u'').split(os.pathsep):
+        if os.access(os.path.join(path, u'strace'), os.X_OK):
+            return os.path.join(path, u'strace')
+    return None
+
+
+def parse_strace(path):
+    u"""Return {syscall: calls} from the summary written by strace -c."""
+    counts = {}
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if (len(fields) < 5 or not fields[0][0].isdigit() or
+                    fields[-1] == u'total'):
+                continue
+            counts[fields[-1]] = int(fields[3])
+    return counts
+
+
+@contextmanager
+def straced(command, strace=None):
+    u"""Return 'command' run under 'strace' if it is given and a dict, or
+    None without strace, which is filled with the {syscall: calls} strace
+    counted once the block exits."""
+    if not strace:
+        yield command, None
+        return
+    fd, summary = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        counts = {}
+        yield [strace, u'-f', u'-c', u'-o', summary] + command, counts
+        counts.update(parse_strace(summary))
+    finally:
+        os.unlink(summary)
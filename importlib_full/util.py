@@ -3,3 +3,8 @@ u"""Utility code for constructing importers, etc."""
 from ._bootstrap import module_for_loader
 from ._bootstrap import set_loader
 from ._bootstrap import set_package
+from ._lazy import LazyLoader
+from ._lazy import enable_lazy_loading
+from ._lazy import disable_lazy_loading
+from ._packed import enable_packed_bytecode
+from ._packed import disable_packed_bytecode